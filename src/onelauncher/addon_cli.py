@@ -0,0 +1,335 @@
+"""
+Command line addon management for scripts and scheduled jobs. It doesn't
+import Qt, so it starts quickly and works without a display. See
+`addons.engine.AddonEngine`.
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import onelauncher
+import onelauncher.logs
+from onelauncher.addons import batch_updates, download
+from onelauncher.addons.engine import AddonEngine, AddonEngineError
+
+ADDON_TYPES = ["Plugin", "Skin", "Music"]
+
+
+def get_table_names(
+        engine: AddonEngine,
+        addon_type: Optional[str],
+        installed: bool) -> List[str]:
+    """Returns installed or remote tables of the game for addon_type or all
+       addon types
+    """
+    addon_types = [addon_type] if addon_type else list(
+        engine.installed_table_names)
+    return [
+        engine.installed_table_names[addon_type] if installed
+        else engine.get_remote_table_name(addon_type)
+        for addon_type in addon_types
+        if addon_type in engine.installed_table_names]
+
+
+def print_rows(engine: AddonEngine, table_name: str, rows: List[tuple]) -> None:
+    """Prints addon rows with their rowid as tab separated columns. Columns
+       are addon type, name, version, author, interface ID, and whether
+       there is an update.
+    """
+    addon_type = engine.get_addon_type(table_name)
+    for _, name, _, version, author, _, _, interface_id, *_, update in rows:
+        print("\t".join((
+            addon_type, name, version, author, interface_id,
+            "update" if update else "")))
+
+
+def list_addons(engine: AddonEngine, args: argparse.Namespace) -> int:
+    engine.load_installed_addons()
+    if args.updates:
+        engine.load_remote_addons(force_check=True)
+        engine.check_for_updates()
+
+    for table_name in get_table_names(engine, args.type, installed=True):
+        rows = engine.search(table_name)
+        if args.updates:
+            rows = [row for row in rows if row[-1]]
+        print_rows(engine, table_name, sorted(
+            rows, key=lambda row: row[1].lower()))
+    return 0
+
+
+def search_addons(engine: AddonEngine, args: argparse.Namespace) -> int:
+    if args.installed:
+        engine.load_installed_addons()
+    elif not engine.load_remote_addons():
+        print("Some remote addons couldn't be loaded", file=sys.stderr)
+
+    for table_name in get_table_names(engine, args.type, args.installed):
+        print_rows(engine, table_name, engine.search(
+            table_name, " ".join(args.text)))
+    return 0
+
+
+def install_addons(engine: AddonEngine, args: argparse.Namespace) -> int:
+    files = [Path(addon) for addon in args.addons
+             if Path(addon).suffix in (".zip", ".abc") and Path(addon).is_file()]
+    queries = [addon for addon in args.addons if Path(addon) not in files]
+
+    errors: List[AddonEngineError] = []
+    for file in files:
+        try:
+            engine.install_addon_file(file)
+        except AddonEngineError as error:
+            print(error, file=sys.stderr)
+            errors.append(error)
+
+    if queries:
+        engine.load_installed_addons()
+        engine.load_remote_addons()
+        interface_ids: Dict[str, List[str]] = {}
+        try:
+            for table_name, addon in engine.find_addons(
+                    get_table_names(engine, args.type, installed=False),
+                    queries):
+                interface_ids.setdefault(table_name, []).append(addon[0])
+            for table_name, table_interface_ids in interface_ids.items():
+                errors.extend(engine.install_remote_addons(
+                    table_name, table_interface_ids))
+        except AddonEngineError as error:
+            print(error, file=sys.stderr)
+            return 1
+
+    return 1 if errors else 0
+
+
+def update_addons(engine: AddonEngine, args: argparse.Namespace) -> int:
+    if not args.all and not args.addons:
+        print("Addons to update or --all are needed", file=sys.stderr)
+        return 2
+
+    engine.load_installed_addons()
+    if not engine.load_remote_addons(force_check=True):
+        print("Some remote addons couldn't be loaded", file=sys.stderr)
+    table_names = get_table_names(engine, args.type, installed=True)
+    plan = [update for update in engine.check_for_updates()
+            if update[0] in table_names]
+    if args.addons:
+        try:
+            addons = engine.find_addons(table_names, args.addons)
+        except AddonEngineError as error:
+            print(error, file=sys.stderr)
+            return 1
+        interface_ids = {addon[0] for _, addon in addons}
+        plan = [update for update in plan if update[2] in interface_ids]
+
+    if not plan:
+        print("Everything is up to date")
+        return 0
+
+    errors = engine.update_addons(plan)
+    print(f"Updated {len(plan) - len(errors)} of {len(plan)} addons")
+    return 1 if errors else 0
+
+
+def update_games(args: argparse.Namespace) -> int:
+    """Updates every addon in each of the documents folders. See
+       `batch_updates.update_games`.
+    """
+    results = batch_updates.update_games(
+        ((documents_folder, args.game_type)
+         for documents_folder in args.documents_folder),
+        link_files=args.link_files)
+    updated_count = sum(len(result.updated) for result in results)
+    failed_count = sum(len(result.errors) for result in results)
+    if not updated_count and not failed_count:
+        print("Everything is up to date")
+        return 0
+
+    for result in results:
+        for name in result.updated:
+            print("\t".join((str(result.documents_folder), name)))
+    print(f"Updated {updated_count} of {updated_count + failed_count} addons "
+          f"in {len(results)} documents folders")
+    return 1 if failed_count else 0
+
+
+def deduplicate_games(args: argparse.Namespace) -> int:
+    """Links the addon files of each of the documents folders to the shared
+       file store. See `batch_updates.deduplicate_games`.
+    """
+    results = batch_updates.deduplicate_games(
+        (documents_folder, args.game_type)
+        for documents_folder in args.documents_folder)
+    for documents_folder, result in results:
+        print("\t".join((
+            str(documents_folder), str(result.linked_files),
+            download.format_size(result.saved_bytes))))
+    return 0
+
+
+def uninstall_addons(engine: AddonEngine, args: argparse.Namespace) -> int:
+    engine.load_installed_addons()
+    try:
+        addons = engine.find_addons(
+            get_table_names(engine, args.type, installed=True), args.addons)
+    except AddonEngineError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    addons_by_table: Dict[str, List[tuple]] = {}
+    for table_name, addon in addons:
+        addons_by_table.setdefault(table_name, []).append(addon)
+
+    for table_name, table_addons in addons_by_table.items():
+        dependents = engine.get_dependents(table_name, table_addons)
+        if dependents and not args.force:
+            for dependent_names in dependents.values():
+                print(f"{', '.join(dependent_names)} depend on addons being "
+                      "uninstalled. Use --force to uninstall them anyway.",
+                      file=sys.stderr)
+            return 1
+
+    for table_name, table_addons in addons_by_table.items():
+        engine.uninstall_addons(table_name, table_addons)
+    return 0
+
+
+def verify_addons(engine: AddonEngine, args: argparse.Namespace) -> int:
+    engine.load_installed_addons()
+    results = engine.verify_addons()
+    broken_addons = [addon for addon, problems in results.items() if problems]
+    for addon_type, interface_id in broken_addons:
+        for path, problem in results[(addon_type, interface_id)].items():
+            print("\t".join((addon_type, interface_id, problem, str(path))))
+    print(f"{len(broken_addons)} of {len(results)} addons have changed files",
+          file=sys.stderr)
+
+    if not args.repair or not broken_addons:
+        return 1 if broken_addons else 0
+
+    engine.load_remote_addons()
+    errors = []
+    for addon_type in engine.installed_table_names:
+        interface_ids = [interface_id for broken_addon_type, interface_id
+                         in broken_addons if broken_addon_type == addon_type]
+        if interface_ids:
+            try:
+                errors.extend(engine.install_remote_addons(
+                    engine.get_remote_table_name(addon_type), interface_ids))
+            except AddonEngineError as error:
+                print(error, file=sys.stderr)
+                return 1
+    return 1 if errors else 0
+
+
+def get_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="onelauncher-addons",
+        description=f"Manage {onelauncher.__title__} addons without the UI")
+    parser.add_argument(
+        "--version", action="version", version=onelauncher.__version__)
+    parser.add_argument(
+        "-d", "--documents-folder", type=Path, action="append", required=True,
+        help="Documents folder of the game. The addon folders are in it. "
+             "Can be given more than once for update --all and dedupe.")
+    parser.add_argument(
+        "-g", "--game-type", choices=["LOTRO", "DDO"], default="LOTRO")
+    parser.add_argument(
+        "-t", "--type", choices=ADDON_TYPES,
+        help="Only use addons of this type")
+    parser.add_argument(
+        "--link-files", action="store_true",
+        help="Link the files of installed addons to the file store shared "
+             "by all games, so files that several games have are only "
+             "stored once")
+    # Set by commands that work with several documents folders at once
+    parser.set_defaults(games_function=None)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="List installed addons")
+    list_parser.add_argument(
+        "--updates", action="store_true",
+        help="Only list addons that have an update")
+    list_parser.set_defaults(function=list_addons)
+
+    search_parser = subparsers.add_parser(
+        "search", help="Search addons on lotrointerface.com")
+    search_parser.add_argument("text", nargs="+")
+    search_parser.add_argument(
+        "--installed", action="store_true",
+        help="Search installed addons instead")
+    search_parser.set_defaults(function=search_addons)
+
+    install_parser = subparsers.add_parser(
+        "install", help="Install addons and the dependencies they are missing")
+    install_parser.add_argument(
+        "addons", nargs="+",
+        help="Interface IDs or names of addons on lotrointerface.com, or "
+             ".zip or .abc files")
+    install_parser.set_defaults(function=install_addons)
+
+    update_parser = subparsers.add_parser("update", help="Update addons")
+    update_parser.add_argument(
+        "addons", nargs="*", help="Interface IDs or names of addons")
+    update_parser.add_argument(
+        "--all", action="store_true", help="Update every addon")
+    update_parser.set_defaults(function=update_addons)
+
+    uninstall_parser = subparsers.add_parser(
+        "uninstall", help="Uninstall addons")
+    uninstall_parser.add_argument(
+        "addons", nargs="+", help="Interface IDs or names of addons")
+    uninstall_parser.add_argument(
+        "--force", action="store_true",
+        help="Uninstall addons even if others depend on them")
+    uninstall_parser.set_defaults(function=uninstall_addons)
+
+    verify_parser = subparsers.add_parser(
+        "verify",
+        help="Check that files of installed addons haven't changed")
+    verify_parser.add_argument(
+        "--repair", action="store_true",
+        help="Reinstall addons with changed files")
+    verify_parser.set_defaults(function=verify_addons)
+
+    dedupe_parser = subparsers.add_parser(
+        "dedupe",
+        help="Link addon files to the file store shared by all games, so "
+             "files that several games have are only stored once")
+    dedupe_parser.set_defaults(games_function=deduplicate_games)
+
+    return parser
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = get_argument_parser()
+    args = parser.parse_args(arguments)
+    if args.command == "update" and len(args.documents_folder) > 1:
+        if not args.all or args.addons or args.type:
+            parser.error("Several documents folders can only be updated "
+                         "with --all and without --type")
+        args.games_function = update_games
+    elif len(args.documents_folder) > 1 and args.command != "dedupe":
+        parser.error(f"{args.command} doesn't support several documents "
+                     "folders")
+    onelauncher.logs.setup_application_logging()
+
+    try:
+        if args.games_function:
+            return args.games_function(args)
+        engine = AddonEngine(
+            args.documents_folder[0], args.game_type,
+            link_files=args.link_files)
+    except AddonEngineError as error:
+        # The addons of a game are open in another process
+        print(error, file=sys.stderr)
+        return 1
+    try:
+        return args.function(engine, args)
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
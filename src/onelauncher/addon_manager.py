@@ -27,30 +27,401 @@
 # along with OneLauncher.  If not, see <http://www.gnu.org/licenses/>.
 ###########################################################################
 import logging
+import os
 import sqlite3
+import threading
 import urllib
-import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from http.client import HTTPException
 from pathlib import Path
-from shutil import copy, copytree, move, rmtree
+from shutil import copy
 from tempfile import TemporaryDirectory
-from time import localtime, strftime
-from typing import List, Optional, Tuple
-from xml.dom import EMPTY_NAMESPACE
-from xml.dom.minidom import Document, Element  # nosec
+from typing import (
+    Callable, Dict, Generator, Iterable, List, Optional, Set, Tuple)
+from xml.etree.ElementTree import ParseError  # nosec
 
 import defusedxml.minidom
 from PySide6 import QtCore, QtGui, QtWidgets
 from PySide6.QtUiTools import QUiLoader
-from vkbeautify import xml as prettify_xml
 
 import onelauncher
 from onelauncher import settings, resources, logger, game_settings
+from onelauncher.addons import (
+    abc_files, batch_updates, compendium, database, dependencies, download,
+    extraction, feeds, manifests, search, transactions, updates)
+from onelauncher.addons.archive_cache import AddonArchiveCache
+from onelauncher.addons.engine import AddonEngineError
+from onelauncher.addons.file_index import AddonFileIndex
+from onelauncher.addons.file_store import AddonFileStore, get_linkable_files
 from onelauncher.settings import CaseInsensitiveAbsolutePath
 from onelauncher.utilities import GetText
 from onelauncher.ui_resources import icon_font
 from onelauncher.ui.addon_manager_uic import Ui_winAddonManager
 
 
+class AddonJobCancelledError(Exception):
+    """Raised by addon job steps when their job has been cancelled"""
+
+
+class AddonJob():
+    """Addon operation started with `AddonManager.startAddonJob`"""
+
+    def __init__(self, description: str, steps: Generator) -> None:
+        self.description = description
+        self.steps = steps
+        self.status = "Queued"
+        # Progress of the job's download in percent
+        self.progress = 0
+        self.downloaded_size = 0
+        self.total_size: Optional[int] = None
+        self.bytes_per_second = 0.0
+        # Currently running step
+        self.future: Optional[Future] = None
+        self.finished = False
+        # Has the job's final status as its result once the job is finished
+        self.finished_future: Future = Future()
+        self.cancel_event = threading.Event()
+        # Changes the job makes to the game's addon folders. They are only
+        # kept if the job succeeds. See `AddonManager.runAddonJobTransaction`.
+        self.transaction: Optional[transactions.AddonTransaction] = None
+        # Called in order once the transaction is committed. Used for
+        # changes outside of the addon folders, like to the game's startup
+        # scripts, that should only be made if the job succeeds.
+        self.committed_callbacks: List[Callable[[], None]] = []
+
+    def check_cancelled(self) -> None:
+        """Raises `AddonJobCancelledError` if the job has been cancelled.
+           Used by steps that can be safely stopped part way.
+        """
+        if self.cancel_event.is_set():
+            raise AddonJobCancelledError()
+
+
+class AddonJobsModel(QtCore.QAbstractTableModel):
+    """Status and progress of each addon job started since the addon jobs
+       were last all finished
+    """
+    COLUMN_LIST = ["Job", "Status", "Progress"]
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self.jobs: List[AddonJob] = []
+        self.job_rows: Dict[AddonJob, int] = {}
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.jobs)
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMN_LIST)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.COLUMN_LIST[section]
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        job = self.jobs[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            if index.column() == 0:
+                return job.description
+            elif index.column() == 1:
+                return job.status
+            elif job.downloaded_size and not job.finished:
+                text = download.format_size(job.downloaded_size)
+                if job.total_size:
+                    text += f" / {download.format_size(job.total_size)}"
+                return f"{text} ({download.format_size(job.bytes_per_second)}/s)"
+            else:
+                return f"{job.progress}%"
+        # Progress column value for `AddonJobProgressDelegate`
+        elif role == QtCore.Qt.UserRole and index.column() == 2:
+            return job.progress
+
+    def addJob(self, job: AddonJob) -> None:
+        row = len(self.jobs)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.jobs.append(job)
+        self.job_rows[job] = row
+        self.endInsertRows()
+
+    def updateJob(self, job: AddonJob) -> None:
+        row = self.job_rows[job]
+        self.dataChanged.emit(
+            self.index(row, 0), self.index(row, len(self.COLUMN_LIST) - 1))
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self.jobs = []
+        self.job_rows = {}
+        self.endResetModel()
+
+
+class AddonJobProgressDelegate(QtWidgets.QStyledItemDelegate):
+    """Draws progress bars for the progress column of `AddonJobsModel`"""
+
+    def paint(self, painter, option, index):
+        progress_bar = QtWidgets.QStyleOptionProgressBar()
+        progress_bar.rect = option.rect
+        progress_bar.minimum = 0
+        progress_bar.maximum = 100
+        progress_bar.progress = index.data(QtCore.Qt.UserRole)
+        progress_bar.text = index.data()
+        progress_bar.textVisible = True
+        QtWidgets.QApplication.style().drawControl(
+            QtWidgets.QStyle.CE_ProgressBar, progress_bar, painter)
+
+
+class AddonsTableModel(QtCore.QAbstractTableModel):
+    """
+    Rows of an addons database table for the addon table views. Rows are
+    read from the database a page at a time as the view is scrolled to
+    them, and searching and sorting are done in SQL. Rows that haven't
+    been shown yet are never loaded.
+    """
+    COLUMN_LIST = ["ID", "Name", "Category", "Version", "Author",
+                   "Latest Release"]
+    # Database columns the visible columns are sorted by. The installed
+    # prefix is ignored, so it doesn't group rows together.
+    SORT_EXPRESSIONS = [
+        "{table}.rowid",
+        "REPLACE(Name, '(Installed) ', '') COLLATE NOCASE",
+        "Category COLLATE NOCASE",
+        "Version COLLATE VERSION",
+        "Author COLLATE NOCASE",
+        "LatestRelease",
+    ]
+    # Index of `database.UPDATE_AVAILABLE_COLUMN` in rows. They start with
+    # the rowid.
+    UPDATE_AVAILABLE_INDEX = len(database.ADDON_COLUMNS) + 1
+    # How many rows are read from the database at a time
+    ROWS_PER_FETCH = 200
+
+    def __init__(
+            self,
+            conn: sqlite3.Connection,
+            installed_addons_color: QtGui.QColor,
+            parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        # Own cursor, so rows can be fetched while other queries are
+        # being iterated over.
+        self.c = conn.cursor()
+        self.installed_addons_color = installed_addons_color
+        self.table_name: Optional[str] = None
+        self.match_query = ""
+        # Column to sort by. Search results are sorted by rank when it's -1.
+        self.sort_column = 1
+        self.sort_order = QtCore.Qt.AscendingOrder
+        self.rows: List[tuple] = []
+        self.total_row_count = 0
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMN_LIST)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.COLUMN_LIST[section]
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row = self.rows[index.row()]
+        value = str(row[index.column()])
+        if role == QtCore.Qt.DisplayRole:
+            if value.startswith("(Installed) "):
+                return value[len("(Installed) "):]
+            return value
+        elif role == QtCore.Qt.ForegroundRole:
+            # Unmanaged addons are red
+            if index.column() == 2 and value == "Unmanaged":
+                return QtGui.QColor("darkred")
+            # Outdated versions of installed addons are red, and the new
+            # versions in remote tables are green.
+            elif index.column() == 3 and row[self.UPDATE_AVAILABLE_INDEX]:
+                if self.table_name.endswith("Installed"):
+                    return QtGui.QColor("crimson")
+                return QtGui.QColor("green")
+        elif role == QtCore.Qt.BackgroundRole and self.isRowInstalled(index.row()):
+            return self.installed_addons_color
+
+    def flags(self, index):
+        # Installed addons can't be selected in remote tables
+        if index.isValid() and self.isRowInstalled(index.row()):
+            return QtCore.Qt.ItemIsEnabled
+        return super().flags(index)
+
+    def isRowInstalled(self, row: int) -> bool:
+        """Returns True if row is for an installed addon in a remote table"""
+        return str(self.rows[row][1]).startswith("(Installed) ")
+
+    def getRowID(self, row: int) -> int:
+        """Returns database rowid for row"""
+        return self.rows[row][0]
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()) -> bool:
+        return not parent.isValid() and len(self.rows) < self.total_row_count
+
+    def fetchMore(self, parent=QtCore.QModelIndex()) -> None:
+        if parent.isValid() or self.table_name is None:
+            return
+
+        table = self.table_name
+        from_clause, parameters = self.getFromClause()
+        if self.sort_column == -1:
+            order_by = "Rank" if self.match_query else f"{table}.rowid"
+        else:
+            order_by = self.SORT_EXPRESSIONS[self.sort_column].format(
+                table=table)
+            if self.sort_order == QtCore.Qt.DescendingOrder:
+                order_by += " DESC"
+
+        new_rows = self.c.execute(
+            f"SELECT {table}.rowid, {table}.* {from_clause} "  # nosec
+            f"ORDER BY {order_by}, {table}.rowid LIMIT ? OFFSET ?",
+            (*parameters, self.ROWS_PER_FETCH, len(self.rows))).fetchall()
+        if not new_rows:
+            # Rows were removed since the row count was checked
+            self.total_row_count = len(self.rows)
+            return
+
+        self.beginInsertRows(
+            QtCore.QModelIndex(),
+            len(self.rows),
+            len(self.rows) + len(new_rows) - 1)
+        self.rows.extend(new_rows)
+        self.endInsertRows()
+
+    def getFromClause(self) -> Tuple[str, tuple]:
+        """Returns FROM clause for the rows matching the current search
+           along with its parameters
+        """
+        if self.match_query:
+            return (f"FROM {self.table_name} "
+                    f"{search.get_match_join(self.table_name)}",
+                    (self.match_query,))
+        return f"FROM {self.table_name}", ()
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder) -> None:
+        self.sort_column = column
+        self.sort_order = order
+        if self.table_name is not None:
+            self.refresh()
+
+    def setSearch(self, table_name: str, text: str) -> None:
+        """Shows rows of table_name that match the search text"""
+        self.table_name = table_name
+        self.match_query = search.get_match_query(text)
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Reloads rows from the database. Only the first page of rows is
+           loaded until the view needs more.
+        """
+        self.beginResetModel()
+        self.rows = []
+        from_clause, parameters = self.getFromClause()
+        self.total_row_count = self.c.execute(
+            f"SELECT COUNT(*) {from_clause}", parameters).fetchone()[0]  # nosec
+        self.endResetModel()
+        self.fetchMore()
+
+    def clear(self) -> None:
+        """Removes all rows until the next search"""
+        self.beginResetModel()
+        self.table_name = None
+        self.rows = []
+        self.total_row_count = 0
+        self.endResetModel()
+
+
+class AddonFolderWatcher(QtCore.QObject):
+    """
+    Reports changes to addon folders, including ones made outside of
+    OneLauncher with a file manager. Each root folder and the folders
+    directly in it are watched, since that is where the compendium and
+    .plugin files that addons are found by are. One change usually causes
+    many events, so changed folders are collected until there haven't been
+    any new events for a moment.
+    """
+    # Milliseconds without events before changes are reported
+    DEBOUNCE_MS = 300
+    # List of changed folders as `Path` objects
+    FoldersChanged = QtCore.Signal(list)
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.handleDirectoryChanged)
+        self.debounce_timer = QtCore.QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(self.DEBOUNCE_MS)
+        self.debounce_timer.timeout.connect(self.emitChangedFolders)
+        # Watched folders in each root folder
+        self.subfolders: Dict[Path, Set[Path]] = {}
+        self.changed_folders: Set[Path] = set()
+        # Changes are held back while paused
+        self.paused = False
+
+    def watchRoot(self, root: Path) -> None:
+        """Watches root and the folders in it"""
+        root = Path(root)
+        self.subfolders[root] = set()
+        self.watcher.addPath(str(root))
+        self.updateSubfolders(root)
+
+    def updateSubfolders(self, root: Path) -> Set[Path]:
+        """Watches the folders that are in root now
+
+        Returns:
+            Set[Path]: Folders that were added to or removed from root since
+                       it was last checked.
+        """
+        try:
+            subfolders = {path for path in root.iterdir() if path.is_dir()}
+        except FileNotFoundError:
+            subfolders = set()
+
+        added = subfolders - self.subfolders[root]
+        removed = self.subfolders[root] - subfolders
+        if added:
+            self.watcher.addPaths([str(path) for path in added])
+        # Qt usually stops watching removed folders on its own
+        watched_removed = [
+            str(path) for path in removed
+            if str(path) in self.watcher.directories()]
+        if watched_removed:
+            self.watcher.removePaths(watched_removed)
+        self.subfolders[root] = subfolders
+        return added | removed
+
+    def handleDirectoryChanged(self, path: str) -> None:
+        self.changed_folders.add(Path(path))
+        if not self.paused:
+            self.debounce_timer.start()
+
+    def emitChangedFolders(self) -> None:
+        if self.paused or not self.changed_folders:
+            return
+
+        changed_folders = sorted(self.changed_folders)
+        self.changed_folders = set()
+        self.FoldersChanged.emit(changed_folders)
+
+    def setPaused(self, paused: bool) -> None:
+        """Holds back changes while paused. Changes that happened in the
+           meantime are reported once it's unpaused.
+        """
+        self.paused = paused
+        if not paused and self.changed_folders:
+            self.debounce_timer.start()
+
+
 class AddonManager(QtWidgets.QDialog):
     # ID is from the order plugins are found on the filesystem. InterfaceID is
     # the unique ID for plugins on lotrointerface.com
@@ -78,11 +449,25 @@ class AddonManager(QtWidgets.QDialog):
         "tableSkinsDDO",
         "tableSkinsDDOInstalled",
     ]
-
-    PLUGINS_URL = "https://api.lotrointerface.com/fav/OneLauncher-Plugins.xml"
-    SKINS_URL = "https://api.lotrointerface.com/fav/OneLauncher-Themes.xml"
-    MUSIC_URL = "https://api.lotrointerface.com/fav/OneLauncher-Music.xml"
-    SKINS_DDO_URL = "https://api.lotrointerface.com/fav/OneLauncher-Themes-DDO.xml"
+    PLUGINS_URL = feeds.PLUGINS_FEED_URL
+    SKINS_URL = feeds.SKINS_FEED_URL
+    MUSIC_URL = feeds.MUSIC_FEED_URL
+    SKINS_DDO_URL = feeds.SKINS_DDO_FEED_URL
+    # How many rows from a remote addons feed are sent to the UI at once
+    FEED_ROWS_PER_UI_UPDATE = 250
+    # Seconds to wait for a remote addons feed server to respond
+    FEED_TIMEOUT = 30
+    # Number of addons that are downloaded at the same time
+    ADDON_DOWNLOAD_WORKERS = 4
+    # Number of downloaded addons that are extracted at the same time
+    ADDON_EXTRACT_WORKERS = 2
+
+    # Signals for getting remote addons from feed worker threads
+    ReturnRemoteAddonsRows = QtCore.Signal(object, list)
+    ReturnRemoteAddonsResult = QtCore.Signal(object, object)
+    # Signals for addon job steps run on addon job worker threads
+    ReturnAddonJobStepResult = QtCore.Signal(object, object)
+    ReturnAddonJobProgress = QtCore.Signal(object, object, object, float)
 
     def __init__(
         self,
@@ -94,6 +479,19 @@ class AddonManager(QtWidgets.QDialog):
             QtCore.QCoreApplication.instance().activeWindow(),
             QtCore.Qt.FramelessWindowHint)
 
+        self.data_folder = gameDocumentsDir
+        # Addons are extracted here before being moved into the addon
+        # folders. Addon job transactions also keep their backups here.
+        self.addon_staging_dir = self.data_folder / ".onelauncher_staging"
+        # Other processes, like `onelauncher-addons`, can't change the
+        # game's addons while the addon manager is open.
+        self.addon_staging_dir_lock = transactions.StagingDirLock(
+            self.addon_staging_dir)
+        if not self.addon_staging_dir_lock.acquire():
+            raise AddonEngineError(
+                "The game's add-ons are being changed by another OneLauncher "
+                "process")
+
         self.ui = Ui_winAddonManager()
         self.ui.setupUi(self)
 
@@ -161,6 +559,31 @@ class AddonManager(QtWidgets.QDialog):
         self.ui.actionUpdateAllSelectedAddons.triggered.connect(
             self.updateAllSelectedAddons
         )
+        self.ui.actionUpdateAllGames = QtGui.QAction(
+            "Update addons in all games", self)
+        self.ui.btnAddonsMenu.addAction(
+            self.ui.actionUpdateAllGames
+        )
+        self.ui.actionUpdateAllGames.triggered.connect(
+            self.actionUpdateAllGamesSelected
+        )
+        self.ui.actionDeduplicateAllGames = QtGui.QAction(
+            "Store addon files shared by games once", self)
+        self.ui.btnAddonsMenu.addAction(
+            self.ui.actionDeduplicateAllGames
+        )
+        self.ui.actionDeduplicateAllGames.triggered.connect(
+            self.actionDeduplicateAllGamesSelected
+        )
+        self.ui.btnAddonsMenu.addAction(
+            self.ui.actionRemoveOrphanedDependencies
+        )
+        self.ui.actionRemoveOrphanedDependencies.triggered.connect(
+            self.actionRemoveOrphanedDependenciesSelected
+        )
+        # Only plugins have dependencies
+        self.ui.actionRemoveOrphanedDependencies.setVisible(
+            game_settings.current_game.game_type != "DDO")
 
         self.updateAddonFolderActions(0)
 
@@ -187,6 +610,13 @@ class AddonManager(QtWidgets.QDialog):
             self.checkForUpdates)
         self.ui.btnUpdateAll.pressed.connect(self.updateAll)
 
+        self.ui.btnCancelAddonJobs.setFont(icon_font)
+        self.ui.btnCancelAddonJobs.setText("\uf00d")
+        self.ui.btnCancelAddonJobs.clicked.connect(self.cancelAddonJobs)
+        self.ui.btnAddonJobs.setFont(icon_font)
+        self.ui.btnAddonJobs.setText("\uf0ae")
+        self.ui.btnAddonJobs.clicked.connect(self.btnAddonJobsClicked)
+
         self.ui.btnAddons.setMenu(
             self.ui.btnAddonsMenu)
         self.ui.btnAddons.clicked.connect(self.btnAddonsClicked)
@@ -206,24 +636,77 @@ class AddonManager(QtWidgets.QDialog):
         self.ui.txtLog.hide()
         self.ui.btnLog.clicked.connect(self.btnLogClicked)
 
+        self.addon_jobs_model = AddonJobsModel(self)
+        self.ui.tableAddonJobs.setModel(self.addon_jobs_model)
+        self.ui.tableAddonJobs.setItemDelegateForColumn(
+            2, AddonJobProgressDelegate(self.ui.tableAddonJobs))
+        self.ui.tableAddonJobs.setColumnWidth(0, 350)
+        self.ui.tableAddonJobs.hide()
+
         self.ui.txtSearchBar.setFocus()
         self.ui.txtSearchBar.textChanged.connect(
             self.txtSearchBarTextChanged
         )
 
+        self.openDB()
+
         for table in self.TABLE_LIST[:-2]:
             # Gets callable form from the string
             table = getattr(self.ui, table)
 
+            table.setModel(AddonsTableModel(
+                self.conn, self.installed_addons_color, table))
+
             # Hides ID column
             table.hideColumn(0)
 
             # Sort tables by addon name
-            table.sortItems(1)
-
-        self.openDB()
-
-        self.data_folder = gameDocumentsDir
+            table.sortByColumn(1, QtCore.Qt.AscendingOrder)
+
+        self.ReturnRemoteAddonsRows.connect(self.addRemoteAddonsRows)
+        self.ReturnRemoteAddonsResult.connect(self.handleRemoteAddonsResult)
+        self.remote_addons_pending_tables = set()
+
+        # Jobs started since the addon jobs were last all finished.
+        # See `startAddonJob`.
+        self.addon_jobs: List[AddonJob] = []
+        # Job whose generator is currently running
+        self.current_addon_job: Optional[AddonJob] = None
+        # Job that loads other games' addons into the installed tables, like
+        # updating the addons of all games. No other jobs can run with it.
+        self.exclusive_addon_job: Optional[AddonJob] = None
+        self.addon_download_executor = ThreadPoolExecutor(
+            max_workers=self.ADDON_DOWNLOAD_WORKERS,
+            thread_name_prefix="addon_download")
+        self.addon_extract_executor = ThreadPoolExecutor(
+            max_workers=self.ADDON_EXTRACT_WORKERS,
+            thread_name_prefix="addon_extract")
+        # Partial downloads are kept here, so they can be resumed
+        self.addon_downloads_dir = (
+            settings.platform_dirs.user_cache_path / "addon_downloads")
+        self.addon_downloads_dir.mkdir(parents=True, exist_ok=True)
+        # Shared by all games
+        self.addon_archive_cache = AddonArchiveCache(
+            settings.platform_dirs.user_cache_path / "addon_archives",
+            settings.program_settings.addon_archive_cache_size * 1024 * 1024)
+        # Also shared by all games. Addon files are only linked to it if
+        # `settings.ProgramSettings.link_addon_files` is enabled.
+        self.addon_file_store = AddonFileStore(
+            settings.platform_dirs.user_cache_path / "addon_store")
+        # Addons are written to the game's addon folders one at a time
+        self.addon_commit_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="addon_commit")
+        # Steps that finished while remote addons were loading
+        self.deferred_addon_job_steps: List[Tuple[AddonJob, Future]] = []
+        # Interface IDs of remote addons that are being installed
+        self.installing_interface_ids = set()
+        # Queued, so jobs are never advanced from inside of themselves
+        # when a step finishes before its done callback is added.
+        self.ReturnAddonJobStepResult.connect(
+            self.handleAddonJobStepResult, QtCore.Qt.QueuedConnection)
+        self.ReturnAddonJobProgress.connect(self.handleAddonJobProgress)
+
+        transactions.recover_transactions(self.addon_staging_dir)
         if game_settings.current_game.game_type == "DDO":
             self.data_folder_skins = self.data_folder / "ui/skins"
 
@@ -240,6 +723,15 @@ class AddonManager(QtWidgets.QDialog):
             # Loads in installed plugins
             self.getInstalledPlugins()
 
+        # Installed tables are kept up to date with changes to the addon
+        # folders instead of being reloaded.
+        self.addon_folder_watcher = AddonFolderWatcher(self)
+        for folder in self.getWatchedAddonFolders().values():
+            folder.mkdir(parents=True, exist_ok=True)
+            self.addon_folder_watcher.watchRoot(folder)
+        self.addon_folder_watcher.FoldersChanged.connect(
+            self.handleAddonFoldersChanged)
+
     def getInstalledSkins(self, folders_list: Optional[List[Path]] = None):
         if self.isTableEmpty(self.ui.tableSkinsInstalled):
             folders_list = None
@@ -260,27 +752,24 @@ class AddonManager(QtWidgets.QDialog):
                     skins_list.remove(folder)
                     break
 
-        self.addInstalledSkinsToDB(skins_list, skins_list_compendium)
+        files_data = self.getAddonFilesData(skins_list_compendium)
+        self.addInstalledSkinsToDB(
+            skins_list, skins_list_compendium, files_data)
 
     def addInstalledSkinsToDB(
             self,
             skins_list: List[Path],
-            skins_list_compendium: List[Path]):
+            skins_list_compendium: List[Path],
+            files_data: Dict[Path, dict]):
         table = self.ui.tableSkinsInstalled
 
-        # Clears rows from db table if needed (This function is called to add
-        # newly installed skins after initial load as well)
-        if self.isTableEmpty(table):
-            self.c.execute(
-                "DELETE FROM {table}".format(table=table.objectName())  # nosec
-            )
-
+        rows = []
         for skin in skins_list_compendium:
-            items_row = self.parseCompendiumFile(skin, "SkinConfig")
+            items_row = list(files_data[skin]["row"])
             items_row = self.getOnlineAddonInfo(
                 items_row, self.ui.tableSkins.objectName()
             )
-            self.addRowToDB(table, items_row)
+            rows.append(items_row)
 
         for skin in skins_list:
             items_row = [""] * (len(self.COLUMN_LIST) - 1)
@@ -289,7 +778,17 @@ class AddonManager(QtWidgets.QDialog):
             items_row[5] = str(skin)
             items_row[1] = "Unmanaged"
 
-            self.addRowToDB(table, items_row)
+            rows.append(items_row)
+
+        with self.conn:
+            # Clears rows from db table if needed (This function is called to
+            # add newly installed skins after initial load as well)
+            if self.isTableEmpty(table):
+                self.c.execute(
+                    "DELETE FROM {table}".format(table=table.objectName())  # nosec
+                )
+
+            self.addRowsToDB(table, rows)
 
         # Populate user visible table
         self.reloadSearch(self.ui.tableSkinsInstalled)
@@ -300,9 +799,14 @@ class AddonManager(QtWidgets.QDialog):
 
         self.data_folder_music.mkdir(parents=True, exist_ok=True)
 
+        # Loose .abc files come from the ABC index. Only the ones that
+        # changed since the last scan are parsed. They are only added when
+        # the whole music folder is loaded. See `refreshLooseAbcFiles`.
+        abc_rows = []
         if not folders_list:
             folders_list = [
                 path for path in self.data_folder_music.glob("*") if path.is_dir()]
+            abc_rows = self.abc_index.scan(self.data_folder_music)
 
         music_list = []
         music_list_compendium = []
@@ -316,58 +820,59 @@ class AddonManager(QtWidgets.QDialog):
                     music_list.remove(folder)
                     break
 
-        for file in self.data_folder_music.iterdir():
-            if file.suffix == ".abc":
-                music_list.append(file)
-
-        self.addInstalledMusicToDB(music_list, music_list_compendium)
-
-    def parse_abc_file(self, abc_path: Path) -> Tuple[str, str]:
-        with abc_path.open() as file:
-            song_name = ""
-            author = ""
-            for _ in range(3):
-                line = file.readline().strip()
-                if line.startswith("T: "):
-                    song_name = line[3:]
-                if line.startswith("Z: "):
-                    author = (
-                        line[18:]
-                        if line.startswith("Z: Transcribed by ")
-                        else line[3:]
-                    )
-
-            return song_name, author
+        files_data = self.getAddonFilesData(music_list_compendium)
+        self.addInstalledMusicToDB(
+            music_list, music_list_compendium, files_data, abc_rows)
 
     def addInstalledMusicToDB(
             self,
             music_list: List[Path],
-            music_list_compendium: List[Path]):
-        table = self.ui.tableMusicInstalled
+            music_list_compendium: List[Path],
+            files_data: Dict[Path, dict],
+            abc_rows: Iterable[tuple] = ()):
+        """Adds music to the installed music table
 
-        # Clears rows from db table if needed (This function is called
-        # to add newly installed music after initial load as well)
-        if self.isTableEmpty(table):
-            self.c.execute("DELETE FROM tableMusicInstalled")
+        Args:
+            music_list (List[Path]): Unmanaged music folders.
+            music_list_compendium (List[Path]): Compendium files of music.
+            files_data (Dict[Path, dict]): Data of the compendium files.
+            abc_rows (Iterable[tuple], optional): Loose .abc files from
+                                                  `abc_files.AbcIndex.scan`.
+        """
+        table = self.ui.tableMusicInstalled
 
+        rows = []
         for music in music_list_compendium:
-            items_row = self.parseCompendiumFile(music, "MusicConfig")
+            items_row = list(files_data[music]["row"])
             items_row = self.getOnlineAddonInfo(items_row, "tableMusic")
-            self.addRowToDB(table, items_row)
+            rows.append(items_row)
 
         for music in music_list:
             items_row = [""] * (len(self.COLUMN_LIST) - 1)
 
             items_row[0] = music.stem
-            if music.suffix == ".abc":
-                song_name, items_row[3] = self.parse_abc_file(music)
-                if song_name:
-                    items_row[0] = song_name
-
             items_row[5] = str(music)
             items_row[1] = "Unmanaged"
 
-            self.addRowToDB(table, items_row)
+            rows.append(items_row)
+
+        for path, title, transcriber, *_ in abc_rows:
+            items_row = [""] * (len(self.COLUMN_LIST) - 1)
+
+            items_row[0] = title or Path(path).stem
+            items_row[3] = transcriber
+            items_row[5] = path
+            items_row[1] = "Unmanaged"
+
+            rows.append(items_row)
+
+        with self.conn:
+            # Clears rows from db table if needed (This function is called
+            # to add newly installed music after initial load as well)
+            if self.isTableEmpty(table):
+                self.c.execute("DELETE FROM tableMusicInstalled")
+
+            self.addRowsToDB(table, rows)
 
         # Populate user visible table
         self.reloadSearch(table)
@@ -378,107 +883,125 @@ class AddonManager(QtWidgets.QDialog):
 
         self.data_folder_plugins.mkdir(parents=True, exist_ok=True)
 
-        if not folders_list:
-            folders_list = [
-                path for path in self.data_folder_plugins.glob("*") if path.is_dir()]
+        # The whole plugins folder is scanned when no folders are given
+        scan_folders = folders_list or [self.data_folder_plugins]
 
-        # Finds all plugins and adds their .plugincompendium files to a list
+        # Finds all plugins and adds their .plugincompendium files to a list.
+        # Only files that changed since they were last indexed get parsed.
         plugins_list_compendium = []
         plugins_list = []
-        for folder in folders_list:
-            for file in folder.glob("**/*.plugin*"):
+        files_data = {}
+        for scan_folder in scan_folders:
+            unchanged_files, changed_files = self.file_index.scan(
+                scan_folder, (".plugin", ".plugincompendium"))
+
+            for file in [*unchanged_files, *changed_files]:
+                relative_parts = file.relative_to(
+                    self.data_folder_plugins).parts
+                # Plugin files need to be in an author folder
+                if len(relative_parts) < 2:
+                    continue
+
                 if file.suffix == ".plugincompendium":
                     # .plugincompenmdium file should be in author folder of plugin
-                    if file.parent == folder:
+                    if len(relative_parts) == 2:
                         plugins_list_compendium.append(file)
                 elif file.suffix == ".plugin":
                     plugins_list.append(file)
 
+            files_data.update(unchanged_files)
+
+            plugin_files = set(plugins_list + plugins_list_compendium)
+            files_data.update(self.parseAddonFiles(
+                {file: stat for file, stat in changed_files.items()
+                 if file in plugin_files}))
+
         self.removeManagedPluginsFromList(
-            plugins_list, plugins_list_compendium
+            plugins_list, plugins_list_compendium, files_data
         )
 
-        self.addInstalledPluginsToDB(plugins_list, plugins_list_compendium)
+        self.addInstalledPluginsToDB(
+            plugins_list, plugins_list_compendium, files_data)
 
     def removeManagedPluginsFromList(
             self,
             plugin_files: List[CaseInsensitiveAbsolutePath],
-            compendium_files: List[CaseInsensitiveAbsolutePath]) -> None:
-        """Removes plugin files from plugin_files that aren't managed by a compendium file"""
+            compendium_files: List[CaseInsensitiveAbsolutePath],
+            files_data: Dict[Path, dict]) -> None:
+        """Removes plugin files from plugin_files that are managed by a compendium file"""
+        managed_plugin_files = set()
         for compendium_file in compendium_files:
-            doc = defusedxml.minidom.parse(str(compendium_file))
-            nodes = doc.getElementsByTagName("Descriptors")[0].childNodes
-
-            for node in nodes:
-                if node.nodeName == "descriptor":
-                    descriptor_path = self.data_folder_plugins / \
-                        (GetText(node.childNodes).replace("\\", "/"))
+            for descriptor in files_data[compendium_file]["descriptors"]:
+                descriptor_path = self.data_folder_plugins / \
+                    (descriptor.replace("\\", "/"))
+                managed_plugin_files.add(descriptor_path)
 
-                    # Remove descriptor plugin file from plugin_files
-                    descriptor_plugin_files = [
-                        file for file in plugin_files if file == descriptor_path]
-                    for file in descriptor_plugin_files:
-                        plugin_files.remove(file)
+                if not descriptor_path.exists():
+                    self.addLog(
+                        f"{compendium_file} has misconfigured descriptors")
 
-                    if not descriptor_path.exists():
-                        self.addLog(
-                            f"{compendium_file} has misconfigured descriptors")
+        # Remove descriptor plugin files from plugin_files
+        plugin_files[:] = [
+            file for file in plugin_files if file not in managed_plugin_files]
 
     def addInstalledPluginsToDB(
             self,
             plugin_files: List[CaseInsensitiveAbsolutePath],
-            compendium_files: List[CaseInsensitiveAbsolutePath]):
+            compendium_files: List[CaseInsensitiveAbsolutePath],
+            files_data: Dict[Path, dict]):
         table = self.ui.tablePluginsInstalled
 
-        # Clears rows from db table if needed (This function is called to
-        # add newly installed plugins after initial load as well)
-        if self.isTableEmpty(table):
-            self.c.execute("DELETE FROM tablePluginsInstalled")
-
+        rows = []
         for file in compendium_files + plugin_files:
-            # Sets tag for plugin file xml search and category for unmanaged
-            # plugins
+            items_row = list(files_data[file]["row"])
+            # Sets category for unmanaged plugins
             if file.suffix == ".plugincompendium":
-                items_row = self.parseCompendiumFile(file, "PluginConfig")
                 items_row = self.getOnlineAddonInfo(items_row, "tablePlugins")
             else:
-                items_row = self.parseCompendiumFile(file, "Information")
                 items_row[1] = "Unmanaged"
 
-            self.addRowToDB(table, items_row)
+            rows.append(items_row)
+
+        with self.conn:
+            # Clears rows from db table if needed (This function is called to
+            # add newly installed plugins after initial load as well)
+            if self.isTableEmpty(table):
+                self.c.execute("DELETE FROM tablePluginsInstalled")
+
+            self.addRowsToDB(table, rows)
 
         # Populate user visible table
         self.reloadSearch(self.ui.tablePluginsInstalled)
 
-    def getAddonDependencies(self, dependencies_node: Element):
-        dependencies = ""
-        for node in dependencies_node.childNodes:
-            if node.nodeName == "dependency":
-                dependencies = dependencies + "," + (GetText(node.childNodes))
-        return dependencies[1:]
+    def getAddonFilesData(self, files: List[Path]) -> Dict[Path, dict]:
+        """Returns data for compendium or .plugin files. The file index is
+           used for files that haven't changed since they were last parsed.
+        """
+        files_data = {}
+        changed_files = {}
+        for file in files:
+            stat = file.stat()
+            file_data = self.file_index.get(file, stat)
+            if file_data is None:
+                changed_files[file] = stat
+            else:
+                files_data[file] = file_data
+
+        files_data.update(self.parseAddonFiles(changed_files))
+        return files_data
+
+    def parseAddonFiles(
+            self, files: Dict[Path, os.stat_result]) -> Dict[Path, dict]:
+        """Parses compendium or .plugin files and adds them to the file index"""
+        files_data = compendium.parse_addon_files(list(files))
+        for file, stat in files.items():
+            self.file_index.update(file, stat, files_data[file])
+
+        return files_data
 
     def parseCompendiumFile(self, file: Path, tag: str) -> List[str]:
         """Returns list of common values for compendium or .plugin files"""
-        items_row = [""] * (len(self.COLUMN_LIST) - 1)
-
-        doc = defusedxml.minidom.parse(str(file))
-        nodes = doc.getElementsByTagName(tag)[0].childNodes
-        for node in nodes:
-            if node.nodeName == "Name":
-                items_row[0] = GetText(node.childNodes)
-            elif node.nodeName == "Author":
-                items_row[3] = GetText(node.childNodes)
-            elif node.nodeName == "Version":
-                items_row[2] = GetText(node.childNodes)
-            elif node.nodeName == "Id":
-                items_row[6] = GetText(node.childNodes)
-            elif node.nodeName == "Dependencies":
-                items_row[7] = self.getAddonDependencies(node)
-            elif node.nodeName == "StartupScript":
-                items_row[8] = GetText(node.childNodes)
-        items_row[5] = str(file)
-
-        return items_row
+        return compendium.parse_compendium_file(file, tag)
 
     def getOnlineAddonInfo(
             self,
@@ -501,90 +1024,27 @@ class AddonManager(QtWidgets.QDialog):
 
     def openDB(self):
         """
-        Opens addons_cache database and creates new database if
-        one doesn't exist or the current one has an outdated structure
+        Opens addons_cache database and migrates it to the current
+        schema version. Cached addons are kept through upgrades.
         """
         addons_cache_db_path = settings.platform_dirs.user_cache_path / "addons_cache.sqlite"
-        if addons_cache_db_path.exists():
-            # Connects to addons_cache database
-            self.conn = sqlite3.connect(str(addons_cache_db_path))
-            self.c = self.conn.cursor()
-
-            # Replace old database if its structure is out of date
-            if self.isCurrentDBOutdated():
-                self.closeDB()
-                addons_cache_db_path.unlink()
-                self.createDB()
-        else:
-            self.createDB()
-
-    def isCurrentDBOutdated(self):
-        """
-        Checks if currently loaded database's structure is up to date.
-        Returns True if it is outdated and False otherwise.
-        """
-
-        tables_dict = {}
-        # SQL returns all the columns in all the tables labled with what table
-        # they're from
-        for column_data in self.c.execute(
-            "SELECT m.name as tableName, p.name as columnName FROM sqlite_master"
-            " m left outer join pragma_table_info((m.name)) p on m.name <>"
-                " p.name ORDER BY tableName, columnName"):
-            # Ignore tables without actual information
-            if column_data[0].endswith(
-                ("_idx", "_docsize", "_data", "_content", "_config")
-            ):
-                continue
-
-            if column_data[0] in tables_dict:
-                tables_dict[column_data[0]].append(column_data[1])
-            else:
-                tables_dict[column_data[0]] = [column_data[1]]
-
-        for table in self.TABLE_LIST:
-            if table in tables_dict:
-                for column in self.COLUMN_LIST[1:]:
-                    try:
-                        tables_dict[table].remove(column)
-                    except ValueError:
-                        return True
-
-                # Return true if there are extra columns in table
-                if tables_dict[table]:
-                    return True
-
-                # Delete table from dictionary, so program can
-                # check if there are extra tables in tables_dict afterwards
-                del tables_dict[table]
-            else:
-                return True
-
-        # Only return False if there are no extra tables
-        return bool(tables_dict)
-
-    def createDB(self):
-        """Creates ans sets up addons_cache database"""
-        self.conn = sqlite3.connect(
-            str(settings.platform_dirs.user_cache_path / "addons_cache.sqlite")
-        )
+        self.conn = database.connect(addons_cache_db_path)
         self.c = self.conn.cursor()
+        try:
+            database.migrate(self.conn)
+        except database.SchemaVersionError:
+            # Database is from a newer version of OneLauncher. It's only a
+            # cache, so it's replaced.
+            logger.warning("Replacing addons cache from newer OneLauncher")
+            self.closeDB()
+            addons_cache_db_path.unlink()
+            self.conn = database.connect(addons_cache_db_path)
+            self.c = self.conn.cursor()
+            database.migrate(self.conn)
 
-        for table in self.TABLE_LIST:
-            self.c.execute(
-                "CREATE VIRTUAL TABLE {tbl_nm} USING FTS5({clmA}, {clmB}, {clmC}, "
-                "{clmD}, {clmE}, {clmF}, {clmG}, {clmH}, {clmI})".format(
-                    tbl_nm=table,
-                    clmA=self.COLUMN_LIST[1],
-                    clmB=self.COLUMN_LIST[2],
-                    clmC=self.COLUMN_LIST[3],
-                    clmD=self.COLUMN_LIST[4],
-                    clmE=self.COLUMN_LIST[5],
-                    clmF=self.COLUMN_LIST[6],
-                    clmG=self.COLUMN_LIST[7],
-                    clmH=self.COLUMN_LIST[8],
-                    clmI=self.COLUMN_LIST[9],
-                ))
+        self.file_index = AddonFileIndex(self.c)
+        self.abc_index = abc_files.AbcIndex(self.c)
+        self.feed_cache = feeds.FeedCache(self.c)
 
     def closeDB(self):
         self.conn.commit()
@@ -606,12 +1066,32 @@ class AddonManager(QtWidgets.QDialog):
 
         if file_names[0]:
             for file in file_names[0]:
-                self.installAddon(Path(file))
+                self.startAddonJob(
+                    f"Installing {Path(file).name}",
+                    self.installAddon(Path(file)))
 
-    def installAddon(self, addon_path: Path, interface_id: str = ""):
+    def installAddon(
+            self,
+            addon_path: Path,
+            interface_id: str = "",
+            addon_name: Optional[str] = None,
+            manifest: Optional[manifests.AddonManifest] = None):
+        """Installs an addon file
+
+        Args:
+            addon_path (Path): .zip archive or .abc file.
+            interface_id (str, optional): Interface ID if the addon is from
+                                          lotrointerface.com.
+            addon_name (Optional[str], optional): Name for the addon's folder
+                                                  if it needs one. Defaults
+                                                  to the archive name.
+            manifest (Optional[manifests.AddonManifest], optional): Manifest
+                of the installed version when updating an archive addon. Only
+                the files that changed are then replaced.
+        """
         # Install .abc files
         if addon_path.suffix == ".abc":
-            self.installAbcFile(addon_path)
+            yield from self.installAbcFile(addon_path)
             return
         elif addon_path.suffix == ".rar":
             self.addLog(
@@ -620,102 +1100,160 @@ class AddonManager(QtWidgets.QDialog):
                 "program to extract")
             return
         elif addon_path.suffix == ".zip":
-            self.installZipAddon(addon_path, interface_id)
+            yield from self.installZipAddon(
+                addon_path, interface_id, addon_name or addon_path.stem,
+                manifest)
 
     def installAbcFile(self, addon_path: Path):
         if game_settings.current_game.game_type == "DDO":
             self.addLog("DDO does not support .abc/music files")
             return
 
-        copy(str(addon_path), self.data_folder_music)
+        # Copied to the staging folder first, so the file only shows up in
+        # the music folder once it is complete.
+        with transactions.StagingFolder(self.addon_staging_dir) as tmp_dir:
+            tmp_path = tmp_dir / addon_path.name
+            yield self.submitAddonJobStep(
+                self.addon_extract_executor, "Copying",
+                copy, str(addon_path), str(tmp_path))
+            yield self.submitAddonJobStep(
+                self.addon_commit_executor, "Installing",
+                self.current_addon_job.transaction.move_into,
+                tmp_path, self.data_folder_music / addon_path.name)
         logger.info(f"{addon_path} installed")
 
-        # Plain .abc files are installed to base music directory,
-        # so what is scanned can't be controlled
-        self.ui.tableMusicInstalled.clearContents()
-        self.getInstalledMusic()
+        self.refreshLooseAbcFiles()
 
-    def installZipAddon(self, addon_path: Path, interface_id: str):
-        with TemporaryDirectory() as tmp_dir_name:
-            tmp_dir = Path(tmp_dir_name)
+    def installZipAddon(
+            self,
+            addon_path: Path,
+            interface_id: str,
+            addon_name: str,
+            manifest: Optional[manifests.AddonManifest] = None):
+        # Staging folder is on the same filesystem as the addon folders, so
+        # the extracted addon can be moved into place without copying it.
+        with transactions.StagingFolder(self.addon_staging_dir) as tmp_dir:
+            try:
+                plan = yield self.submitAddonJobStep(
+                    self.addon_extract_executor, "Extracting",
+                    extraction.extract_addon, addon_path, tmp_dir, addon_name,
+                    self.current_addon_job.check_cancelled,
+                    partial(manifests.get_unchanged_paths, manifest=manifest)
+                    if manifest else None)
+            except extraction.AddonArchiveError as error:
+                self.addLog(str(error))
+                return
+            if plan is None:
+                self.addLog("Add-on Zip is empty. Aborting")
+                return
+            if settings.program_settings.link_addon_files:
+                yield self.submitAddonJobStep(
+                    self.addon_extract_executor, "Linking",
+                    self.addon_file_store.link_files,
+                    get_linkable_files(tmp_dir), self.addon_staging_dir)
+
+            if manifest:
+                yield from self.removeOutdatedAddonFiles(
+                    plan, manifest, interface_id)
+
+            root_dir = tmp_dir / plan.root_dir
+            if plan.addon_type == "Plugin":
+                installed = yield from self.install_plugin(
+                    tmp_dir, root_dir, interface_id)
+            elif plan.addon_type == "Music":
+                installed = yield from self.install_music(
+                    root_dir, interface_id)
+            else:
+                installed = yield from self.install_skin(
+                    root_dir, interface_id)
+
+            if installed and settings.program_settings.link_addon_files:
+                addon_folder = self.getAddonTypeDataFolder(plan.addon_type)
+                # Plugins are moved without their root folder
+                yield self.submitAddonJobStep(
+                    self.addon_extract_executor, "Installing",
+                    self.addon_file_store.move_files,
+                    *((tmp_dir, addon_folder) if plan.addon_type == "Plugin"
+                      else (root_dir, addon_folder / root_dir.name)))
+
+        # Manifests are only needed for updates, which only remote addons get
+        if installed and interface_id:
+            addon_folder = self.getAddonTypeDataFolder(plan.addon_type)
+            files = yield self.submitAddonJobStep(
+                self.addon_extract_executor, "Installing",
+                manifests.get_installed_files, addon_folder, plan)
+            with self.conn:
+                manifests.set_manifest(
+                    self.c, addon_folder, interface_id, files)
+
+    def removeOutdatedAddonFiles(
+            self,
+            plan: extraction.ExtractionPlan,
+            manifest: manifests.AddonManifest,
+            interface_id: str):
+        """Prepares an installed addon to be updated in place. Files that
+           aren't in the new version are removed along with the compendium
+           file, which is always regenerated. The addon's row is removed from
+           the installed table, since installing it adds a new one. Its
+           startup script is deactivated once the update is committed, like
+           when uninstalling, so the user is asked about the new version of
+           it.
+        """
+        table = self.getInstalledTableFromAddonType(manifest.addon_type)
+        script = self.getRelativeStartupScriptFromInterfaceID(
+            table, interface_id)
+        if script:
+            self.current_addon_job.committed_callbacks.append(
+                partial(self.deactivateStartupScript, script))
+
+        for addon in self.c.execute(
+                f"SELECT InterfaceID, File, Name FROM {table.objectName()} "  # nosec
+                "WHERE InterfaceID = ?", (interface_id,)).fetchall():
+            if addon[1].endswith("compendium"):
+                yield self.submitAddonJobStep(
+                    self.addon_commit_executor, "Removing old files",
+                    self.current_addon_job.transaction.remove, Path(addon[1]))
+            # Name of the remote addon is used for the new compendium file
+            self.setRemoteAddonToUninstalled(
+                addon, self.getRemoteOrLocalTableFromOne(table, remote=True))
 
-            # Extract addon to temporary directory.
-            with zipfile.ZipFile(addon_path, "r") as archive:
-                # Addons without any files aren't valid
-                if all(zip_info.is_dir() for zip_info in archive.infolist()):
-                    self.addLog("Add-on Zip is empty. Aborting")
-                    return
+        removed_paths = manifests.get_removed_paths(plan, manifest)
+        yield self.submitAddonJobStep(
+            self.addon_commit_executor, "Removing old files",
+            manifests.remove_files, self.current_addon_job.transaction,
+            manifest.addon_folder, removed_paths)
+        logger.info(
+            f"Updating {interface_id} in place. {len(removed_paths)} files "
+            f"removed and {len(plan.unchanged_paths)} unchanged")
 
-                archive.extractall(tmp_dir)
+        with self.conn:
+            self.c.execute(
+                f"DELETE FROM {table.objectName()} "  # nosec
+                "WHERE InterfaceID = ?", (interface_id,))
 
-            self.clean_temp_addon_folder(tmp_dir)
+    def install_plugin(
+            self,
+            tmp_dir: Path,
+            author_folder: Path,
+            interface_id: str):
+        """Install plugin from temporary directory
 
-            for path in tmp_dir.glob("**/*.*"):
-                if path.suffix == ".plugin":
-                    self.install_plugin(
-                        tmp_dir, interface_id)
-                    return
-                elif path.suffix == ".abc":
-                    if (
-                        self.install_music(
-                            tmp_dir, interface_id, addon_path.stem
-                        )
-                        is False
-                    ):
-                        continue
-                    else:
-                        return
-            self.install_skin(tmp_dir, interface_id, addon_path.stem)
+        Args:
+            tmp_dir (Path): Staging folder the plugin was extracted to.
+            author_folder (Path): Author folder in tmp_dir. See
+                                  `extraction.get_extraction_plan`.
+            interface_id (str): Interface ID if the plugin is from
+                                lotrointerface.com.
 
-    def install_plugin(self, tmp_dir: Path, interface_id: str) -> None:
-        """Install plugin from temporary directory"""
+        Returns:
+            bool: Whether the plugin was installed.
+        """
         if game_settings.current_game.game_type == "DDO":
             self.addLog("DDO does not support plugins")
             return
 
         table = self.ui.tablePlugins
 
-        author_folders = [path for path in tmp_dir.glob("*") if path.is_dir()]
-
-        # Filter out common dependency folder names
-        # that are sometimes included with plugins.
-        filtered_author_folders = [
-            folder for folder in author_folders if folder.name.lower() not in [
-                "turbine", "turbineplugins"]]
-        # Use non-filtered author folders if there are no author
-        # folders left after filtering.
-        # Ex. When installing the filtered libraries standalone.
-        author_folders = filtered_author_folders or author_folders
-
-        # There can only be one author folder. That is where the
-        # compendium file goes. What appear to be extra author
-        # folders are usually included dependencies (grr.. there
-        # is compendium syntax for that). The true author folder
-        # where the actual plugin files are must be determined.
-        if len(author_folders) > 1:
-            # The most likely author folder is where a
-            # .plugincompendium file is.
-            author_folders_compendium = [
-                dir for dir in author_folders if list(
-                    dir.glob("*.plugincompendium"))]
-            if author_folders_compendium:
-                author_folder = author_folders_compendium[0]
-            else:
-                # The next most likely author folder is where
-                # .plugin files are. Dependencies may also
-                # have .plugin files though.
-                author_folders_plugin = [
-                    dir for dir in author_folders if list(
-                        dir.glob("*.plugin"))]
-                if author_folders_plugin:
-                    author_folder = author_folders_plugin[0]
-                else:
-                    self.addLog("Plugin doesn't have an author folder"
-                                " with a .plugin file.")
-                    return
-        else:
-            author_folder = author_folders[0]
-
         # .plugin files should always be in the author folder. All others
         # will be ignored by both me and the game.
         plugin_files = list(author_folder.glob("*.plugin"))
@@ -746,9 +1284,11 @@ class AddonManager(QtWidgets.QDialog):
             existing_compendium_file.unlink()
 
         # Move plugin from temp directory to actual plugins directory
-        for path in tmp_dir.glob("*"):
-            copytree(path, self.data_folder_plugins /
-                     path.name, dirs_exist_ok=True)
+        for path in list(tmp_dir.glob("*")):
+            yield self.submitAddonJobStep(
+                self.addon_commit_executor, "Installing",
+                self.current_addon_job.transaction.move_into,
+                path, self.data_folder_plugins / path.name)
 
         # Make plugin and compendium file paths point to their new location
         plugin_files = [
@@ -762,18 +1302,23 @@ class AddonManager(QtWidgets.QDialog):
                 str(tmp_dir),
                 "").strip("/") for file in compendium_files]
 
-        self.removeManagedPluginsFromList(plugin_files, compendium_files)
+        files_data = self.getAddonFilesData(plugin_files + compendium_files)
+        self.removeManagedPluginsFromList(
+            plugin_files, compendium_files, files_data)
 
-        self.addInstalledPluginsToDB(plugin_files, compendium_files)
+        self.addInstalledPluginsToDB(
+            plugin_files, compendium_files, files_data)
 
-        self.handleStartupScriptActivationPrompt(table, interface_id)
         logger.info(
             "Installed addon corresponding to "
             f"{plugin_files} )"
             f"{compendium_files}")
 
-        self.installAddonRemoteDependencies(
-            table.objectName() + "Installed")
+        yield from self.installAddonRemoteDependencies(
+            table.objectName() + "Installed", plugin_files + compendium_files)
+
+        self.handleStartupScriptActivationPrompt(table, interface_id)
+        return True
 
     def get_existing_compendium_file(self, tmp_search_dir: Path):
         """Return existing compendium file, None, or False
@@ -794,20 +1339,16 @@ class AddonManager(QtWidgets.QDialog):
         elif len(existing_compendium_files) == 1:
             return existing_compendium_files[0]
 
-    def install_music(self, tmp_dir: Path, interface_id: str, addon_name: str):
+    def install_music(self, root_dir: Path, interface_id: str):
+        """Install music from its root folder in a temporary directory.
+           Returns whether it was installed.
+        """
         if game_settings.current_game.game_type == "DDO":
             self.addLog("DDO does not support .abc/music files")
             return
 
-        # Some plugins have .abc files, but music collections
-        # shouldn't have .plugin files.
-        if list(tmp_dir.glob("**/*.plugin")):
-            return False
-
         table = self.ui.tableMusic
 
-        root_dir = self.fix_improper_root_dir_addon(tmp_dir, addon_name)
-
         existing_compendium_file = self.get_existing_compendium_file(root_dir)
         if existing_compendium_file is False:
             return
@@ -818,22 +1359,29 @@ class AddonManager(QtWidgets.QDialog):
                 existing_compendium_file)
 
         # Move the addon into the real data folder
-        copytree(root_dir, self.data_folder_music /
-                 root_dir.name, dirs_exist_ok=True)
+        yield self.submitAddonJobStep(
+            self.addon_commit_executor, "Installing",
+            self.current_addon_job.transaction.move_into,
+            root_dir, self.data_folder_music / root_dir.name)
         root_dir = self.data_folder_music / root_dir.name
 
         self.getInstalledMusic(folders_list=[root_dir])
 
-        self.handleStartupScriptActivationPrompt(table, interface_id)
-
         logger.info(f"{root_dir} music installed")
 
-        self.installAddonRemoteDependencies(table.objectName() + "Installed")
+        # Its row is for the compendium file if it has one
+        yield from self.installAddonRemoteDependencies(
+            table.objectName() + "Installed",
+            [root_dir, *root_dir.glob("*.*compendium")])
 
-    def install_skin(self, tmp_dir: Path, interface_id, addon_name: str):
-        table = self.ui.tableSkins
+        self.handleStartupScriptActivationPrompt(table, interface_id)
+        return True
 
-        root_dir = self.fix_improper_root_dir_addon(tmp_dir, addon_name)
+    def install_skin(self, root_dir: Path, interface_id: str):
+        """Install skin from its root folder in a temporary directory.
+           Returns whether it was installed.
+        """
+        table = self.ui.tableSkins
 
         existing_compendium_file = self.get_existing_compendium_file(root_dir)
         if existing_compendium_file is False:
@@ -848,132 +1396,62 @@ class AddonManager(QtWidgets.QDialog):
                 existing_compendium_file)
 
         # Move the addon into the real data folder
-        copytree(root_dir, self.data_folder_skins /
-                 root_dir.name, dirs_exist_ok=True)
+        yield self.submitAddonJobStep(
+            self.addon_commit_executor, "Installing",
+            self.current_addon_job.transaction.move_into,
+            root_dir, self.data_folder_skins / root_dir.name)
         root_dir = self.data_folder_skins / root_dir.name
 
         self.getInstalledSkins(folders_list=[root_dir])
 
-        self.handleStartupScriptActivationPrompt(table, interface_id)
-
         logger.info(f"{root_dir} skin installed")
 
-        self.installAddonRemoteDependencies(table.objectName() + "Installed")
+        # Its row is for the compendium file if it has one
+        yield from self.installAddonRemoteDependencies(
+            table.objectName() + "Installed",
+            [root_dir, *root_dir.glob("*.*compendium")])
 
-    def installAddonRemoteDependencies(self, table):
-        """Installs the dependencies for the last installed addon"""
-        # Gets dependencies for last column in db
-        for item in self.c.execute(
-            "SELECT Dependencies FROM {table} ORDER BY rowid DESC LIMIT 1".format(  # nosec
-                table=table
-            )
-        ):
-            dependencies = item[0]
-
-        for dependency in dependencies.split(","):
-            if dependency:
-                # 0 is the arbitrary ID for Turbine Utilities. 1064 is the ID
-                # of OneLauncher's upload of the utilities on LotroInterface
-                if dependency == "0":
-                    dependency = "1064"
-
-                for item in self.c.execute(  # nosec
-                    "SELECT File, Name FROM {table} WHERE InterfaceID = ? AND InterfaceID NOT IN "
-                    "(SELECT InterfaceID FROM {table_installed})".format(
-                        table=table.split("Installed")[
-                            0], table_installed=table,
-                    ),
-                    (dependency,),
-                ):
-                    self.installRemoteAddon(item[0], item[1], dependency)
+        self.handleStartupScriptActivationPrompt(table, interface_id)
+        return True
 
-    def fix_improper_root_dir_addon(
-            self,
-            addon_tmp_dir: Path,
-            addon_name: str) -> Path:
-        """Moves addon to new folder if the top of the directory tree
-           is anything but one folder and no files. This should only be
-           used for skins and music.
+    def installAddonRemoteDependencies(self, table, files: Iterable[Path]):
+        """Installs the missing dependencies of an addon that was just
+           installed. They are usually already installed by
+           `startRemoteAddonInstallJobs`, but dependencies of imported addons
+           are only known at this point.
 
         Args:
-            addon_tmp_dir (Path): Temporary directory where the addon has been extracted.
-            addon_name (str): Name to give the new folder if it is made.
-
-        Returns:
-            (Path): Root dir of the addon. Where the compendium file should go.
+            table: Installed table the addon is in.
+            files (Iterable[Path]): Files of the addon's rows in table. Paths
+                                    that aren't in table are ignored.
         """
-        temp_dir_contents = list(addon_tmp_dir.glob("*"))
-
-        # If there is already a root dir and nothing else
-        if len(temp_dir_contents) == 1 and temp_dir_contents[0].is_dir():
-            return temp_dir_contents[0]
-
-        with TemporaryDirectory() as tmp_dir_name:
-            tmp_dir = Path(tmp_dir_name)
-
-            # Move addon_tmp_dir contents to new temporary folder.
-            # This is to prevent issues with addon_name being the
-            # same as one of the existing folders in addon_tmp_dir.
-            for path in temp_dir_contents:
-                move(path, tmp_dir)
-
-            # Make new folder to be the addon root dir
-            new_addon_root_dir = addon_tmp_dir / addon_name
-            new_addon_root_dir.mkdir()
-
-            # Move all of the original contents of addon_tmp_dir
-            # into the new root dir.
-            for path in tmp_dir.glob("*"):
-                move(path, new_addon_root_dir)
-
-        return new_addon_root_dir
-
-    def clean_temp_addon_folder(self, addon_dir: Path) -> None:
-        """Scans temp folder for invalid folder names like "ui" or
-           "plugins" and moves stuff out of them. Addon authors put
-           files in invalid folders when they want the user to extract
-           the file somewere higher up the folder tree than where their
-           work ends up. This is usually done for user convenience.
+        remote_table_name = table.split("Installed")[0]
+        files = [str(file) for file in files]
+        placeholders = ",".join("?" * len(files))
+        dependencies_table = database.get_dependencies_table_name(table)
+        interface_ids = [interface_id for interface_id, in self.c.execute(
+            f"SELECT {dependencies_table}.InterfaceID "  # nosec
+            f"FROM {dependencies_table} "
+            f"JOIN {table} ON {table}.rowid = AddonID "
+            f"WHERE AddonTable = ? AND {table}.File IN ({placeholders})",
+            (table, *files))]
+        try:
+            _, plan = self.getAddonInstallPlan(remote_table_name, interface_ids)
+        except dependencies.DependencyCycleError as error:
+            self.addLog(f"Can't install dependencies: {error}")
+            return
 
-        Args:
-            addon_dir (Path): Temporary folder where addon has been extracted.
-        """
-        invalid_folder_names = [
-            "ui",
-            "skins",
-            "Plugins",
-            "Music",
-            "My Documents",
-            "Documents",
-            "The Lord of the Rings Online",
-            "Dungeons and Dragons Online",
-            "Dungeons & Dragons Online",
-        ]
-        with TemporaryDirectory() as tmp_dir_name:
-            tmp_dir = Path(tmp_dir_name)
-
-            while True:
-                invalid_dir = None
-                for potential_invalid_path in addon_dir.glob("*"):
-                    if (potential_invalid_path.is_dir() and
-                            potential_invalid_path.name in invalid_folder_names):
-                        invalid_dir = potential_invalid_path
-                        # Move everything from the invalid directory to a temporary one.
-                        # This is done to prevent issues when a folder in the invalid folder
-                        # has the same name as the invalid folder.
-                        for path in invalid_dir.glob("*"):
-                            move(str(path), str(tmp_dir))
-
-                        invalid_dir.rmdir()
-
-                        # Move files that were originally in the invalid folder
-                        # to the root addon_dir
-                        for path in tmp_dir.glob("*"):
-                            move(str(path), str(addon_dir))
-
-                # Stop loop if there were no more invalid folders discovered.
-                if invalid_dir is None:
-                    break
+        for level in plan:
+            for interface_id in level:
+                # Rows are fetched up front, because the cursor is
+                # reused while the dependency is installed.
+                for item in self.c.execute(
+                    f"SELECT File, Name, Version FROM {remote_table_name} "  # nosec
+                    "WHERE InterfaceID = ?",
+                    (interface_id,),
+                ).fetchall():
+                    yield from self.installRemoteAddon(
+                        item[0], item[1], interface_id, item[2])
 
     def generateCompendiumFile(
             self,
@@ -982,131 +1460,33 @@ class AddonManager(QtWidgets.QDialog):
             addon_type: str,
             table: str,
             existing_compendium_file: Path = None):
-        """Generate compendium file for addon. If there is an existing one
-           data that can only be gotten from it will be gathered and put
-           in the new file. The old one will be removed.
+        """Generate compendium file for addon. See
+           `compendium.generate_compendium_file`.
 
         Args:
-            tmp_addon_root_dir (Path): Where the compendium file goes. In the
-                                       case of plugins it should be the author's
-                                       name. This has to be the addon root dir
-                                       while it is still in a temporary directory
-                                       for propper .plugin file detection.
-            interface_id (str): [description]
+            tmp_addon_root_dir (Path): Where the compendium file goes while
+                                       the addon is still in a temporary
+                                       directory.
+            interface_id (str): Interface ID of the addon.
             addon_type (str): The type of the addon. ("Plugin", "Music", "Skin")
             table (str): The database table name for the addon type. Used to get remote
                          addon information.
             existing_compendium_file (Path, optional): An existing compendium file to
                                                        extract data from. Defaults to None.
         """
-        dependencies = ""
-        startup_python_script = ""
-        # Get dependencies and startup_python_script from existing compendium
-        # file if present.
-        if existing_compendium_file:
-            existing_compendium_values = self.parseCompendiumFile(
-                existing_compendium_file, f"{addon_type.title()}Config"
-            )
-            dependencies = existing_compendium_values[7]
-            startup_python_script = existing_compendium_values[8]
-            existing_compendium_file.unlink()
-
         for row in self.c.execute(
                 f"SELECT * FROM {table} WHERE InterfaceID = ?", (interface_id,)):  # nosec
             if row[0]:
-                doc = Document()
-                mainNode = doc.createElementNS(
-                    EMPTY_NAMESPACE, addon_type.title() + "Config")
-                doc.appendChild(mainNode)
-
-                tempNode = doc.createElementNS(EMPTY_NAMESPACE, "Id")
-                tempNode.appendChild(doc.createTextNode("%s" % (row[6])))
-                mainNode.appendChild(tempNode)
-
-                tempNode = doc.createElementNS(EMPTY_NAMESPACE, "Name")
-                tempNode.appendChild(doc.createTextNode("%s" % (row[0])))
-                mainNode.appendChild(tempNode)
-
-                tempNode = doc.createElementNS(EMPTY_NAMESPACE, "Version")
-                tempNode.appendChild(doc.createTextNode("%s" % (row[2])))
-                mainNode.appendChild(tempNode)
-
-                tempNode = doc.createElementNS(EMPTY_NAMESPACE, "Author")
-                tempNode.appendChild(doc.createTextNode("%s" % (row[3])))
-                mainNode.appendChild(tempNode)
-
-                tempNode = doc.createElementNS(EMPTY_NAMESPACE, "InfoUrl")
-                tempNode.appendChild(
-                    doc.createTextNode(
-                        "%s" % (self.getInterfaceInfoUrl(row[5])))
-                )
-                mainNode.appendChild(tempNode)
-
-                tempNode = doc.createElementNS(EMPTY_NAMESPACE, "DownloadUrl")
-                tempNode.appendChild(doc.createTextNode("%s" % (row[5])))
-                mainNode.appendChild(tempNode)
+                return compendium.generate_compendium_file(
+                    tmp_addon_root_dir, addon_type, row,
+                    existing_compendium_file)
 
-                if addon_type.title() == "Plugin":
-                    # Add plugin's .plugin file descriptors
-                    descriptorsNode = doc.createElementNS(
-                        EMPTY_NAMESPACE, "Descriptors"
-                    )
-                    mainNode.appendChild(descriptorsNode)
-                    for plugin_file in tmp_addon_root_dir.glob("*.plugin"):
-                        tempNode = doc.createElementNS(
-                            EMPTY_NAMESPACE, "descriptor"
-                        )
-                        tempNode.appendChild(
-                            doc.createTextNode(
-                                "%s" %
-                                (f"{tmp_addon_root_dir.name}\\{plugin_file.name}")))
-                        descriptorsNode.appendChild(tempNode)
-
-                # Can't add dependencies, because they are defined in
-                # compendium files
-                dependenciesNode = doc.createElementNS(
-                    EMPTY_NAMESPACE, "Dependencies")
-                mainNode.appendChild(dependenciesNode)
-
-                # If compendium file from add-on already existed with
-                # dependencies
-                if dependencies:
-                    for dependency in dependencies.split(","):
-                        tempNode = doc.createElementNS(
-                            EMPTY_NAMESPACE, "dependency")
-                        tempNode.appendChild(
-                            doc.createTextNode("%s" % (dependency)))
-                        dependenciesNode.appendChild(tempNode)
-
-                # Can't add startup script, because it is defined in compendium
-                # files
-                startupScriptNode = doc.createElementNS(
-                    EMPTY_NAMESPACE, "StartupScript"
-                )
-                # If compendium file from add-on already existed with startup
-                # script
-                if startup_python_script:
-                    startupScriptNode.appendChild(
-                        doc.createTextNode("%s" % (startup_python_script))
-                    )
-                mainNode.appendChild(startupScriptNode)
-
-                # Write compendium file
-                compendium_file = tmp_addon_root_dir / \
-                    f"{row[0]}.{addon_type.lower()}compendium"
-                with compendium_file.open("w+") as file:
-                    pretty_xml = prettify_xml(doc.toxml())
-                    file.write(pretty_xml)
-
-                return compendium_file
+        if existing_compendium_file:
+            existing_compendium_file.unlink()
 
     def getInterfaceInfoUrl(self, download_url: str):
-        """Replaces "download" with "info" in download url to make info url
-
-        An example is: https://www.lotrointerface.com/downloads/download1078-VitalTarget
-                   to: https://www.lotrointerface.com/downloads/info1078-VitalTarget
-        """
-        return download_url.replace("/downloads/download", "/downloads/info")
+        """See `compendium.get_interface_info_url`"""
+        return compendium.get_interface_info_url(download_url)
 
     def txtSearchBarTextChanged(self, text):
         if game_settings.current_game.game_type == "LOTRO":
@@ -1147,38 +1527,19 @@ class AddonManager(QtWidgets.QDialog):
                 self.searchDB(self.ui.tableSkins, text)
 
     def searchDB(self, table, text):
-        table.clearContents()
-        table.setRowCount(0)
-
-        if text:
-            for word in text.split():
-                search_word = "%" + word + "%"
-
-                for row in self.c.execute(
-                    # nosec
-                    "SELECT rowid, * FROM {table} WHERE Author LIKE ? OR Category"
-                    " LIKE ? OR Name LIKE ?".format(table=table.objectName()),
-                    (search_word, search_word, search_word),
-                ):
-                    # Detects duplicates from multi-word search
-                    duplicate = False
-                    for item in table.findItems(
-                            row[1], QtCore.Qt.MatchExactly):
-                        if int((table.item(item.row(), 0)).text()) == row[0]:
-                            duplicate = True
-                            break
-                    if not duplicate:
-                        self.addRowToTable(table, row)
-        else:
-            # Shows all plugins if the search bar is empty
-            for row in self.c.execute(
-                # nosec
-                "SELECT rowid, * FROM {table}".format(table=table.objectName())
-            ):
-                self.addRowToTable(table, row)
+        table.model().setSearch(table.objectName(), text)
+
+        header = table.horizontalHeader()
+        if search.get_match_query(text):
+            # Keeps results in the order they were ranked in. Clicking a
+            # column header still sorts by that column.
+            header.setSortIndicator(-1, QtCore.Qt.AscendingOrder)
+        elif header.sortIndicatorSection() == -1:
+            # Goes back to sorting by addon name once the search is cleared
+            header.setSortIndicator(1, QtCore.Qt.AscendingOrder)
 
     def isTableEmpty(self, table):
-        return not table.item(0, 1)
+        return not table.model().rowCount()
 
     def reloadSearch(self, table):
         """Re-searches the current search"""
@@ -1201,15 +1562,13 @@ class AddonManager(QtWidgets.QDialog):
             (addon[2], addon[0],),
         )
 
-        # Removes indicator that a new version of an installed addon is out if present.
+        # Removes indicator that a new version of the addon is out if present.
         # This is important, because addons are uninstalled and then reinstalled
         # during the update process.
         self.c.execute(
-            # nosec
-            "UPDATE {table} SET Version = REPLACE(Version,'(Updated) ', '') WHERE "
-            "Version LIKE '(Updated) %'".format(
-                table=remote_table.objectName())
-        )
+            f"UPDATE {remote_table.objectName()} SET "  # nosec
+            f"{database.UPDATE_AVAILABLE_COLUMN} = 0 WHERE InterfaceID = ?",
+            (addon[0],))
 
     def setRemoteAddonToInstalled(self, addon, remote_table):
         self.c.execute(
@@ -1219,69 +1578,29 @@ class AddonManager(QtWidgets.QDialog):
             ("(Installed) " + addon[2], addon[0],),
         )
 
-    # Adds row to a visible table. First value in list is row name
-    def addRowToTable(self, table, list):
-        table.setSortingEnabled(False)
-
-        disable_row = False
-
-        rows = table.rowCount()
-        table.setRowCount(rows + 1)
-
-        # Sets row name
-        tbl_item = QtWidgets.QTableWidgetItem()
-        tbl_item.setText(str(list[0]))
-
-        # Adds items to row
-        for column, item in enumerate(list):
-            tbl_item = QtWidgets.QTableWidgetItem()
-
-            tbl_item.setText(str(item))
-            # Sets color to red if addon is unmanaged
-            if item == "Unmanaged" and column == 2:
-                tbl_item.setForeground(QtGui.QColor("darkred"))
-            # Disable row if addon is Installed. This is only applicable to
-            # remote tables.
-            elif str(item).startswith("(Installed) ") and column == 1:
-                tbl_item.setText(item.split("(Installed) ")[1])
-                disable_row = True
-            elif str(item).startswith("(Updated) ") and column == 3:
-                tbl_item.setText(item.split("(Updated) ")[1])
-                tbl_item.setForeground(QtGui.QColor("green"))
-            elif str(item).startswith("(Outdated) ") and column == 3:
-                tbl_item.setText(item.split("(Outdated) ")[1])
-                tbl_item.setForeground(QtGui.QColor("crimson"))
-
-            table.setItem(rows, column, tbl_item)
-
-        if disable_row:
-            for i in range(table.columnCount()):
-                table.item(rows, i).setFlags(QtCore.Qt.ItemIsEnabled)
-                table.item(rows, i).setBackground(self.installed_addons_color)
-
-        table.setSortingEnabled(True)
-
-    def addRowToDB(self, table, list):
-        question_marks = "?"
-        for _ in range(len(list) - 1):
-            question_marks += ",?"
-
-        self.c.execute(
-            "INSERT INTO {table} VALUES({})".format(
-                question_marks, table=table.objectName()
-            ),
-            (list),  # nosec
-        )
+    def addRowsToDB(self, table, rows: Iterable[List[str]]) -> None:
+        """Adds rows to the db table for table. Callers are expected to
+           commit, so a whole batch of rows is one transaction.
+        """
+        database.insert_rows(self.c, table.objectName(), rows)
 
     def btnBoxActivated(self):
         self.accept()
 
     def btnLogClicked(self):
         if self.ui.txtLog.isHidden():
+            self.ui.tableAddonJobs.hide()
             self.ui.txtLog.show()
         else:
             self.ui.txtLog.hide()
 
+    def btnAddonJobsClicked(self):
+        if self.ui.tableAddonJobs.isHidden():
+            self.ui.txtLog.hide()
+            self.ui.tableAddonJobs.show()
+        else:
+            self.ui.tableAddonJobs.hide()
+
     def addLog(self, message):
         self.ui.lblErrors.setText(
             "Errors: " +
@@ -1299,8 +1618,8 @@ class AddonManager(QtWidgets.QDialog):
 
             uninstallConfirm, addons = self.getUninstallConfirm(table)
             if uninstallConfirm:
-                uninstall_function(addons, table)
-                self.resetRemoteAddonsTables()
+                self.startAddonJob(
+                    "Uninstalling addons", uninstall_function(addons, table))
 
         elif self.ui.tabWidget.currentIndex() == 1:
             self.installRemoteAddons()
@@ -1325,12 +1644,7 @@ class AddonManager(QtWidgets.QDialog):
 
         addons, details = self.getSelectedAddons(table)
         if addons and details:
-            for addon in addons:
-                self.installRemoteAddon(addon[1], addon[2], addon[0])
-                self.setRemoteAddonToInstalled(addon, table)
-
-            self.resetRemoteAddonsTables()
-            self.searchSearchBarContents()
+            self.startRemoteAddonInstallJobs(addons, table)
 
     def getCurrentTable(self):
         """Return the table that the user currently sees based on what tabs they are in"""
@@ -1366,15 +1680,169 @@ class AddonManager(QtWidgets.QDialog):
 
         return table
 
-    def installRemoteAddon(self, url, name: str, interface_id):
-        with TemporaryDirectory() as tmp_dir_name:
-            tmp_dir = Path(tmp_dir_name)
+    def installRemoteAddon(self, url, name: str, interface_id, version: str):
+        self.installing_interface_ids.add(interface_id)
+        try:
+            path = yield from self.getRemoteAddonArchive(
+                url, name, interface_id, version)
+            if path:
+                try:
+                    yield from self.installAddon(
+                        path, interface_id=interface_id, addon_name=name)
+                finally:
+                    self.addon_archive_cache.release(path)
+        finally:
+            self.installing_interface_ids.discard(interface_id)
+
+    def getAddonInstallPlan(
+            self,
+            remote_table_name: str,
+            interface_ids: Iterable[str],
+            reinstall: bool = False) -> Tuple[Dict[str, Set[str]], List[List[str]]]:
+        """Returns dependency graph and install plan for addons from a remote
+           table along with the dependencies they are missing. See
+           `dependencies.get_install_plan`. Addons that other jobs are
+           installing count as installed.
+
+        Args:
+            remote_table_name (str): Remote table the addons are from.
+            interface_ids (Iterable[str]): Addons to install.
+            reinstall (bool, optional): Include interface_ids in the plan
+                                        even if they're already installed.
+                                        Defaults to False.
+
+        Raises:
+            DependencyCycleError: Addons in the plan depend on each other.
+        """
+        interface_ids = [
+            dependencies.get_remote_interface_id(interface_id)
+            for interface_id in interface_ids]
+        installed_interface_ids = set(self.getInstalledInterfaceIDs(
+            getattr(self.ui, remote_table_name)))
+        installed_interface_ids.update(self.installing_interface_ids)
+        if reinstall:
+            installed_interface_ids.difference_update(interface_ids)
+
+        graph = dependencies.get_dependency_graph(
+            self.c, remote_table_name, interface_ids)
+        return graph, dependencies.get_install_plan(
+            graph, interface_ids, installed_interface_ids)
+
+    def startRemoteAddonInstallJobs(self, addons, table) -> None:
+        """Starts jobs that install addons from a remote table and their
+           missing dependencies. Every addon is installed by its own job,
+           which waits for the jobs installing its dependencies.
+
+        Args:
+            addons: [Interface ID, URL, Name] of each addon to install.
+            table: Remote table the addons are from.
+        """
+        addons = {dependencies.get_remote_interface_id(addon[0]): addon
+                  for addon in addons}
+        try:
+            graph, plan = self.getAddonInstallPlan(
+                table.objectName(), addons, reinstall=True)
+        except dependencies.DependencyCycleError as error:
+            self.addLog(f"Can't install addons: {error}")
+            return
+
+        jobs: Dict[str, AddonJob] = {}
+        for level in plan:
+            for interface_id in level:
+                addon = addons.get(interface_id)
+                if addon is None:
+                    addon = self.c.execute(
+                        f"SELECT InterfaceID, File, Name FROM {table.objectName()} "  # nosec
+                        "WHERE InterfaceID = ?", (interface_id,)).fetchone()
+                if addon is None:
+                    self.addLog(
+                        f"Dependency with interface ID {interface_id} "
+                        "isn't on lotrointerface.com")
+                    continue
+
+                dependency_jobs = [
+                    jobs[dependency] for dependency in graph[interface_id]
+                    if dependency in jobs]
+                job = self.startAddonJob(
+                    f"Installing {addon[2]}",
+                    self.installRemoteAddonFromTable(
+                        addon, table, dependency_jobs))
+                if job is None:
+                    return
+                jobs[interface_id] = job
+
+    def installRemoteAddonFromTable(
+            self,
+            addon,
+            table,
+            dependency_jobs: Iterable[AddonJob] = ()):
+        """Installs addon from a remote table and marks it as installed. It
+           waits for dependency_jobs to finish first.
+        """
+        if dependency_jobs:
+            yield self.waitForAddonJobs(dependency_jobs)
 
-            path = tmp_dir / f"{name}.zip"
-            status = self.downloader(url, path)
-            if status:
-                self.installAddon(path, interface_id=interface_id)
-                path.unlink()
+        yield from self.installRemoteAddon(
+            addon[1], addon[2], addon[0],
+            self.getRemoteAddonVersion(addon[0], table))
+        self.setRemoteAddonToInstalled(addon, table)
+
+    def getRemoteAddonArchive(
+            self,
+            url: str,
+            name: str,
+            interface_id: str,
+            version: str):
+        """Returns path of the archive for a remote addon version in the
+           addon archive cache. It is downloaded first if it isn't cached.
+           None is returned if the download fails. The archive has to be
+           released from the cache once it's installed.
+        """
+        archive = self.addon_archive_cache.get(interface_id, version)
+        if archive:
+            logger.info(f"Using cached archive for {name} {version}")
+            return archive
+
+        # Other jobs and processes can be downloading the same archive
+        download_lock = yield self.submitAddonJobStep(
+            self.addon_download_executor,
+            "Downloading",
+            download.acquire_download_lock,
+            url,
+            self.addon_downloads_dir,
+            self.current_addon_job.check_cancelled)
+        try:
+            archive = self.addon_archive_cache.get(interface_id, version)
+            if archive:
+                return archive
+
+            # Downloads dir is on the same filesystem as the archive cache,
+            # so the download can be moved into it.
+            with TemporaryDirectory(
+                    dir=self.addon_downloads_dir) as tmp_dir_name:
+                path = Path(tmp_dir_name) / f"{name}.zip"
+                if not (yield from self.downloader(url, path)):
+                    return None
+
+                return (yield self.submitAddonJobStep(
+                    self.addon_extract_executor,
+                    "Caching",
+                    self.addon_archive_cache.add,
+                    interface_id,
+                    version,
+                    path,
+                    move_archive=True))
+        finally:
+            download_lock.release()
+
+    def getRemoteAddonVersion(self, interface_id: str, remote_table) -> str:
+        """Returns latest version of addon from a remote table"""
+        for version, in self.c.execute(
+                f"SELECT Version FROM {remote_table.objectName()} "  # nosec
+                "WHERE InterfaceID = ?", (interface_id,)):
+            return version
+
+        return ""
 
     def getUninstallConfirm(self, table):
         addons, details = self.getSelectedAddons(table)
@@ -1396,16 +1864,18 @@ class AddonManager(QtWidgets.QDialog):
             return False, addons
 
     def getSelectedAddons(self, table):
-        if not table.selectedItems():
+        selected_rows = sorted(
+            {index.row() for index in table.selectionModel().selectedIndexes()})
+        if not selected_rows:
             return None, None
         selected_addons = []
         details = ""
-        # Column count is minus one because of hidden ID column
-        for item in table.selectedItems()[0:: (table.columnCount() - 1)]:
+        model = table.model()
+        for row in selected_rows:
             # Gets db row id for selected row
-            selected_row = int((table.item(item.row(), 0)).text())
+            selected_row = model.getRowID(row)
 
-            selected_name = table.item(item.row(), 1).text()
+            selected_name = model.index(row, 1).data()
 
             for selected_addon in self.c.execute(
                 "SELECT InterfaceID, File, Name FROM {table} WHERE rowid = ?".format(  # nosec
@@ -1418,13 +1888,38 @@ class AddonManager(QtWidgets.QDialog):
 
         return selected_addons, details
 
-    def uninstallPlugins(self, plugins, table: QtWidgets.QTableWidget):
+    def getAddonsInDataFolder(self, addons, table: QtWidgets.QTableView):
+        """Returns the addons with files in the addon folder of table. Others
+           are logged and left out, so a row that isn't from the current
+           game can never get something uninstalled outside of its folders.
+        """
+        addon_folder = self.getAddonTypeDataFolderFromTable(table)
+        addons_in_folder = []
+        for addon in addons:
+            if Path(addon[1]).is_relative_to(addon_folder):
+                addons_in_folder.append(addon)
+            else:
+                self.addLog(
+                    f"Not uninstalling {addon[2]}, because it isn't in "
+                    f"{addon_folder}")
+        return addons_in_folder
+
+    def uninstallPlugins(self, plugins, table: QtWidgets.QTableView):
+        plugins = self.getAddonsInDataFolder(plugins, table)
+        # Dependents of every plugin are found at once. Plugins that are
+        # uninstalled together don't count as each other's dependents.
+        dependents = dependencies.get_dependents(
+            self.c, table.objectName(), [plugin[0] for plugin in plugins])
         for plugin in plugins:
             if plugin[1].endswith(".plugin"):
                 plugin_files = [Path(plugin[1])]
             else:
                 plugin_files = []
-                if self.checkAddonForDependencies(plugin, table):
+                if self.checkAddonForDependencies(
+                        plugin,
+                        dependents.get(
+                            dependencies.get_remote_interface_id(plugin[0]),
+                            [])):
                     doc = defusedxml.minidom.parse(plugin[1])
                     nodes = doc.getElementsByTagName(
                         "Descriptors")[0].childNodes
@@ -1440,9 +1935,8 @@ class AddonManager(QtWidgets.QDialog):
                     for node in nodes:
                         if node.nodeName == "StartupScript":
                             script = GetText(node.childNodes)
-                            self.uninstallStartupScript(
-                                script, self.data_folder_plugins
-                            )
+                            yield from self.uninstallStartupScript(
+                                script, self.data_folder_plugins)
                 else:
                     continue
 
@@ -1457,26 +1951,38 @@ class AddonManager(QtWidgets.QDialog):
 
                             # Removes plugin and all related files
                             if plugin_folder.exists():
-                                rmtree(plugin_folder)
-
-                    plugin_file.unlink(missing_ok=True)
-            Path(plugin[1]).unlink(missing_ok=True)
+                                yield self.submitAddonJobStep(
+                                    self.addon_commit_executor,
+                                    "Uninstalling",
+                                    self.current_addon_job.transaction.remove,
+                                    plugin_folder)
+
+                    yield self.submitAddonJobStep(
+                        self.addon_commit_executor, "Uninstalling",
+                        self.current_addon_job.transaction.remove, plugin_file)
+            yield self.submitAddonJobStep(
+                self.addon_commit_executor, "Uninstalling",
+                self.current_addon_job.transaction.remove, Path(plugin[1]))
 
             # Remove author folder if there are no other plugins in it
-            author_dir = plugin_folder.parent
-            if not list(author_dir.glob("*")):
-                author_dir.rmdir()
+            author_dir = self.data_folder_plugins / Path(plugin[1]).relative_to(
+                self.data_folder_plugins).parts[0]
+            if author_dir.is_dir() and not any(author_dir.iterdir()):
+                yield self.submitAddonJobStep(
+                    self.addon_commit_executor, "Uninstalling",
+                    self.current_addon_job.transaction.remove, author_dir)
 
             logger.info(f"{plugin} plugin uninstalled")
 
             self.setRemoteAddonToUninstalled(
                 plugin, self.ui.tablePlugins)
+            manifests.delete_manifest(self.c, self.data_folder_plugins, plugin[0])
+            self.deleteInstalledAddonRow(table, plugin[1])
 
-        # Reloads plugins
-        table.clearContents()
-        self.getInstalledPlugins()
+        self.reloadSearch(table)
 
-    def uninstallSkins(self, skins, table: QtWidgets.QTableWidget):
+    def uninstallSkins(self, skins, table: QtWidgets.QTableView):
+        skins = self.getAddonsInDataFolder(skins, table)
         for skin in skins:
             if skin[1].endswith(".skincompendium"):
                 skin_path = Path(skin[1]).parent
@@ -1484,21 +1990,25 @@ class AddonManager(QtWidgets.QDialog):
                 items_row = self.parseCompendiumFile(
                     Path(skin[1]), "SkinConfig")
                 script = items_row[8]
-                self.uninstallStartupScript(script, self.data_folder_skins)
+                yield from self.uninstallStartupScript(
+                    script, self.data_folder_skins)
             else:
                 skin_path = Path(skin[1])
-            rmtree(skin_path)
+            yield self.submitAddonJobStep(
+                self.addon_commit_executor, "Uninstalling",
+                self.current_addon_job.transaction.remove, skin_path)
 
             logger.info(f"{skin} skin uninstalled")
 
             self.setRemoteAddonToUninstalled(
                 skin, self.ui.tableSkins)
+            manifests.delete_manifest(self.c, self.data_folder_skins, skin[0])
+            self.deleteInstalledAddonRow(table, skin[1])
 
-        # Reloads skins
-        table.clearContents()
-        self.getInstalledSkins()
+        self.reloadSearch(table)
 
     def uninstallMusic(self, music_list, table):
+        music_list = self.getAddonsInDataFolder(music_list, table)
         for music in music_list:
             if music[1].endswith(".musiccompendium"):
                 music_path = Path(music[1]).parent
@@ -1506,37 +2016,52 @@ class AddonManager(QtWidgets.QDialog):
                 items_row = self.parseCompendiumFile(
                     Path(music[1]), "MusicConfig")
                 script = items_row[8]
-                self.uninstallStartupScript(script, self.data_folder_music)
+                yield from self.uninstallStartupScript(
+                    script, self.data_folder_music)
             else:
                 music_path = Path(music[1])
 
-            if music_path.suffix == ".abc":
-                music_path.unlink()
-            else:
-                rmtree(music_path)
+            yield self.submitAddonJobStep(
+                self.addon_commit_executor, "Uninstalling",
+                self.current_addon_job.transaction.remove, music_path)
 
             logger.info(f"{music} music uninstalled")
 
             self.setRemoteAddonToUninstalled(
                 music, self.ui.tableMusic)
+            manifests.delete_manifest(self.c, self.data_folder_music, music[0])
+            self.deleteInstalledAddonRow(table, music[1])
 
-        # Reloads music
-        table.clearContents()
-        self.getInstalledMusic()
+        self.reloadSearch(table)
 
-    def checkAddonForDependencies(self, addon, table: QtWidgets.QTableWidget):
-        # Turbine Utilities is treated as having ID 0
-        addon_ID = "0" if addon[0] == "1064" else addon[0]
-        details = ""
+    def actionRemoveOrphanedDependenciesSelected(self):
+        """Uninstalls plugins that are only there as dependencies of addons
+           that have since been removed
+        """
+        if game_settings.current_game.game_type == "DDO":
+            return
 
-        for dependent in self.c.execute(
-            'SELECT Name, Dependencies FROM {table} WHERE Dependencies != ""'.format(  # nosec
-                table=table.objectName()
-            )
+        table = self.ui.tablePluginsInstalled
+        orphans = dependencies.get_orphaned_dependencies(
+            self.c, table.objectName(), self.ui.tablePlugins.objectName())
+        if not orphans:
+            self.addLog("No dependencies can be removed")
+            return
+
+        details = "".join(f"{orphan[2]}\n" for orphan in orphans)
+        if self.confirmationPrompt(
+            f"Are you sure you want to remove {len(orphans)} dependencies "
+            "that no installed addon needs?", details
         ):
-            for dependency in dependent[1].split(","):
-                if dependency == addon_ID:
-                    details = details + dependent[0] + "\n"
+            self.startAddonJob(
+                "Removing unneeded dependencies",
+                self.uninstallPlugins(orphans, table))
+
+    def checkAddonForDependencies(self, addon, dependents: List[str]):
+        """Asks for confirmation if addon has dependents. See
+           `dependencies.get_dependents`.
+        """
+        details = "".join(f"{dependent}\n" for dependent in dependents)
 
         if details:
             num_depends = len(details.split("\n")) - 1
@@ -1620,97 +2145,203 @@ class AddonManager(QtWidgets.QDialog):
 
         self.searchSearchBarContents()
 
-    def loadRemoteAddons(self):
-        if game_settings.current_game.game_type == "LOTRO":
-            # Only keep loading remote add-ons if the first load doesn't run
-            # into issues
-            if self.getRemoteAddons(
-                self.PLUGINS_URL, self.ui.tablePlugins
-            ):
-                self.getRemoteAddons(
-                    self.SKINS_URL, self.ui.tableSkins)
-                self.getRemoteAddons(
-                    self.MUSIC_URL, self.ui.tableMusic)
-                return True
-        else:
-            if self.getRemoteAddons(
-                self.SKINS_DDO_URL, self.ui.tableSkins
-            ):
-                return True
-
-    def getRemoteAddons(self, favorites_url, table):
-        # Clears rows from db table
-        self.c.execute(f"DELETE FROM {table.objectName()}")  # nosec
+    def loadRemoteAddons(self, force_check: bool = False):
+        """Loads remote addons from the feeds or their cache. Feeds are
+           downloaded concurrently, and each one is added to the database
+           as it comes in.
 
-        # Gets list of Interface IDs for installed addons
-        installed_IDs = []
-        for ID in self.c.execute(
-            "SELECT InterfaceID FROM {table}".format(  # nosec
-                table=table.objectName() + "Installed"
-            )
-        ):
-            if ID[0]:
-                installed_IDs.append(ID[0])
+        Args:
+            force_check (bool, optional): Check feeds with the server even
+                                          if the cache TTL hasn't run out.
+                                          Defaults to False.
 
-        try:
-            addons_file = urllib.request.urlopen(  # nosec
-                favorites_url).read().decode()
-        except (urllib.error.URLError, urllib.error.HTTPError) as error:
-            logger.error(error.reason, exc_info=True)
+        Returns:
+            bool: True if any remote addons were loaded.
+        """
+        if game_settings.current_game.game_type == "LOTRO":
+            remote_tables = {
+                self.PLUGINS_URL: self.ui.tablePlugins,
+                self.SKINS_URL: self.ui.tableSkins,
+                self.MUSIC_URL: self.ui.tableMusic,
+            }
+        else:
+            remote_tables = {self.SKINS_DDO_URL: self.ui.tableSkins}
+
+        requests = {}
+        for favorites_url, table in remote_tables.items():
+            # Cached rows can only be reused if there are any
+            has_cached_rows = bool(self.c.execute(
+                f"SELECT rowid FROM {table.objectName()} LIMIT 1").fetchone())  # nosec
+
+            if has_cached_rows and not force_check and self.feed_cache.is_fresh(
+                    favorites_url, settings.program_settings.remote_addons_cache_ttl):
+                self.loadCachedRemoteAddons(table)
+            elif has_cached_rows:
+                requests[table] = self.feed_cache.get_request(favorites_url)
+            else:
+                requests[table] = urllib.request.Request(favorites_url)
+
+        self.remote_addons_requests = requests
+        self.remote_addons_pending_tables = set(requests)
+        self.remote_addons_started_tables = set()
+        # Interface IDs of the installed addons of each table. Feeds load at
+        # the same time, so they each need their own.
+        self.remote_addons_installed_IDs: Dict[
+            QtWidgets.QTableView, Set[str]] = {}
+        self.remote_addons_failed_tables = set()
+        if requests:
+            # User input is excluded while waiting, so another load can't
+            # be started. New rows are still painted as they come in.
+            self.remote_addons_loop = QtCore.QEventLoop()
+            with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+                for table, request in requests.items():
+                    executor.submit(self.fetchRemoteAddons, table, request)
+                self.remote_addons_loop.exec(
+                    QtCore.QEventLoop.ExcludeUserInputEvents)
+            self.resumeDeferredAddonJobs()
+
+        if self.remote_addons_failed_tables:
             self.addLog(
                 "There was a network error. You may want to check your connection."
             )
             self.ui.tabWidget.setCurrentIndex(0)
-            return False
 
-        doc = defusedxml.minidom.parseString(addons_file)
-        tags = doc.getElementsByTagName("Ui")
-        for tag in tags:
-            items_row = [""] * (len(self.COLUMN_LIST) - 1)
-            nodes = tag.childNodes
-            for node in nodes:
-                if node.nodeName == "UIName":
-                    items_row[0] = GetText(node.childNodes)
-                    # Sanitize
-                    items_row[0] = items_row[0].replace(
-                        '/', '-').replace('\\', '-')
-                elif node.nodeName == "UIAuthorName":
-                    items_row[3] = GetText(node.childNodes)
-                elif node.nodeName == "UICategory":
-                    items_row[1] = GetText(node.childNodes)
-                elif node.nodeName == "UID":
-                    items_row[6] = GetText(node.childNodes)
-                elif node.nodeName == "UIVersion":
-                    items_row[2] = GetText(node.childNodes)
-                elif node.nodeName == "UIUpdated":
-                    items_row[4] = strftime(
-                        "%Y-%m-%d", localtime(int(GetText(node.childNodes)))
-                    )
-                elif node.nodeName == "UIFileURL":
-                    items_row[5] = GetText(node.childNodes)
+        return len(self.remote_addons_failed_tables) < len(remote_tables)
 
+    def fetchRemoteAddons(
+            self,
+            table: QtWidgets.QTableView,
+            request: urllib.request.Request) -> None:
+        """
+        Downloads and parses a remote addons feed. This runs in a worker
+        thread, so it only communicates through signals. Rows are sent in
+        chunks while the feed is still downloading.
+        """
+        try:
+            with urllib.request.urlopen(  # nosec
+                    request, timeout=self.FEED_TIMEOUT) as response:
+                # Empty first chunk lets the table be cleared before
+                # any rows come in.
+                rows = []
+                self.ReturnRemoteAddonsRows.emit(table, rows)
+                for items_row in feeds.iter_feed_rows(response):
+                    rows.append(items_row)
+                    if len(rows) == self.FEED_ROWS_PER_UI_UPDATE:
+                        self.ReturnRemoteAddonsRows.emit(table, rows)
+                        rows = []
+                self.ReturnRemoteAddonsRows.emit(table, rows)
+
+                self.ReturnRemoteAddonsResult.emit(
+                    table,
+                    (response.headers.get("ETag"),
+                     response.headers.get("Last-Modified")))
+        except (OSError, HTTPException, ParseError) as error:
+            self.ReturnRemoteAddonsResult.emit(table, error)
+
+    def addRemoteAddonsRows(
+            self,
+            table: QtWidgets.QTableView,
+            rows: List[List[str]]) -> None:
+        """Adds chunk of rows from a remote addons feed to the database and table"""
+        if table not in self.remote_addons_started_tables:
+            self.remote_addons_started_tables.add(table)
+
+            # Clears rows from db table
+            self.c.execute(f"DELETE FROM {table.objectName()}")  # nosec
+            self.feed_cache.remove(
+                self.remote_addons_requests[table].full_url)
+            table.model().clear()
+
+            # Gets set of Interface IDs for installed addons
+            self.remote_addons_installed_IDs[table] = set(
+                self.getInstalledInterfaceIDs(table))
+
+        for items_row in rows:
             # Prepends name with (Installed) if already installed
-            if items_row[6] in installed_IDs:
+            if items_row[6] in self.remote_addons_installed_IDs[table]:
                 items_row[0] = "(Installed) " + items_row[0]
 
-            self.addRowToDB(table, items_row)
+        # Committed once the whole feed is in
+        self.addRowsToDB(table, rows)
+
+        # Rows are shown as they come in until the first page of the table
+        # is full. The rest are shown once the whole feed is in, since
+        # each refresh sorts the table again.
+        if table.model().rowCount() < AddonsTableModel.ROWS_PER_FETCH:
+            self.searchDB(table, "")
+
+    def handleRemoteAddonsResult(self, table: QtWidgets.QTableView, result):
+        """Handles a remote addons feed worker finishing"""
+        favorites_url = self.remote_addons_requests[table].full_url
+        if isinstance(result, urllib.error.HTTPError) and result.code == 304:
+            # Feed hasn't changed since it was cached
+            self.feed_cache.mark_checked(favorites_url)
+            self.loadCachedRemoteAddons(table)
+        elif isinstance(result, Exception):
+            logger.error(result, exc_info=result)
+            self.remote_addons_failed_tables.add(table)
+        else:
+            etag, last_modified = result
+            self.feed_cache.update(favorites_url, etag, last_modified)
+            self.searchDB(table, "")
+
+        self.conn.commit()
+
+        self.remote_addons_pending_tables.discard(table)
+        if not self.remote_addons_pending_tables:
+            self.remote_addons_loop.quit()
+
+    def getInstalledInterfaceIDs(self, remote_table) -> List[str]:
+        """Returns Interface IDs of installed addons for a remote table"""
+        return [ID[0] for ID in self.c.execute(
+            "SELECT InterfaceID FROM {table} WHERE InterfaceID != ''".format(  # nosec
+                table=remote_table.objectName() + "Installed"
+            )
+        )]
+
+    def loadCachedRemoteAddons(self, table):
+        """
+        Shows remote addons that are already in the database. Status
+        markers from the last session are reset, so the rows match
+        what parsing the feed again would give.
+        """
+        self.c.execute(
+            "UPDATE {table} SET Name = substr(Name, 13) WHERE Name LIKE '(Installed) %'".format(  # nosec
+                table=table.objectName()
+            )
+        )
+        self.c.execute(
+            f"UPDATE {table.objectName()} SET "  # nosec
+            f"{database.UPDATE_AVAILABLE_COLUMN} = 0 "
+            f"WHERE {database.UPDATE_AVAILABLE_COLUMN}")
+        self.c.executemany(
+            "UPDATE {table} SET Name = ('(Installed) ' || Name) WHERE InterfaceID == ?".format(  # nosec
+                table=table.objectName()
+            ),
+            [(ID,) for ID in set(self.getInstalledInterfaceIDs(table))],
+        )
 
         # Populate user visible table. This should not reload the current
         # search.
         self.searchDB(table, "")
 
-        return True
-
     # Downloads file from url to path and shows progress with
-    # self.handleDownloadProgress
+    # self.handleDownloadProgress. Interrupted downloads are resumed.
     def downloader(self, url, path):
         if url.lower().startswith("http"):
+            job = self.current_addon_job
             try:
-                urllib.request.urlretrieve(  # nosec
-                    url, path, self.handleDownloadProgress
+                yield self.submitAddonJobStep(
+                    self.addon_download_executor,
+                    "Downloading",
+                    download.download_file,
+                    url,
+                    path,
+                    self.addon_downloads_dir,
+                    partial(self.handleDownloadProgress, job)
                 )
-            except (urllib.error.URLError, urllib.error.HTTPError) as error:
-                logger.error(error.reason, exc_info=True)
+            except (OSError, HTTPException, download.DownloadError) as error:
+                logger.error(error, exc_info=True)
                 self.addLog(
                     "There was a network error. You may want to check your connection."
                 )
@@ -1718,17 +2349,426 @@ class AddonManager(QtWidgets.QDialog):
         else:
             raise ValueError from None
 
-        self.ui.progressBar.setValue(0)
         return True
 
-    def handleDownloadProgress(self, index, frame, size):
-        # Updates progress bar with download progress
-        percent = 100 * index * frame // size
-        self.ui.progressBar.setValue(percent)
+    def handleDownloadProgress(
+            self,
+            job: AddonJob,
+            downloaded_size: int,
+            total_size: Optional[int],
+            bytes_per_second: float):
+        # Updates job with download progress. This is called on an addon
+        # download thread.
+        job.check_cancelled()
+        self.ReturnAddonJobProgress.emit(
+            job, downloaded_size, total_size, bytes_per_second)
+
+    def startAddonJob(
+            self,
+            description: str,
+            steps: Generator,
+            exclusive: bool = False) -> Optional[AddonJob]:
+        """Starts an addon job, such as installing or uninstalling an addon.
+           Jobs run concurrently. Their downloads and extraction overlap, but
+           only one job at a time writes to the game's addon folders.
+
+        Args:
+            description (str): What the job does. Shown while it runs.
+            steps (Generator): Does the parts of the job that use the UI or
+                               database. It yields a future from
+                               `submitAddonJobStep` for every blocking part,
+                               like downloading or copying files. The result
+                               or exception of the future is sent back into
+                               the generator once it is done.
+            exclusive (bool, optional): No other jobs can run while the job
+                                        does. Defaults to False.
+
+        Returns:
+            Optional[AddonJob]: The started job or None if it can't run with
+                                the current jobs.
+        """
+        if self.exclusive_addon_job is not None:
+            self.addLog(
+                f"{description} can't be started until "
+                f"{self.exclusive_addon_job.description} is finished")
+            steps.close()
+            return None
+        if exclusive and self.addon_jobs:
+            self.addLog(
+                f"{description} can't be started until the current addon "
+                "jobs are finished")
+            steps.close()
+            return None
+
+        if not self.addon_jobs:
+            self.addon_jobs_model.clear()
+            # Jobs update the installed tables themselves. The folders they
+            # changed are checked once they are done.
+            self.addon_folder_watcher.setPaused(True)
+            self.ui.btnCancelAddonJobs.setEnabled(True)
+            self.ui.btnCheckForUpdates.setEnabled(False)
+            self.ui.btnUpdateAll.setEnabled(False)
+
+        job = AddonJob(description, self.runAddonJobTransaction(steps))
+        job.transaction = transactions.AddonTransaction(self.addon_staging_dir)
+        if exclusive:
+            self.exclusive_addon_job = job
+        self.addon_jobs.append(job)
+        self.addon_jobs_model.addJob(job)
+        self.advanceAddonJob(job)
+        return job
+
+    def runAddonJobTransaction(self, steps: Generator):
+        """Runs the steps of the current addon job. The changes they make
+           to the game's addon folders through the job's transaction are
+           committed if they succeed and rolled back otherwise. Jobs that
+           replaced or removed files, like updates and uninstalls, prune the
+           file store afterwards.
+        """
+        transaction = self.current_addon_job.transaction
+        try:
+            yield from steps
+        except Exception:
+            logger.info(f"Rolling back {self.current_addon_job.description}")
+            yield self.submitAddonJobStep(
+                self.addon_commit_executor, "Rolling back",
+                transaction.rollback)
+            self.reloadInstalledAddons()
+            raise
+
+        removes_files = transaction.removes_files
+        yield self.submitAddonJobStep(
+            self.addon_commit_executor, "Finishing", transaction.commit)
+        # The database is shared with other OneLauncher processes, which
+        # can't write to it while the job's changes are uncommitted.
+        self.conn.commit()
+        for callback in self.current_addon_job.committed_callbacks:
+            callback()
+
+        if removes_files:
+            try:
+                yield self.submitAddonJobStep(
+                    self.addon_extract_executor, "Finishing",
+                    self.addon_file_store.prune)
+            except (OSError, sqlite3.Error):
+                # The job's changes are already committed
+                logger.warning(
+                    "Couldn't remove unused files from the file store",
+                    exc_info=True)
+
+    def reloadInstalledAddons(self) -> None:
+        """Scans the addon folders again for the installed addon tables that
+           have been loaded
+        """
+        if game_settings.current_game.game_type != "DDO":
+            self.ui.tablePluginsInstalled.model().clear()
+            self.getInstalledPlugins()
+            if not self.isTableEmpty(self.ui.tableMusicInstalled):
+                self.ui.tableMusicInstalled.model().clear()
+                self.getInstalledMusic()
+        if not self.isTableEmpty(self.ui.tableSkinsInstalled):
+            self.ui.tableSkinsInstalled.model().clear()
+            self.getInstalledSkins()
+
+    def getWatchedAddonFolders(self) -> Dict[str, Path]:
+        """Returns the addon type folders of the game by addon type"""
+        if game_settings.current_game.game_type == "DDO":
+            return {"Skin": self.data_folder_skins}
+        return {
+            "Plugin": self.data_folder_plugins,
+            "Skin": self.data_folder_skins,
+            "Music": self.data_folder_music,
+        }
+
+    def handleAddonFoldersChanged(self, folders: List[Path]) -> None:
+        """Updates the installed addon tables for folders that changed. Only
+           rows of addons in the changed folders are replaced.
+        """
+        for addon_type, root in self.getWatchedAddonFolders().items():
+            root = Path(root)
+            changed_folders = {
+                folder for folder in folders
+                if folder == root or folder.parent == root}
+            if not changed_folders:
+                continue
+
+            table = self.getInstalledTableFromAddonType(addon_type)
+            if self.isTableEmpty(table):
+                # Tables are only loaded when their tab is first opened. The
+                # current table can be loaded and empty though.
+                if table is self.getCurrentTable():
+                    self.refreshInstalledAddonFolders(addon_type, [])
+                continue
+
+            if root in changed_folders:
+                changed_folders.remove(root)
+                changed_folders.update(
+                    self.addon_folder_watcher.updateSubfolders(root))
+                if addon_type == "Music":
+                    self.refreshLooseAbcFiles()
+            if changed_folders:
+                logger.debug(
+                    f"Reloading {len(changed_folders)} changed "
+                    f"{addon_type.lower()} folders")
+                self.refreshInstalledAddonFolders(
+                    addon_type, sorted(changed_folders))
+
+    def refreshInstalledAddonFolders(
+            self, addon_type: str, folders: List[Path]) -> None:
+        """Replaces rows of the addons in folders in the installed table for
+           addon_type. The whole table is loaded if it's empty.
+        """
+        table = self.getInstalledTableFromAddonType(addon_type)
+        with self.conn:
+            for folder in folders:
+                self.deleteInstalledAddonRowsInFolder(table, folder)
+
+        get_installed_addons = {
+            "Plugin": self.getInstalledPlugins,
+            "Skin": self.getInstalledSkins,
+            "Music": self.getInstalledMusic,
+        }[addon_type]
+        existing_folders = [folder for folder in folders if folder.is_dir()]
+        if existing_folders or self.isTableEmpty(table):
+            get_installed_addons(folders_list=existing_folders)
+        else:
+            self.reloadSearch(table)
+
+    def refreshLooseAbcFiles(self) -> None:
+        """Replaces rows of the loose .abc files in the music folder"""
+        table = self.ui.tableMusicInstalled
+        if self.isTableEmpty(table):
+            self.getInstalledMusic()
+            return
+
+        abc_rows = self.abc_index.scan(self.data_folder_music)
+        start = str(self.data_folder_music).rstrip(os.sep) + os.sep
+        end = start[:-1] + chr(ord(os.sep) + 1)
+        with self.conn:
+            # Files in subfolders are part of music folder rows
+            self.c.execute(
+                f"DELETE FROM {table.objectName()} "  # nosec
+                "WHERE File >= ? AND File < ? AND File LIKE '%.abc' "
+                "AND instr(substr(File, ?), ?) = 0",
+                (start, end, len(start) + 1, os.sep))
+        self.addInstalledMusicToDB([], [], {}, abc_rows)
+
+    def deleteInstalledAddonRow(self, table, file: str) -> None:
+        """Deletes row of the addon with file from an installed table.
+           Doesn't commit.
+        """
+        self.c.execute(
+            f"DELETE FROM {table.objectName()} WHERE File = ?",  # nosec
+            (file,))
+
+    def deleteInstalledAddonRowsInFolder(self, table, folder: Path) -> None:
+        """Deletes rows of the addons in folder or that are folder from an
+           installed table. Doesn't commit.
+        """
+        # Range query like `AddonFileIndex`
+        start = str(folder).rstrip(os.sep) + os.sep
+        end = start[:-1] + chr(ord(os.sep) + 1)
+        self.c.execute(
+            f"DELETE FROM {table.objectName()} "  # nosec
+            "WHERE File = ? OR (File >= ? AND File < ?)",
+            (str(folder), start, end))
+
+    def submitAddonJobStep(
+            self,
+            executor: ThreadPoolExecutor,
+            status: str,
+            step: Callable,
+            *args,
+            **kwargs) -> Future:
+        """Starts blocking step of the current addon job on executor
+
+        Args:
+            executor (ThreadPoolExecutor): `addon_download_executor`,
+                `addon_extract_executor`, or `addon_commit_executor`. Anything
+                that changes the game's addon folders has to use the last one.
+            status (str): Status to show for the job while the step runs.
+            step (Callable): Called with args and kwargs. It can't use the UI
+                             or database.
+
+        Returns:
+            Future: Has to be yielded by the job's generator.
+        """
+        job = self.current_addon_job
+        job.status = status
+        self.addon_jobs_model.updateJob(job)
+        return executor.submit(step, *args, **kwargs)
+
+    def waitForAddonJobs(self, jobs: Iterable[AddonJob]) -> Future:
+        """Returns future for the current addon job that is done once all of
+           jobs are finished. They don't have to have succeeded.
+
+        Returns:
+            Future: Has to be yielded by the job's generator.
+        """
+        job = self.current_addon_job
+        job.status = "Waiting for dependencies"
+        self.addon_jobs_model.updateJob(job)
+
+        future: Future = Future()
+        unfinished_jobs = {other_job for other_job in jobs if not other_job.finished}
+
+        def handle_job_finished(other_job: AddonJob, _: Future) -> None:
+            unfinished_jobs.discard(other_job)
+            # The future is cancelled if the waiting job is cancelled
+            if not unfinished_jobs and not future.done():
+                future.set_result(None)
+
+        if not unfinished_jobs:
+            future.set_result(None)
+        for other_job in list(unfinished_jobs):
+            other_job.finished_future.add_done_callback(
+                partial(handle_job_finished, other_job))
+        return future
+
+    def advanceAddonJob(
+            self,
+            job: AddonJob,
+            future: Optional[Future] = None) -> None:
+        """Runs addon job until it yields its next blocking step
+
+        Args:
+            job (AddonJob): Job to advance.
+            future (Future, optional): The job's last step.
+        """
+        result, error = None, None
+        if future is not None:
+            if future.cancelled():
+                error = AddonJobCancelledError()
+            elif future.exception() is not None:
+                error = future.exception()
+            else:
+                result = future.result()
+
+        # Jobs can be advanced from inside of another job's confirmation
+        # prompt, so the previous job is restored afterwards.
+        previous_job = self.current_addon_job
+        self.current_addon_job = job
+        job.future = None
+        try:
+            if error is None:
+                job.future = job.steps.send(result)
+            else:
+                job.future = job.steps.throw(error)
+        except StopIteration:
+            job.status = "Done"
+        except AddonJobCancelledError:
+            job.status = "Cancelled"
+            self.addLog(f"{job.description} was cancelled")
+        except Exception as job_error:
+            job.status = "Failed"
+            logger.error(job_error, exc_info=True)
+            self.addLog(f"{job.description} failed: {job_error}")
+        else:
+            job.future.add_done_callback(
+                partial(self.ReturnAddonJobStepResult.emit, job))
+            return
+        finally:
+            self.current_addon_job = previous_job
+
+        job.finished = True
+        if job is self.exclusive_addon_job:
+            self.exclusive_addon_job = None
+        job.finished_future.set_result(job.status)
+        job.progress = 100
+        self.addon_jobs_model.updateJob(job)
+        self.updateAddonJobsProgress()
+
+        if all(job.finished for job in self.addon_jobs):
+            self.addonJobsFinished()
+
+    def handleAddonJobStepResult(self, job: AddonJob, future: Future):
+        # Remote addon tables are rebuilt while they load, so jobs have to
+        # wait for that to finish.
+        if self.remote_addons_pending_tables:
+            self.deferred_addon_job_steps.append((job, future))
+            return
+
+        self.advanceAddonJob(job, future)
+
+    def resumeDeferredAddonJobs(self) -> None:
+        deferred_addon_job_steps = self.deferred_addon_job_steps
+        self.deferred_addon_job_steps = []
+        for job, future in deferred_addon_job_steps:
+            self.advanceAddonJob(job, future)
+
+    def handleAddonJobProgress(
+            self,
+            job: AddonJob,
+            downloaded_size: int,
+            total_size: Optional[int],
+            bytes_per_second: float):
+        if job.finished:
+            return
+
+        job.downloaded_size = downloaded_size
+        job.total_size = total_size
+        job.bytes_per_second = bytes_per_second
+        if total_size:
+            job.progress = min(100, 100 * downloaded_size // total_size)
+        self.addon_jobs_model.updateJob(job)
+        self.updateAddonJobsProgress()
+
+    def cancelAddonJobs(self) -> None:
+        """Cancels all running addon jobs. Steps that haven't started yet
+           are dropped, and running downloads and extractions are stopped.
+           Writing to the game's addon folders is never interrupted.
+        """
+        for job in self.addon_jobs:
+            if not job.finished:
+                job.cancel_event.set()
+                if job.future is not None:
+                    job.future.cancel()
+
+        self.updateAddonJobsProgress()
+
+    def updateAddonJobsProgress(self) -> None:
+        """Updates aggregate progress of the addon jobs"""
+        if not self.addon_jobs:
+            return
+
+        finished_jobs = sum(job.finished for job in self.addon_jobs)
+        text = f"{finished_jobs}/{len(self.addon_jobs)} addon jobs done"
+        if any(job.cancel_event.is_set() and not job.finished
+               for job in self.addon_jobs):
+            text = f"Cancelling: {text}"
+
+        self.ui.progressBar.setValue(
+            sum(job.progress for job in self.addon_jobs) // len(self.addon_jobs))
+        self.ui.progressBar.setFormat(text)
+        self.ui.progressBar.setTextVisible(True)
+
+    def addonJobsFinished(self) -> None:
+        self.addon_jobs = []
+        self.ui.progressBar.setValue(0)
+        self.ui.progressBar.setTextVisible(False)
+        self.ui.btnCancelAddonJobs.setEnabled(False)
+        self.ui.btnCheckForUpdates.setEnabled(True)
+        self.ui.btnUpdateAll.setEnabled(True)
+        self.addon_folder_watcher.setPaused(False)
+
+        self.resetRemoteAddonsTables()
+        self.searchSearchBarContents()
 
     def Run(self):
         self.exec()
+
+        # Running job steps can't always be interrupted, but nothing else
+        # should be started.
+        self.cancelAddonJobs()
+        for executor in (
+                self.addon_download_executor,
+                self.addon_extract_executor,
+                self.addon_commit_executor):
+            executor.shutdown(wait=True, cancel_futures=True)
+        for job in self.addon_jobs:
+            job.steps.close()
         self.closeDB()
+        self.addon_staging_dir_lock.release()
 
     def contextMenuRequested(self, cursor_position):
         global_cursor_position = self.mapToGlobal(
@@ -1750,11 +2790,12 @@ class AddonManager(QtWidgets.QDialog):
         parent_widget = selected_widget.parent()
         if parent_widget.objectName().startswith("table"):
             self.context_menu_selected_table = parent_widget
-            selected_item = self.context_menu_selected_table.itemAt(
+            selected_index = self.context_menu_selected_table.indexAt(
                 selected_widget.mapFromGlobal(global_cursor_position)
             )
-            if selected_item:
-                self.context_menu_selected_row = selected_item.row()
+            if selected_index.isValid():
+                self.context_menu_selected_row = selected_index.row()
+                model = self.context_menu_selected_table.model()
 
                 # If addon has online page
                 self.context_menu_selected_interface_ID = self.getTableRowInterfaceID(
@@ -1770,10 +2811,7 @@ class AddonManager(QtWidgets.QDialog):
                         self.ui.actionShowAddonInFileManager)
                 else:
                     # If addon in remote table is installed
-                    if (
-                        selected_item.background().color()
-                        == self.installed_addons_color
-                    ):
+                    if model.isRowInstalled(self.context_menu_selected_row):
                         menu.addAction(
                             self.ui.actionUninstallAddon)
                         menu.addAction(
@@ -1783,10 +2821,9 @@ class AddonManager(QtWidgets.QDialog):
                         menu.addAction(self.ui.actionInstallAddon)
 
                 # If addon has a new version available
-                version_item = self.context_menu_selected_table.item(
+                version_color = model.index(
                     self.context_menu_selected_row, 3
-                )
-                version_color = version_item.foreground().color()
+                ).data(QtCore.Qt.ForegroundRole)
                 if version_color in [
                         QtGui.QColor("crimson"),
                         QtGui.QColor("green")]:
@@ -1813,9 +2850,9 @@ class AddonManager(QtWidgets.QDialog):
 
     def getTableRowInterfaceID(
             self,
-            table: QtWidgets.QTableWidget,
+            table: QtWidgets.QTableView,
             row: int) -> Optional[str]:
-        addon_db_id = table.item(row, 0).text()
+        addon_db_id = table.model().getRowID(row)
 
         for interface_ID in self.c.execute(
             # nosec
@@ -1844,7 +2881,7 @@ class AddonManager(QtWidgets.QDialog):
     def getAddonUrlFromInterfaceID(
             self,
             interface_ID: str,
-            table: QtWidgets.QTableWidget,
+            table: QtWidgets.QTableView,
             download_url: bool = False) -> str:
         """Returns info URL for addon or download URL if download_url=True"""
         # URL is only in remote version of table
@@ -1901,11 +2938,7 @@ class AddonManager(QtWidgets.QDialog):
         if not addon:
             return
 
-        self.installRemoteAddon(addon[1], addon[2], addon[0])
-        self.setRemoteAddonToInstalled(addon, table)
-
-        self.resetRemoteAddonsTables()
-        self.searchSearchBarContents()
+        self.startRemoteAddonInstallJobs([addon], table)
 
     def actionUninstallAddonSelected(self):
         table = self.context_menu_selected_table
@@ -1921,13 +2954,12 @@ class AddonManager(QtWidgets.QDialog):
 
             table_installed = self.getRemoteOrLocalTableFromOne(
                 table, remote=False)
-            uninstall_function([addon], table_installed)
-
-            self.resetRemoteAddonsTables()
-            self.searchSearchBarContents()
+            self.startAddonJob(
+                f"Uninstalling {addon[2]}",
+                uninstall_function([addon], table_installed))
 
     def getAddonListObjectFromRow(
-        self, table: QtWidgets.QTableWidget, row, remote=True
+        self, table: QtWidgets.QTableView, row, remote=True
     ):
         """
         Gives list of information for addon. The information is:
@@ -1948,23 +2980,21 @@ class AddonManager(QtWidgets.QDialog):
                 table, remote=False)
 
             if table.objectName().endswith("Installed"):
-                self.reloadSearch(table_installed)
-
                 for item in self.c.execute(
                     "SELECT File FROM {table} WHERE rowid=?".format(  # nosec
                         table=table_installed.objectName()
                     ),
-                    (table_installed.item(row, 0).text(),),
+                    (table_installed.model().getRowID(row),),
                 ):
                     file = item[0]
             else:
                 file = self.getAddonFileFromInterfaceID(
                     interface_ID, table_installed)
 
-        return [interface_ID, file, table.item(row, 1).text()]
+        return [interface_ID, file, table.model().index(row, 1).data()]
 
     def getRemoteOrLocalTableFromOne(
-        self, input_table: QtWidgets.QTableWidget, remote: bool = False
+        self, input_table: QtWidgets.QTableView, remote: bool = False
     ):
         table_name = input_table.objectName()
         # UI table object names are renamed with DDO in them when the current game is
@@ -2037,15 +3067,15 @@ class AddonManager(QtWidgets.QDialog):
                 True)
 
     def checkForUpdates(self):
-        if self.loadRemoteAddons():
+        if self.loadRemoteAddons(force_check=True):
             self.getOutOfDateAddons()
             self.searchSearchBarContents()
 
     def getOutOfDateAddons(self):
         """
-        Marks addons as out of date in database with '(Outdated) '
-        in installed table and '(Updated) ' in remote table. These
-        are prepended to the Version column.
+        Marks installed addons that have a newer version in the remote
+        tables as having an update, along with the remote addons. See
+        `updates.mark_updates`.
         """
         if not self.loadRemoteDataIfNotDone():
             return
@@ -2054,96 +3084,29 @@ class AddonManager(QtWidgets.QDialog):
             self.loadSkinsIfNotDone()
             self.loadMusicIfNotDone()
 
-        if game_settings.current_game.game_type == "LOTRO":
-            tables = self.TABLE_LIST[:3]
-        else:
-            tables = ["tableSkinsInstalled"]
-
-        for db_table in tables:
-            table_installed = getattr(self.ui, db_table)
-            table_remote = self.getRemoteOrLocalTableFromOne(
-                table_installed, remote=True
-            )
-
-            addons_info_remote = {
-                addon[1]: (addon[0], addon[2])
-                for addon in self.c.execute(
-                    # nosec
-                    "SELECT Version, InterfaceID, rowid FROM {table_remote} WHERE"
-                    " Name LIKE '(Installed) %'".format(
-                        table_remote=table_remote.objectName()
-                    )
-                )
-            }
+        with self.conn:
+            updates.mark_updates(self.c, self.getUpdatableTables())
 
-            out_of_date_addons = []
-            for addon in self.c.execute(
-                # nosec
-                "SELECT Version, InterfaceID, rowid FROM {table_installed} WHERE"
-                " InterfaceID != ''".format(
-                    table_installed=table_installed.objectName()
-                )
-            ):
-                # Will raise KeyError if addon has Interface ID that isn't in
-                # remote table.
-                try:
-                    remote_addon_info = addons_info_remote[addon[1]]
-                except KeyError:
-                    continue
-
-                latest_version = remote_addon_info[0]
-                if addon[0] != latest_version:
-                    rowid_remote = remote_addon_info[1]
-                    out_of_date_addons.append(
-                        (addon[2], rowid_remote, table_installed))
-
-            for addon in out_of_date_addons:
-                self.markAddonForUpdating(addon[0], addon[1], addon[2])
-
-    def markAddonForUpdating(self, rowid_local, rowid_remote, table_installed):
-        """
-        Marks addon as having having updates
-        available in installed and remote tables
+    def getUpdatableTables(self) -> Dict[str, QtWidgets.QTableView]:
+        """Returns installed tables for the current game by database table
+           name. DDO's tables have different names than their widgets.
         """
-        table_remote = self.getRemoteOrLocalTableFromOne(
-            table_installed, remote=True)
-
-        self.c.execute(
-            (
-                "UPDATE {table} SET Version=('(Outdated) ' || Version) WHERE rowid=?".format(  # nosec
-                    table=table_installed.objectName()
-                )
-            ),
-            (str(rowid_local),),
-        )
-        self.c.execute(
-            (
-                "UPDATE {table} SET Version=('(Updated) ' || Version) WHERE rowid=?".format(  # nosec
-                    table=table_remote.objectName()
-                )
-            ),
-            (str(rowid_remote),),
-        )
+        if game_settings.current_game.game_type == "LOTRO":
+            tables = [getattr(self.ui, table) for table in self.TABLE_LIST[:3]]
+        else:
+            tables = [self.ui.tableSkinsInstalled]
+        return {table.objectName(): table for table in tables}
 
     def updateAll(self):
         if not self.loadRemoteDataIfNotDone():
             return
 
-        if game_settings.current_game.game_type == "LOTRO":
-            tables = self.TABLE_LIST[:3]
-        else:
-            tables = ["tableSkinsInstalled"]
-
-        for db_table in tables:
-            table = getattr(self.ui, db_table)
-            for addon in self.c.execute(
-                "SELECT InterfaceID, File, Name FROM {table} WHERE"  # nosec
-                " Version LIKE '(Outdated) %'".format(table=table.objectName())
-            ):
-                self.updateAddon(addon, table)
-
-        self.resetRemoteAddonsTables()
-        self.searchSearchBarContents()
+        tables = self.getUpdatableTables()
+        for table_name, _, *addon, _, _ in updates.get_update_plan(
+                self.c, tables):
+            self.startAddonJob(
+                f"Updating {addon[2]}",
+                self.updateAddon(addon, tables[table_name]))
 
     def updateAddon(self, addon, table):
         uninstall_function = self.getUninstallFunctionFromTable(table)
@@ -2151,15 +3114,36 @@ class AddonManager(QtWidgets.QDialog):
             table, remote=False)
         table_remote = self.getRemoteOrLocalTableFromOne(table, remote=True)
 
-        uninstall_function([addon], table_installed)
-
         for entry in self.c.execute(
             "SELECT File FROM {table} WHERE"  # nosec
             " InterfaceID = ?".format(table=table_remote.objectName()),
             (addon[0],),
         ):
             url = entry[0]
-        self.installRemoteAddon(url, addon[2], addon[0])
+
+        # The new version is downloaded before the old one is removed,
+        # so the addon isn't left uninstalled if the download fails.
+        path = yield from self.getRemoteAddonArchive(
+            url, addon[2], addon[0],
+            self.getRemoteAddonVersion(addon[0], table_remote))
+        if not path:
+            return
+
+        # Addons with a manifest are updated in place, so files that are the
+        # same in the new version aren't touched. Others are reinstalled.
+        addon_type = self.getAddonTypeFromTable(table_installed)
+        manifest = manifests.get_manifest(
+            self.c, addon_type, self.getAddonTypeDataFolder(addon_type),
+            addon[0])
+        try:
+            if not manifest:
+                yield from uninstall_function([addon], table_installed)
+            yield from self.installAddon(
+                path, interface_id=addon[0], addon_name=addon[2],
+                manifest=manifest)
+        finally:
+            self.addon_archive_cache.release(path)
+
         self.setRemoteAddonToInstalled(addon, table_remote)
 
     def actionUpdateAddonSelected(self):
@@ -2170,10 +3154,8 @@ class AddonManager(QtWidgets.QDialog):
         row = self.context_menu_selected_row
         addon = self.getAddonListObjectFromRow(table, row, remote=False)
 
-        self.updateAddon(addon, table)
-
-        self.resetRemoteAddonsTables()
-        self.searchSearchBarContents()
+        self.startAddonJob(
+            f"Updating {addon[2]}", self.updateAddon(addon, table))
 
     def updateAllSelectedAddons(self):
         table = self.getCurrentTable()
@@ -2185,23 +3167,104 @@ class AddonManager(QtWidgets.QDialog):
         if addons:
             for addon in addons:
                 if self.checkIfAddonHasUpdate(addon, table):
-                    self.updateAddon(addon, table)
+                    self.startAddonJob(
+                        f"Updating {addon[2]}", self.updateAddon(addon, table))
 
-            self.resetRemoteAddonsTables()
-            self.searchSearchBarContents()
+    def actionUpdateAllGamesSelected(self):
+        self.startAddonJob(
+            "Updating addons in all games", self.updateAllGames(),
+            exclusive=True)
+
+    def updateAllGames(self):
+        """Updates the addons of every game at once. See
+           `batch_updates.update_games`.
+        """
+        job = self.current_addon_job
+        games = [(game.documents_config_dir, game.game_type)
+                 for game in game_settings.games.values()]
+        try:
+            results = yield self.submitAddonJobStep(
+                self.addon_commit_executor,
+                "Updating",
+                batch_updates.update_games,
+                games,
+                self.ADDON_DOWNLOAD_WORKERS,
+                self.ADDON_EXTRACT_WORKERS,
+                job.check_cancelled,
+                **self.getAddonEngineSettings())
+        except Exception:
+            self.reloadCurrentGameAddons()
+            raise
+
+        self.reloadCurrentGameAddons()
+        for result in results:
+            for error in result.errors:
+                self.addLog(f"{result.documents_folder}: {error}")
+            if result.updated:
+                self.addLog(
+                    f"Updated {len(result.updated)} addons in "
+                    f"{result.documents_folder}")
+
+    def actionDeduplicateAllGamesSelected(self):
+        self.startAddonJob(
+            "Storing addon files shared by games once",
+            self.deduplicateAllGames(), exclusive=True)
+
+    def deduplicateAllGames(self):
+        """Links the addon files of every game to the shared file store. See
+           `batch_updates.deduplicate_games`.
+        """
+        games = [(game.documents_config_dir, game.game_type)
+                 for game in game_settings.games.values()]
+        results = yield self.submitAddonJobStep(
+            self.addon_commit_executor,
+            "Linking",
+            batch_updates.deduplicate_games,
+            games,
+            **self.getAddonEngineSettings())
+
+        for documents_folder, result in results:
+            self.addLog(
+                f"Linked {result.linked_files} files in {documents_folder}. "
+                f"{download.format_size(result.saved_bytes)} were saved.")
+
+    def getAddonEngineSettings(self) -> dict:
+        """Returns keyword arguments for `engine.AddonEngine` from the
+           program settings
+        """
+        return {
+            "remote_addons_cache_ttl":
+                settings.program_settings.remote_addons_cache_ttl,
+            "archive_cache_size":
+                settings.program_settings.addon_archive_cache_size
+                * 1024 * 1024,
+            "link_files": settings.program_settings.link_addon_files,
+        }
+
+    def reloadCurrentGameAddons(self):
+        """Reloads the installed tables and the installed and update markers
+           of the remote tables after `batch_updates` changed the addons of
+           every game. The remote tables are shared, so their markers were
+           last set for another game.
+        """
+        self.reloadInstalledAddons()
+        with self.conn:
+            for i in range(self.ui.tabWidgetRemote.count()):
+                tab = self.ui.tabWidgetRemote.widget(i)
+                table = getattr(
+                    self.ui, tab.objectName().replace("tab", "table"))
+                if not self.isTableEmpty(table):
+                    self.loadCachedRemoteAddons(table)
+            if not self.isTableEmpty(self.ui.tableSkins):
+                updates.mark_updates(self.c, self.getUpdatableTables())
 
     def checkIfAddonHasUpdate(self, addon, table):
-        for entry in self.c.execute(
-            "SELECT Version FROM {table} WHERE InterfaceID = ?".format(  # nosec
-                table=table.objectName()
-            ),
+        for update_available, in self.c.execute(
+            f"SELECT {database.UPDATE_AVAILABLE_COLUMN} "  # nosec
+            f"FROM {table.objectName()} WHERE InterfaceID = ?",
             (addon[0],),
         ):
-            version = entry[0]
-            return bool(
-                version.startswith(
-                    "(Outdated) ") or version.startswith("(Updated) ")
-            )
+            return bool(update_available)
 
     def loadRemoteDataIfNotDone(self):
         """
@@ -2237,7 +3300,7 @@ class AddonManager(QtWidgets.QDialog):
             game_settings.current_game.startup_scripts.remove(script)
 
     def getRelativeStartupScriptFromInterfaceID(
-        self, table: QtWidgets.QTableWidget, interface_ID: str
+        self, table: QtWidgets.QTableView, interface_ID: str
     ) -> Path:
         """Returns path of startup script relative to game documents settings directory"""
         table_local = self.getRemoteOrLocalTableFromOne(table, remote=False)
@@ -2253,7 +3316,7 @@ class AddonManager(QtWidgets.QDialog):
 
                 return addon_data_folder_relative / script
 
-    def getAddonTypeDataFolderFromTable(self, table: QtWidgets.QTableWidget):
+    def getAddonTypeDataFolderFromTable(self, table: QtWidgets.QTableView):
         table_name = table.objectName()
         if "Plugins" in table_name:
             return self.data_folder_plugins
@@ -2264,8 +3327,37 @@ class AddonManager(QtWidgets.QDialog):
         else:
             return None
 
+    def getAddonTypeFromTable(self, table: QtWidgets.QTableView) -> str:
+        """Returns "Plugin", "Skin", or "Music" for an addon table"""
+        table_name = table.objectName()
+        if "Plugins" in table_name:
+            return "Plugin"
+        elif "Skins" in table_name:
+            return "Skin"
+        elif "Music" in table_name:
+            return "Music"
+        else:
+            raise IndexError(
+                table_name + " doesn't correspond to add-on type tab")
+
+    def getInstalledTableFromAddonType(
+            self, addon_type: str) -> QtWidgets.QTableView:
+        """Returns installed addon table for an addon type. See
+           `extraction.ExtractionPlan`.
+        """
+        return {
+            "Plugin": self.ui.tablePluginsInstalled,
+            "Skin": self.ui.tableSkinsInstalled,
+            "Music": self.ui.tableMusicInstalled,
+        }[addon_type]
+
+    def getAddonTypeDataFolder(self, addon_type: str) -> Path:
+        """Returns data folder for an addon type"""
+        return self.getAddonTypeDataFolderFromTable(
+            self.getInstalledTableFromAddonType(addon_type))
+
     def handleStartupScriptActivationPrompt(
-        self, table: QtWidgets.QTableWidget, interface_ID: str
+        self, table: QtWidgets.QTableView, interface_ID: str
     ):
         """Asks user if they want to enable an add-on's startup script if present"""
         script = self.getRelativeStartupScriptFromInterfaceID(
@@ -2284,7 +3376,11 @@ class AddonManager(QtWidgets.QDialog):
                 " It is highly recommended to review the script's code in the details"
                 " box below to make sure it's safe.", script_contents, )
             if activate_script:
-                game_settings.current_game.startup_scripts.append(script)
+                # After a deactivation of the old version's script when
+                # updating. See `removeOutdatedAddonFiles`.
+                self.current_addon_job.committed_callbacks.append(
+                    partial(game_settings.current_game.startup_scripts.append,
+                            script))
 
     def uninstallStartupScript(self, script: str, addon_data_folder: Path):
         if script:
@@ -2292,9 +3388,15 @@ class AddonManager(QtWidgets.QDialog):
 
             relative_to_game_documents_dir_script = script_path.relative_to(
                 self.data_folder)
+            self.current_addon_job.committed_callbacks.append(partial(
+                self.deactivateStartupScript,
+                relative_to_game_documents_dir_script))
 
-            if relative_to_game_documents_dir_script in game_settings.current_game.startup_scripts:
-                game_settings.current_game.startup_scripts.remove(
-                    relative_to_game_documents_dir_script)
+            yield self.submitAddonJobStep(
+                self.addon_commit_executor, "Uninstalling",
+                self.current_addon_job.transaction.remove, script_path)
 
-            script_path.unlink(missing_ok=True)
+    def deactivateStartupScript(self, script: Path) -> None:
+        """Removes script from the game's startup scripts if it's there"""
+        if script in game_settings.current_game.startup_scripts:
+            game_settings.current_game.startup_scripts.remove(script)
@@ -0,0 +1,288 @@
+import logging
+import os
+import re
+import sqlite3
+from fractions import Fraction
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from onelauncher.addons.database import (
+    ABC_FILES_COLUMNS, ABC_FILES_TABLE_NAME)
+from onelauncher.addons.parsing import parse_files
+
+# LOTRO instruments that are looked for in the titles and part names of
+# songs. Matched case-insensitively at the start of a word, so "drums" and
+# "bagpipes" count too.
+INSTRUMENTS = ["Lute", "Harp", "Theorbo", "Flute", "Clarinet", "Horn",
+               "Bagpipe", "Pibgorn", "Drum", "Cowbell", "Fiddle", "Bassoon"]
+# What ABC uses when a tune doesn't set these
+DEFAULT_UNIT_NOTE_LENGTH = Fraction(1, 8)
+DEFAULT_TEMPO = (Fraction(1, 4), 120)
+# Indexed for files that can't be parsed, so they are still listed
+EMPTY_METADATA = {"title": "", "transcriber": "", "parts": 0,
+                  "instruments": [], "tempo": 0, "duration": 0}
+
+_FIELD = re.compile(r"^([A-Za-z]):\s*(.*)$")
+_INSTRUMENT = re.compile(
+    r"\b({})".format("|".join(INSTRUMENTS)), re.IGNORECASE)
+# Song lengths are often put in titles, like "Song (3:25)"
+_DURATION = re.compile(r"\b(\d{1,2}):([0-5]\d)\b")
+# Things in tune bodies that don't take up time. Comments, chord symbols and
+# annotations, decorations, grace notes, and the brackets of bar lines and
+# repeat endings, which would look like chords otherwise.
+_IGNORED = re.compile(
+    r'%.*|"[^"]*"|![^!]*!|\+[^+]*\+|\{[^}]*\}|\[\||\|\]|\[(?=\d)')
+# Inline fields, chords, and notes or rests with their lengths
+_TOKEN = re.compile(
+    r"\[([A-Za-z]):([^\]]*)\]"
+    r"|\[([^\]]*)\](\d*/*\d*)"
+    r"|([_^=]*[A-Ga-gzxZX][,']*)(\d*/*\d*)")
+_NOTE = re.compile(r"[_^=]*[A-Ga-gz][,']*(\d*/*\d*)")
+
+
+@lru_cache(maxsize=None)
+def _parse_length(text: str) -> float:
+    """Returns length multiplier of a note, like "3/2", "/", or "2". Cached,
+       since songs use the same few lengths over and over.
+    """
+    numerator, slash, denominator = text.partition("/")
+    length = int(numerator) if numerator else 1
+    if not slash:
+        return length
+
+    denominator = denominator.lstrip("/")
+    if denominator:
+        # Zero is a typo. The length is used as if there was no denominator.
+        return length / (int(denominator) or 1)
+    # Each slash without a number halves the length
+    return length / 2 ** text.count("/")
+
+
+def _parse_fraction(text: str) -> Optional[Fraction]:
+    match = re.search(r"(\d+)\s*/\s*(\d+)", text)
+    if match and int(match[2]):
+        return Fraction(int(match[1]), int(match[2]))
+    return None
+
+
+def _parse_meter(text: str) -> Fraction:
+    """Returns length of a bar in whole notes. Common time (C) and cut time
+       (C|) are both one whole note long.
+    """
+    return _parse_fraction(text) or Fraction(1)
+
+
+def _parse_tempo(text: str) -> Optional[Tuple[Fraction, int]]:
+    """Returns beat length and beats per minute of a Q: field"""
+    # Tempo names in quotes are ignored
+    text = re.sub(r'"[^"]*"', "", text)
+    match = re.search(r"(?:(\d+)\s*/\s*(\d+)\s*=\s*)?(\d+)\s*$", text.strip())
+    if not match or not int(match[3]):
+        return None
+    if match[1] and int(match[2]):
+        return Fraction(int(match[1]), int(match[2])), int(match[3])
+    return DEFAULT_TEMPO[0], int(match[3])
+
+
+class _Part():
+    """State of one tune (X: section) while it is read"""
+
+    def __init__(self) -> None:
+        self.unit_note_length = DEFAULT_UNIT_NOTE_LENGTH
+        self.meter = Fraction(1)
+        self.tempo: Optional[Tuple[Fraction, int]] = None
+        self.seconds = 0.0
+        self._update_unit_seconds()
+
+    def _update_unit_seconds(self) -> None:
+        beat_length, beats_per_minute = self.tempo or DEFAULT_TEMPO
+        # How long a note of the unit note length plays for
+        self.unit_seconds = float(
+            self.unit_note_length / beat_length * 60 / beats_per_minute)
+
+    def set_field(self, field: str, value: str) -> None:
+        if field == "L":
+            self.unit_note_length = (
+                _parse_fraction(value) or self.unit_note_length)
+        elif field == "M":
+            self.meter = _parse_meter(value)
+        elif field == "Q":
+            self.tempo = _parse_tempo(value) or self.tempo
+        self._update_unit_seconds()
+
+    def add_body_line(self, line: str) -> None:
+        units = 0.0
+        for field, value, chord, chord_length, note, length in _TOKEN.findall(
+                _IGNORED.sub("", line)):
+            if note:
+                if note[-1] in "ZX":
+                    # Rests that last a number of bars
+                    units += float(self.meter / self.unit_note_length) * (
+                        _parse_length(length))
+                else:
+                    units += _parse_length(length)
+            elif field:
+                # Fields can change the unit note length or tempo
+                self.seconds += units * self.unit_seconds
+                units = 0.0
+                self.set_field(field, value)
+            else:
+                # Chords last as long as their first note
+                first_note = _NOTE.search(chord)
+                if first_note:
+                    units += _parse_length(first_note[1]) * _parse_length(
+                        chord_length)
+        self.seconds += units * self.unit_seconds
+
+
+def parse_abc_file(path: Path) -> dict:
+    """Returns metadata of an ABC song file. Files with several parts, like
+       the ones made for LOTRO bands, have an X: section for each part.
+
+    Returns:
+        dict: "title" and "transcriber" of the song from the first T: and Z:
+              fields, number of "parts", "instruments" mentioned in the part
+              titles, "tempo" in beats per minute from the first Q: field,
+              and "duration" in seconds. The duration is taken from the title
+              if it has one. Otherwise it is estimated from the notes of the
+              longest part.
+    """
+    title = ""
+    transcriber = ""
+    tempo = 0
+    instruments: List[str] = []
+    stated_duration = 0
+    parts: List[_Part] = []
+    part = _Part()
+    in_header = True
+
+    with path.open(encoding="utf-8", errors="replace") as file:
+        for line in file:
+            line = line.strip()
+            if line.startswith("%%part-name"):
+                line = "T:" + line[len("%%part-name"):]
+            field = _FIELD.match(line)
+
+            if field and field[1] == "X":
+                part = _Part()
+                parts.append(part)
+                in_header = True
+            elif field:
+                name, value = field[1], field[2].strip()
+                # Other fields in tune bodies, like lyrics, are skipped
+                if not in_header and name not in "LMQT":
+                    continue
+
+                if name == "T":
+                    title = title or value
+                    for instrument in _INSTRUMENT.findall(value):
+                        instrument = instrument.title()
+                        if instrument not in instruments:
+                            instruments.append(instrument)
+                    duration = _DURATION.search(value)
+                    if duration and not stated_duration:
+                        stated_duration = (
+                            int(duration[1]) * 60 + int(duration[2]))
+                elif name == "Z":
+                    transcriber = transcriber or re.sub(
+                        r"^Transcribed by\s+", "", value)
+                elif name == "Q" and not tempo:
+                    beat = _parse_tempo(value)
+                    tempo = beat[1] if beat else 0
+                elif name == "K":
+                    # K: is the last field of a tune header
+                    in_header = False
+                part.set_field(name, value)
+            elif line and not in_header:
+                part.add_body_line(line)
+
+    if not parts:
+        parts.append(part)
+    duration = stated_duration or round(
+        max(part.seconds for part in parts))
+    return {"title": title, "transcriber": transcriber, "parts": len(parts),
+            "instruments": instruments, "tempo": tempo, "duration": duration}
+
+
+class AbcIndex():
+    """
+    Metadata of the loose .abc files in music folders, stored in the addons
+    cache database with a full-text search index. Files are only parsed
+    again when their size, mtime, or inode changed, so scanning a folder of
+    songs that were already indexed only needs a stat call per file.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor) -> None:
+        self.c = cursor
+
+    def _get_rows_in_folder(self, folder: Path, columns: str) -> List[tuple]:
+        """Returns columns of the indexed files directly in folder. The
+           first column has to be Path.
+        """
+        # Range query over the primary key, like `AddonFileIndex`. Files
+        # in subfolders are filtered out afterwards.
+        start = str(folder).rstrip(os.sep) + os.sep
+        end = start[:-1] + chr(ord(os.sep) + 1)
+        return [
+            row for row in self.c.execute(
+                f"SELECT {columns} FROM {ABC_FILES_TABLE_NAME} "  # nosec
+                "WHERE Path >= ? AND Path < ?", (start, end))
+            if os.sep not in row[0][len(start):]]
+
+    def scan(self, folder: Path) -> List[tuple]:
+        """Updates the index for the .abc files directly in folder. Entries
+           of files that no longer exist are removed. Files that can't be
+           parsed are indexed with `EMPTY_METADATA`. Doesn't commit.
+
+        Returns:
+            List[tuple]: Path of each file in folder followed by its values
+                         for `database.ABC_FILES_COLUMNS`. Instruments are
+                         comma separated.
+        """
+        indexed_entries = {
+            path: (size, mtime, inode) for path, size, mtime, inode in
+            self._get_rows_in_folder(folder, "Path, Size, MTime, Inode")}
+        changed_files: Dict[Path, os.stat_result] = {}
+        try:
+            entries = list(os.scandir(folder))
+        except (FileNotFoundError, NotADirectoryError):
+            entries = []
+        for entry in entries:
+            if not entry.name.endswith(".abc") or not entry.is_file():
+                continue
+
+            stat = entry.stat()
+            stat_key = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+            if indexed_entries.pop(entry.path, None) != stat_key:
+                changed_files[Path(entry.path)] = stat
+
+        removed_paths = [*indexed_entries, *map(str, changed_files)]
+        self.c.executemany(
+            f"DELETE FROM {ABC_FILES_TABLE_NAME} WHERE Path = ?",  # nosec
+            [(path,) for path in removed_paths])
+
+        rows = []
+        for path, data in parse_files(
+                parse_abc_file, list(changed_files), EMPTY_METADATA).items():
+            stat = changed_files[path]
+            rows.append((
+                str(path), stat.st_size, stat.st_mtime_ns, stat.st_ino,
+                data["title"], data["transcriber"], data["parts"],
+                ", ".join(data["instruments"]), data["tempo"],
+                data["duration"]))
+        placeholders = ",".join("?" * (len(ABC_FILES_COLUMNS) + 4))
+        self.c.executemany(
+            f"INSERT INTO {ABC_FILES_TABLE_NAME} "  # nosec
+            f"(Path, Size, MTime, Inode, {', '.join(ABC_FILES_COLUMNS)}) "
+            f"VALUES({placeholders})", rows)
+        if changed_files or indexed_entries:
+            logger.debug(
+                f"Indexed {len(changed_files)} ABC files in {folder}. "
+                f"{len(indexed_entries)} were removed.")
+
+        return self._get_rows_in_folder(
+            folder, f"Path, {', '.join(ABC_FILES_COLUMNS)}")
+
+
+logger = logging.getLogger("main")
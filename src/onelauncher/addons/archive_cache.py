@@ -0,0 +1,252 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from shutil import copy, move
+from time import time
+from typing import Dict, Iterator, Optional, Tuple
+from uuid import uuid4
+
+from onelauncher.addons.file_locks import FileLock
+
+# Bytes hashed at a time
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def get_file_hash(file: Path) -> str:
+    """Returns SHA-256 hex digest of file's contents"""
+    file_hash = hashlib.sha256()
+    with file.open("rb") as file_object:
+        for chunk in iter(lambda: file_object.read(HASH_CHUNK_SIZE), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+class AddonArchiveCache():
+    """
+    Downloaded addon archives kept on disk, so reinstalling an addon or
+    installing it for another game doesn't download it again. Archives
+    are stored by the hash of their contents and looked up by interface ID
+    and version. Once the cache is bigger than its maximum size, the least
+    recently used archives are removed.
+
+    Archives returned by `get` and `add` are pinned until they're given to
+    `release`, so they aren't removed while a job still needs them. Pins are
+    shared by the caches of the process. Each process that pins an archive
+    holds a lock on a pin file next to it, so other processes, like
+    `onelauncher-addons` and the addon manager, don't remove it either.
+
+    The cache has its own database, so it can be used from any thread.
+    """
+    TABLE_NAME = "addon_archives"
+    PIN_FILE_SUFFIX = ".pin"
+    # Held pin file lock and number of users of each pinned archive
+    _pinned_archives: Dict[Path, Tuple[FileLock, int]] = {}
+    _pinned_archives_lock = threading.Lock()
+
+    def __init__(self, cache_dir: Path, max_size: int) -> None:
+        """
+        Args:
+            cache_dir (Path): Folder for the archives and their index.
+            max_size (int): Maximum total size of the archives in bytes.
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        # Held while archives are pinned or removed, so another process
+        # can't remove an archive between checking that it exists and
+        # pinning it
+        self.process_lock = FileLock(cache_dir / "archives.lock")
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.TABLE_NAME} ("
+                "InterfaceID TEXT, Version TEXT, Hash TEXT, Size INTEGER, "
+                "LastUsed REAL, PRIMARY KEY (InterfaceID, Version))")
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.TABLE_NAME}_hash "
+                f"ON {self.TABLE_NAME} (Hash)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Yields connection to the index. Changes are committed at the end."""
+        conn = sqlite3.connect(str(self.cache_dir / "index.sqlite"))
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _get_archive_path(self, archive_hash: str) -> Path:
+        return self.cache_dir / archive_hash[:2] / f"{archive_hash}.zip"
+
+    def get(self, interface_id: str, version: str) -> Optional[Path]:
+        """Returns path of cached archive for an addon version or None if
+           it isn't cached. The archive must not be modified, and it has to
+           be given to `release` once it isn't needed anymore.
+        """
+        with self.lock, self.process_lock, self._connect() as conn:
+            row = conn.execute(
+                f"SELECT Hash, Size FROM {self.TABLE_NAME} "
+                "WHERE InterfaceID = ? AND Version = ?",
+                (interface_id, version)).fetchone()
+            if row is None:
+                return None
+
+            archive_hash, size = row
+            archive_path = self._get_archive_path(archive_hash)
+            try:
+                # Pinned at the same time as checking it, so another cache
+                # can't remove it in between
+                with self._pinned_archives_lock:
+                    if archive_path.stat().st_size == size:
+                        self._pin(archive_path)
+                        conn.execute(
+                            f"UPDATE {self.TABLE_NAME} SET LastUsed = ? "
+                            "WHERE Hash = ?", (time(), archive_hash))
+                        return archive_path
+            except FileNotFoundError:
+                pass
+
+            # Archive was removed or changed outside of the cache
+            self._remove_archive(conn, archive_hash)
+            return None
+
+    def add(
+            self,
+            interface_id: str,
+            version: str,
+            archive: Path,
+            move_archive: bool = False) -> Path:
+        """Adds archive to the cache as the given addon version
+
+        Args:
+            interface_id (str): Interface ID of the addon.
+            version (str): Version of the addon the archive is for.
+            archive (Path): Archive to add.
+            move_archive (bool, optional): Move archive into the cache instead
+                                           of copying it. Defaults to False.
+
+        Returns:
+            Path: Path of the archive in the cache. It has to be given to
+                  `release` once it isn't needed anymore.
+        """
+        archive_hash = get_file_hash(archive)
+        archive_path = self._get_archive_path(archive_hash)
+        archive_path.parent.mkdir(exist_ok=True)
+        # Copied before locking, since it can take a while. The name is
+        # unique, so processes adding the same archive don't share the file.
+        tmp_archive_path = archive_path.with_name(f"{uuid4().hex}.tmp")
+        if move_archive:
+            move(str(archive), str(tmp_archive_path))
+        else:
+            copy(str(archive), str(tmp_archive_path))
+
+        try:
+            with self.lock, self.process_lock, self._connect() as conn:
+                with self._pinned_archives_lock:
+                    self._pin(archive_path)
+                try:
+                    # Identical archives are only stored once
+                    if not archive_path.exists():
+                        tmp_archive_path.replace(archive_path)
+
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO {self.TABLE_NAME} "
+                        "VALUES(?,?,?,?,?)",
+                        (interface_id, version, archive_hash,
+                         archive_path.stat().st_size, time()))
+                except BaseException:
+                    self.release(archive_path)
+                    raise
+                self._evict(conn)
+        finally:
+            tmp_archive_path.unlink(missing_ok=True)
+
+        return archive_path
+
+    def release(self, archive: Path) -> None:
+        """Unpins archive from `get` or `add`, so it can be removed once
+           the cache is full and nothing else uses it
+        """
+        with self._pinned_archives_lock:
+            if archive not in self._pinned_archives:
+                return
+            pin_lock, users = self._pinned_archives.pop(archive)
+            if users > 1:
+                self._pinned_archives[archive] = (pin_lock, users - 1)
+            else:
+                pin_lock.release()
+
+    def _pin(self, archive: Path) -> None:
+        """Needs `_pinned_archives_lock` and `process_lock`"""
+        if archive in self._pinned_archives:
+            pin_lock, users = self._pinned_archives[archive]
+        else:
+            # Unique, so it's never held by anything else
+            pin_lock = FileLock(archive.with_name(
+                f"{archive.stem}.{uuid4().hex}{self.PIN_FILE_SUFFIX}"))
+            pin_lock.acquire()
+            users = 0
+        self._pinned_archives[archive] = (pin_lock, users + 1)
+
+    def _is_pinned(self, archive: Path) -> bool:
+        """Returns whether archive is pinned by this or another process.
+           Pin files left by processes that crashed are removed. Needs
+           `_pinned_archives_lock` and `process_lock`.
+        """
+        if archive in self._pinned_archives:
+            return True
+
+        is_pinned = False
+        for pin_file in archive.parent.glob(
+                f"{archive.stem}.*{self.PIN_FILE_SUFFIX}"):
+            pin_lock = FileLock(pin_file)
+            if pin_lock.acquire(blocking=False):
+                pin_lock.release()
+            else:
+                is_pinned = True
+        return is_pinned
+
+    def _remove_archive(
+            self, conn: sqlite3.Connection, archive_hash: str) -> bool:
+        """Returns False if the archive couldn't be removed"""
+        try:
+            self._get_archive_path(archive_hash).unlink(missing_ok=True)
+        except OSError:
+            # Windows doesn't allow removing files that are open, like by a
+            # process that pinned the archive before pins were shared
+            logger.warning(
+                f"Couldn't remove {archive_hash} from addon archive cache",
+                exc_info=True)
+            return False
+        conn.execute(
+            f"DELETE FROM {self.TABLE_NAME} WHERE Hash = ?", (archive_hash,))
+        return True
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Removes least recently used archives until the cache fits in
+           `max_size`. Pinned archives are never removed, since they are
+           being used. Needs `process_lock`.
+        """
+        archives = conn.execute(
+            f"SELECT Hash, MAX(Size), MAX(LastUsed) AS LastUsedTime FROM {self.TABLE_NAME} "
+            "GROUP BY Hash ORDER BY LastUsedTime").fetchall()
+        total_size = sum(size for _, size, _ in archives)
+        with self._pinned_archives_lock:
+            for archive_hash, size, _ in archives:
+                if total_size <= self.max_size:
+                    break
+                if (self._is_pinned(self._get_archive_path(archive_hash))
+                        or not self._remove_archive(conn, archive_hash)):
+                    continue
+
+                total_size -= size
+                logger.debug(
+                    f"Removed {archive_hash} from addon archive cache")
+
+
+logger = logging.getLogger("main")
@@ -0,0 +1,222 @@
+"""
+Updates the addons of several games at once, like the live and preview
+clients of LOTRO or the documents folders of different accounts. One update
+plan is made for all of the games, so each archive is only downloaded once
+no matter how many games it's installed in. The addon files of the games can
+also be de-duplicated together. See `file_store`.
+"""
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+from onelauncher.addons.engine import AddonEngine, AddonEngineError, AddonUpdate
+from onelauncher.addons.extraction import ExtractionPlan
+from onelauncher.addons.file_store import LinkResult
+from onelauncher.addons.transactions import StagingFolder
+
+
+class GameUpdateResult():
+    """Addons that were updated in a game and errors of the ones that
+       weren't
+    """
+
+    def __init__(self, documents_folder: Path) -> None:
+        self.documents_folder = documents_folder
+        self.updated: List[str] = []
+        self.errors: List[AddonEngineError] = []
+
+
+def update_games(
+        games: Iterable[Tuple[Path, str]],
+        download_workers: int = 4,
+        extract_workers: int = 2,
+        check_cancelled: Callable[[], None] = lambda: None,
+        **engine_kwargs) -> List[GameUpdateResult]:
+    """Updates every addon that has an update in each of games.
+
+    The addons cache database is shared by the games, but each game's
+    engine has its own installed addon tables. Everything that uses the
+    database runs on the calling thread. Downloads and extraction, which are
+    most of the work, run in thread pools for all of the games at once.
+
+    Args:
+        games (Iterable[Tuple[Path, str]]): Documents folder and game type
+                                            of each game. Games that share a
+                                            documents folder are only
+                                            updated once.
+        download_workers (int, optional): Archives to download at once.
+        extract_workers (int, optional): Archives to extract at once.
+        check_cancelled (Callable[[], None], optional): Called before each
+            update is applied. It can raise an exception to stop the updates.
+            Updates that were already applied are kept.
+        **engine_kwargs: Passed to `AddonEngine` for each game.
+
+    Returns:
+        List[GameUpdateResult]: Result for each documents folder in the
+                                order of games.
+    """
+    engines: List[AddonEngine] = []
+    try:
+        _open_engines(engines, games, engine_kwargs)
+        return _update_games(
+            engines, download_workers, extract_workers, check_cancelled)
+    finally:
+        for engine in engines:
+            engine.close()
+
+
+def deduplicate_games(
+        games: Iterable[Tuple[Path, str]],
+        **engine_kwargs) -> List[Tuple[Path, LinkResult]]:
+    """Links the addon files of each of games to the shared file store, so
+       files that several games have are only stored once. Stored files that
+       no game links to anymore are removed afterwards. See
+       `AddonEngine.deduplicate_addons`.
+
+    Args:
+        games (Iterable[Tuple[Path, str]]): Documents folder and game type
+                                            of each game.
+        **engine_kwargs: Passed to `AddonEngine` for each game.
+
+    Returns:
+        List[Tuple[Path, LinkResult]]: Documents folder and result for each
+                                       documents folder in the order of
+                                       games.
+    """
+    engines: List[AddonEngine] = []
+    try:
+        _open_engines(engines, games, engine_kwargs)
+        results = [(engine.data_folder, engine.deduplicate_addons())
+                   for engine in engines]
+        if engines:
+            engines[0].file_store.prune()
+        return results
+    finally:
+        for engine in engines:
+            engine.close()
+
+
+def _open_engines(
+        engines: List[AddonEngine],
+        games: Iterable[Tuple[Path, str]],
+        engine_kwargs: dict) -> None:
+    """Adds an engine for each of games to engines. Games that share a
+       documents folder only get one.
+    """
+    documents_folders: Set[Path] = set()
+    for documents_folder, game_type in games:
+        if Path(documents_folder).resolve() in documents_folders:
+            continue
+        documents_folders.add(Path(documents_folder).resolve())
+        engines.append(AddonEngine(documents_folder, game_type, **engine_kwargs))
+
+
+def _update_games(
+        engines: List[AddonEngine],
+        download_workers: int,
+        extract_workers: int,
+        check_cancelled: Callable[[], None]) -> List[GameUpdateResult]:
+    results = [GameUpdateResult(engine.data_folder) for engine in engines]
+    checked_game_types: Set[str] = set()
+    game_updates = [
+        _get_game_updates(engine, result, checked_game_types)
+        for engine, result in zip(engines, results)]
+    if not any(game_updates):
+        return results
+
+    download_executor = ThreadPoolExecutor(
+        max_workers=download_workers, thread_name_prefix="addon_download")
+    extract_executor = ThreadPoolExecutor(
+        max_workers=extract_workers, thread_name_prefix="addon_extract")
+    # Extractions of each game that haven't been applied yet
+    extractions: List[List[Tuple[AddonUpdate, Future]]] = []
+    # Every game gets the same archive for an addon version, so it's only
+    # downloaded once. All of the engines use the same archive cache.
+    # Archives stay pinned in it until the updates are done.
+    archives: Dict[Tuple[str, str], Future] = {}
+    try:
+        for update in chain.from_iterable(game_updates):
+            key = (update.interface_id, update.version)
+            if key not in archives:
+                archives[key] = download_executor.submit(
+                    engines[0].get_remote_addon_archive, update.url,
+                    update.name, update.interface_id, update.version)
+
+        # Games are queued in order, so the first game's extractions are
+        # done first while the others continue in the background.
+        for engine, updates in zip(engines, game_updates):
+            extractions.append([
+                (update, extract_executor.submit(
+                    _extract_update, engine, update,
+                    archives[(update.interface_id, update.version)]))
+                for update in updates])
+
+        for engine, result, game_extractions in zip(
+                engines, results, extractions):
+            while game_extractions:
+                check_cancelled()
+                update, extraction = game_extractions.pop(0)
+                try:
+                    extracted, plan = extraction.result()
+                    engine.apply_update(update, extracted, plan)
+                except AddonEngineError as error:
+                    logger.error(f"{engine.data_folder}: {error}")
+                    result.errors.append(error)
+                else:
+                    result.updated.append(update.name)
+
+        # Files of the old versions can have been linked to the file store
+        if any(result.updated for result in results):
+            engines[0].file_store.prune()
+    finally:
+        download_executor.shutdown(wait=True, cancel_futures=True)
+        extract_executor.shutdown(wait=True, cancel_futures=True)
+        for archive in archives.values():
+            if not archive.cancelled() and not archive.exception():
+                engines[0].archive_cache.release(archive.result())
+        # Left over if the updates were stopped part way
+        for _, extraction in chain.from_iterable(extractions):
+            if not extraction.cancelled() and not extraction.exception():
+                extraction.result()[0].remove()
+
+    return results
+
+
+def _get_game_updates(
+        engine: AddonEngine,
+        result: GameUpdateResult,
+        checked_game_types: Set[str]) -> List[AddonUpdate]:
+    """Returns updates for the addons of a game. Remote addon feeds are
+       shared by games of the same type, so they are only checked with the
+       server for the first game of each type.
+    """
+    if not engine.load_remote_addons(
+            force_check=engine.game_type not in checked_game_types):
+        logger.warning("Some remote addons couldn't be loaded")
+    checked_game_types.add(engine.game_type)
+
+    engine.load_installed_addons()
+    updates = []
+    for table_name, _, *addon, _, _ in engine.check_for_updates():
+        try:
+            updates.append(engine.get_update(table_name, addon))
+        except AddonEngineError as error:
+            logger.error(f"{engine.data_folder}: {error}")
+            result.errors.append(error)
+
+    return updates
+
+
+def _extract_update(
+        engine: AddonEngine,
+        update: AddonUpdate,
+        archive: Future) -> Tuple[StagingFolder, ExtractionPlan]:
+    """Extracts update once its archive is downloaded. Runs on an extract
+       thread.
+    """
+    return engine.extract_archive(archive.result(), update.name, update.manifest)
+
+
+logger = logging.getLogger("main")
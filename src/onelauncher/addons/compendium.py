@@ -0,0 +1,192 @@
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from xml.dom import EMPTY_NAMESPACE
+from xml.dom.minidom import Document, Element  # nosec
+
+import defusedxml.minidom
+from vkbeautify import xml as prettify_xml
+
+from onelauncher.addons.parsing import parse_files
+from onelauncher.utilities import GetText
+
+# Number of values in an addon row. This is `AddonManager.COLUMN_LIST`
+# without the ID column.
+ROW_LENGTH = 9
+
+# Root XML tag of each type of file with addon information
+ADDON_FILE_TAGS = {
+    ".plugin": "Information",
+    ".plugincompendium": "PluginConfig",
+    ".skincompendium": "SkinConfig",
+    ".musiccompendium": "MusicConfig",
+}
+
+
+def get_addon_dependencies(dependencies_node: Element) -> str:
+    dependencies = ""
+    for node in dependencies_node.childNodes:
+        if node.nodeName == "dependency":
+            dependencies = dependencies + "," + (GetText(node.childNodes))
+    return dependencies[1:]
+
+
+def parse_compendium_document(
+        doc: Document,
+        file: Path,
+        tag: str) -> List[str]:
+    """Returns list of common values for parsed compendium or .plugin file"""
+    items_row = [""] * ROW_LENGTH
+
+    nodes = doc.getElementsByTagName(tag)[0].childNodes
+    for node in nodes:
+        if node.nodeName == "Name":
+            items_row[0] = GetText(node.childNodes)
+        elif node.nodeName == "Author":
+            items_row[3] = GetText(node.childNodes)
+        elif node.nodeName == "Version":
+            items_row[2] = GetText(node.childNodes)
+        elif node.nodeName == "Id":
+            items_row[6] = GetText(node.childNodes)
+        elif node.nodeName == "Dependencies":
+            items_row[7] = get_addon_dependencies(node)
+        elif node.nodeName == "StartupScript":
+            items_row[8] = GetText(node.childNodes)
+    items_row[5] = str(file)
+
+    return items_row
+
+
+def parse_compendium_file(file: Path, tag: str) -> List[str]:
+    """Returns list of common values for compendium or .plugin files"""
+    doc = defusedxml.minidom.parse(str(file))
+    return parse_compendium_document(doc, file, tag)
+
+
+def parse_addon_file(file: Path) -> dict:
+    """Returns the data stored in the file index for a compendium or .plugin file"""
+    doc = defusedxml.minidom.parse(str(file))
+    file_data = {"row": parse_compendium_document(
+        doc, file, ADDON_FILE_TAGS[file.suffix])}
+
+    if file.suffix == ".plugincompendium":
+        file_data["descriptors"] = [
+            GetText(node.childNodes)
+            for node in doc.getElementsByTagName("Descriptors")[0].childNodes
+            if node.nodeName == "descriptor"]
+
+    return file_data
+
+
+def parse_addon_files(files: List[Path]) -> Dict[Path, dict]:
+    """Parses compendium and .plugin files. Large batches are parsed in
+       parallel. See `parsing.parse_files`.
+    """
+    return parse_files(parse_addon_file, files)
+
+
+def get_interface_info_url(download_url: str) -> str:
+    """Replaces "download" with "info" in download url to make info url
+
+    An example is: https://www.lotrointerface.com/downloads/download1078-VitalTarget
+               to: https://www.lotrointerface.com/downloads/info1078-VitalTarget
+    """
+    return download_url.replace("/downloads/download", "/downloads/info")
+
+
+def _append_text_element(
+        doc: Document,
+        parent: Element,
+        tag: str,
+        text: str) -> None:
+    node = doc.createElementNS(EMPTY_NAMESPACE, tag)
+    node.appendChild(doc.createTextNode(text))
+    parent.appendChild(node)
+
+
+def generate_compendium_file(
+        addon_root_dir: Path,
+        addon_type: str,
+        remote_row: Sequence[str],
+        existing_compendium_file: Optional[Path] = None) -> Path:
+    """Generate compendium file for addon. If there is an existing one
+       data that can only be gotten from it will be gathered and put
+       in the new file. The old one will be removed.
+
+    Args:
+        addon_root_dir (Path): Where the compendium file goes. In the case of
+                               plugins it should be the author's name. This
+                               has to be the addon root dir while it is still
+                               in a temporary directory for propper .plugin
+                               file detection.
+        addon_type (str): The type of the addon. ("Plugin", "Music", "Skin")
+        remote_row (Sequence[str]): Row of the addon in its remote table with
+                                    a value for each of
+                                    `database.ADDON_COLUMNS`.
+        existing_compendium_file (Path, optional): An existing compendium file
+                                                   to extract data from.
+                                                   Defaults to None.
+
+    Returns:
+        Path: The new compendium file.
+    """
+    dependencies = ""
+    startup_python_script = ""
+    # Get dependencies and startup_python_script from existing compendium
+    # file if present.
+    if existing_compendium_file:
+        existing_compendium_values = parse_compendium_file(
+            existing_compendium_file, f"{addon_type.title()}Config")
+        dependencies = existing_compendium_values[7]
+        startup_python_script = existing_compendium_values[8]
+        existing_compendium_file.unlink()
+
+    doc = Document()
+    main_node = doc.createElementNS(
+        EMPTY_NAMESPACE, addon_type.title() + "Config")
+    doc.appendChild(main_node)
+    _append_text_element(doc, main_node, "Id", remote_row[6])
+    _append_text_element(doc, main_node, "Name", remote_row[0])
+    _append_text_element(doc, main_node, "Version", remote_row[2])
+    _append_text_element(doc, main_node, "Author", remote_row[3])
+    _append_text_element(
+        doc, main_node, "InfoUrl", get_interface_info_url(remote_row[5]))
+    _append_text_element(doc, main_node, "DownloadUrl", remote_row[5])
+
+    if addon_type.title() == "Plugin":
+        # Add plugin's .plugin file descriptors
+        descriptors_node = doc.createElementNS(EMPTY_NAMESPACE, "Descriptors")
+        main_node.appendChild(descriptors_node)
+        for plugin_file in addon_root_dir.glob("*.plugin"):
+            _append_text_element(
+                doc, descriptors_node, "descriptor",
+                f"{addon_root_dir.name}\\{plugin_file.name}")
+
+    # Can't add dependencies, because they are defined in compendium files
+    dependencies_node = doc.createElementNS(EMPTY_NAMESPACE, "Dependencies")
+    main_node.appendChild(dependencies_node)
+    # If compendium file from add-on already existed with dependencies
+    if dependencies:
+        for dependency in dependencies.split(","):
+            _append_text_element(
+                doc, dependencies_node, "dependency", dependency)
+
+    # Can't add startup script, because it is defined in compendium files
+    startup_script_node = doc.createElementNS(
+        EMPTY_NAMESPACE, "StartupScript")
+    # If compendium file from add-on already existed with startup script
+    if startup_python_script:
+        startup_script_node.appendChild(
+            doc.createTextNode(startup_python_script))
+    main_node.appendChild(startup_script_node)
+
+    # Write compendium file
+    compendium_file = (
+        addon_root_dir / f"{remote_row[0]}.{addon_type.lower()}compendium")
+    with compendium_file.open("w+") as file:
+        file.write(prettify_xml(doc.toxml()))
+
+    return compendium_file
+
+
+logger = logging.getLogger("main")
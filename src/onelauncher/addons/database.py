@@ -0,0 +1,431 @@
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Callable, Iterable, List, Sequence
+
+from onelauncher.addons.versions import compare_versions
+
+# Size of SQLite's page cache in KiB
+CACHE_SIZE_KIB = 16 * 1024
+
+
+class SchemaVersionError(Exception):
+    """Raised when the addons cache is from a newer version of OneLauncher"""
+
+
+# Tables with one row per addon. The remote tables are the addon catalogs
+# from lotrointerface, and the installed tables are what is installed.
+# Changing these or the columns needs a migration.
+ADDON_TABLE_NAMES = [
+    "tablePluginsInstalled",
+    "tableSkinsInstalled",
+    "tableMusicInstalled",
+    "tablePlugins",
+    "tableSkins",
+    "tableMusic",
+    "tableSkinsDDO",
+    "tableSkinsDDOInstalled",
+]
+ADDON_COLUMNS = ["Name", "Category", "Version", "Author", "LatestRelease",
+                 "File", "InterfaceID", "Dependencies", "StartupScript"]
+# Tables in ADDON_TABLE_NAMES with the addons installed in a game. The
+# addons cache is shared by all games and by every OneLauncher process, so
+# these are TEMP tables of each connection. See `create_installed_tables`.
+INSTALLED_TABLE_NAMES = [
+    table for table in ADDON_TABLE_NAMES if table.endswith("Installed")]
+# Addon columns that are in the full-text search index
+FTS_COLUMNS = ["Name", "Category", "Author"]
+# Set on installed addons that have a newer version in the remote table and
+# on the remote addons with that version. Isn't part of the rows that are
+# inserted, so it starts out as 0.
+UPDATE_AVAILABLE_COLUMN = "UpdateAvailable"
+# One row per dependency of each addon. Dependencies are also kept as a
+# comma separated list in the addon tables, which is never updated.
+DEPENDENCIES_TABLE_NAME = "addon_dependencies"
+# Dependencies of the addons in the installed tables. It's a TEMP table
+# like them with the same columns as DEPENDENCIES_TABLE_NAME.
+INSTALLED_DEPENDENCIES_TABLE_NAME = "installed_addon_dependencies"
+# Files each installed remote addon got from its archive. See `manifests`.
+MANIFESTS_TABLE_NAME = "addon_manifests"
+# Metadata of loose .abc files in music folders. See `abc_files`.
+ABC_FILES_TABLE_NAME = "abc_files"
+ABC_FILES_COLUMNS = ["Title", "Transcriber", "Parts", "Instruments", "Tempo",
+                     "Duration"]
+# ABC metadata columns that are in its full-text search index
+ABC_FILES_FTS_COLUMNS = ["Title", "Transcriber", "Instruments"]
+# Parsed data of compendium and .plugin files. See `file_index`.
+FILE_INDEX_TABLE_NAME = "addon_file_index"
+# HTTP cache validators of the remote addon feeds. See `feeds.FeedCache`.
+FEED_CACHE_TABLE_NAME = "remote_feeds_cache"
+
+
+def get_fts_table_name(table_name: str) -> str:
+    """Returns name of the full-text search index for an addon table"""
+    return f"{table_name}_fts"
+
+
+def get_dependencies_table_name(table_name: str) -> str:
+    """Returns name of the table with the dependencies of an addon table"""
+    if table_name in INSTALLED_TABLE_NAMES:
+        return INSTALLED_DEPENDENCIES_TABLE_NAME
+    return DEPENDENCIES_TABLE_NAME
+
+
+def _migrate_to_addon_tables(c: sqlite3.Cursor) -> None:
+    """Creates the addon tables. Databases from before schema versions were
+       used already have them. Tables with an outdated structure are
+       replaced. The others keep their rows.
+    """
+    for table in ADDON_TABLE_NAMES:
+        existing_columns = [
+            column[1] for column in
+            c.execute(f"PRAGMA table_info({table})").fetchall()]  # nosec
+        if existing_columns and existing_columns != ADDON_COLUMNS:
+            c.execute(f"DROP TABLE {table}")  # nosec
+
+        c.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING "  # nosec
+            f"FTS5({', '.join(ADDON_COLUMNS)})")
+
+
+def _migrate_to_relational_tables(c: sqlite3.Cursor) -> None:
+    """Replaces the FTS5 addon tables with regular tables, so lookups by
+       interface ID can use an index. Text search uses an external content
+       FTS5 index of each table. Dependencies get their own table.
+
+       Updates and deletes are applied to the search index and dependencies
+       table by triggers. Inserts aren't, since indexing rows one at a time
+       in a trigger is several times slower. `insert_rows` indexes new rows
+       in bulk instead.
+    """
+    c.execute(
+        f"CREATE TABLE {DEPENDENCIES_TABLE_NAME} (AddonTable TEXT NOT NULL, "
+        "AddonID INTEGER NOT NULL, InterfaceID TEXT NOT NULL, "
+        "PRIMARY KEY (AddonTable, AddonID, InterfaceID)) WITHOUT ROWID")
+    c.execute(
+        f"CREATE INDEX {DEPENDENCIES_TABLE_NAME}_interface_id "
+        f"ON {DEPENDENCIES_TABLE_NAME} (AddonTable, InterfaceID)")
+
+    columns = ", ".join(ADDON_COLUMNS)
+    fts_columns = ", ".join(FTS_COLUMNS)
+    new_fts_values = ", ".join(f"new.{column}" for column in FTS_COLUMNS)
+    old_fts_values = ", ".join(f"old.{column}" for column in FTS_COLUMNS)
+    for table in ADDON_TABLE_NAMES:
+        fts_table = get_fts_table_name(table)
+        c.execute(f"ALTER TABLE {table} RENAME TO {table}_old")  # nosec
+        c.execute(
+            f"CREATE TABLE {table} "  # nosec
+            f"({', '.join(f'{column} TEXT' for column in ADDON_COLUMNS)})")
+        c.execute(
+            f"INSERT INTO {table} (rowid, {columns}) "  # nosec
+            f"SELECT rowid, {columns} FROM {table}_old")
+        c.execute(f"DROP TABLE {table}_old")  # nosec
+        c.execute(
+            f"CREATE INDEX {table}_interface_id ON {table} (InterfaceID)")  # nosec
+
+        c.execute(
+            f"CREATE VIRTUAL TABLE {fts_table} USING FTS5({fts_columns}, "  # nosec
+            f"content='{table}', content_rowid='rowid')")
+        c.execute(
+            f"CREATE TRIGGER {table}_delete AFTER DELETE ON {table} BEGIN "  # nosec
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {fts_columns}) "
+            f"VALUES('delete', old.rowid, {old_fts_values}); "
+            f"DELETE FROM {DEPENDENCIES_TABLE_NAME} "
+            f"WHERE AddonTable = '{table}' AND AddonID = old.rowid; END")
+        c.execute(
+            f"CREATE TRIGGER {table}_update AFTER UPDATE OF {fts_columns} "  # nosec
+            f"ON {table} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {fts_columns}) "
+            f"VALUES('delete', old.rowid, {old_fts_values}); "
+            f"INSERT INTO {fts_table}(rowid, {fts_columns}) "
+            f"VALUES(new.rowid, {new_fts_values}); END")
+
+        _index_new_rows(c, table, 0)
+
+
+def _migrate_to_update_available_column(c: sqlite3.Cursor) -> None:
+    """Adds `UPDATE_AVAILABLE_COLUMN` to the addon tables. It replaces the
+       "(Outdated) " and "(Updated) " prefixes that used to be added to
+       versions.
+    """
+    for table in ADDON_TABLE_NAMES:
+        c.execute(
+            f"ALTER TABLE {table} ADD COLUMN "  # nosec
+            f"{UPDATE_AVAILABLE_COLUMN} INTEGER NOT NULL DEFAULT 0")
+        for prefix in ("(Outdated) ", "(Updated) "):
+            c.execute(
+                f"UPDATE {table} SET {UPDATE_AVAILABLE_COLUMN} = 1, "  # nosec
+                "Version = substr(Version, ?) WHERE Version LIKE ?",
+                (len(prefix) + 1, f"{prefix}%"))
+
+
+def _migrate_to_manifests_table(c: sqlite3.Cursor) -> None:
+    """Creates the table for addon manifests. The addons cache is shared by
+       all games, so manifests are keyed by the addon type folder of the
+       game they were installed to.
+    """
+    c.execute(
+        f"CREATE TABLE {MANIFESTS_TABLE_NAME} (AddonFolder TEXT NOT NULL, "
+        "InterfaceID TEXT NOT NULL, Path TEXT NOT NULL, "
+        "Size INTEGER NOT NULL, CRC INTEGER NOT NULL, MTime INTEGER NOT NULL, "
+        "PRIMARY KEY (AddonFolder, InterfaceID, Path)) WITHOUT ROWID")
+
+
+def _migrate_to_abc_files_table(c: sqlite3.Cursor) -> None:
+    """Creates the ABC metadata table and its external content FTS5 index.
+       Rows are replaced by deleting and inserting them, so the index is
+       kept up to date by triggers. The installed music table gets an index
+       on File, which is what search results from the ABC index are joined
+       on.
+    """
+    fts_table = get_fts_table_name(ABC_FILES_TABLE_NAME)
+    fts_columns = ", ".join(ABC_FILES_FTS_COLUMNS)
+    new_fts_values = ", ".join(
+        f"new.{column}" for column in ABC_FILES_FTS_COLUMNS)
+    old_fts_values = ", ".join(
+        f"old.{column}" for column in ABC_FILES_FTS_COLUMNS)
+    c.execute(
+        f"CREATE TABLE {ABC_FILES_TABLE_NAME} (Path TEXT PRIMARY KEY, "
+        "Size INTEGER, MTime INTEGER, Inode INTEGER, Title TEXT, "
+        "Transcriber TEXT, Parts INTEGER, Instruments TEXT, Tempo INTEGER, "
+        "Duration INTEGER)")
+    c.execute(
+        f"CREATE VIRTUAL TABLE {fts_table} USING FTS5({fts_columns}, "
+        f"content='{ABC_FILES_TABLE_NAME}', content_rowid='rowid')")
+    c.execute(
+        f"CREATE TRIGGER {ABC_FILES_TABLE_NAME}_insert AFTER INSERT "
+        f"ON {ABC_FILES_TABLE_NAME} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {fts_columns}) "
+        f"VALUES(new.rowid, {new_fts_values}); END")
+    c.execute(
+        f"CREATE TRIGGER {ABC_FILES_TABLE_NAME}_delete AFTER DELETE "
+        f"ON {ABC_FILES_TABLE_NAME} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {fts_columns}) "
+        f"VALUES('delete', old.rowid, {old_fts_values}); END")
+    c.execute(
+        "CREATE INDEX tableMusicInstalled_file ON tableMusicInstalled (File)")
+
+
+def _migrate_to_file_index_table(c: sqlite3.Cursor) -> None:
+    """Creates the table of `AddonFileIndex`. It used to be created by the
+       index itself, so databases from before this version can already have
+       it.
+    """
+    c.execute(
+        f"CREATE TABLE IF NOT EXISTS {FILE_INDEX_TABLE_NAME} "
+        "(Path TEXT PRIMARY KEY, Size INTEGER, MTime INTEGER, Inode INTEGER, "
+        "Data TEXT)")
+
+
+def _migrate_to_feed_cache_table(c: sqlite3.Cursor) -> None:
+    """Creates the table of `feeds.FeedCache`. It used to be created by the
+       feed cache itself, so databases from before this version can already
+       have it.
+    """
+    c.execute(
+        f"CREATE TABLE IF NOT EXISTS {FEED_CACHE_TABLE_NAME} "
+        "(URL TEXT PRIMARY KEY, ETag TEXT, LastModified TEXT, "
+        "CheckedTime REAL)")
+
+
+def _migrate_to_temp_installed_tables(c: sqlite3.Cursor) -> None:
+    """Drops the installed addon tables and their dependencies. Every game
+       used to share them, so loading the addons of one game replaced the
+       rows other processes were showing for another. They are TEMP tables
+       of each connection now. See `create_installed_tables`.
+    """
+    for table in INSTALLED_TABLE_NAMES:
+        # Dropping a table also drops its triggers and indexes
+        c.execute(f"DROP TABLE main.{get_fts_table_name(table)}")  # nosec
+        c.execute(f"DROP TABLE main.{table}")  # nosec
+    placeholders = ",".join("?" * len(INSTALLED_TABLE_NAMES))
+    c.execute(
+        f"DELETE FROM main.{DEPENDENCIES_TABLE_NAME} "  # nosec
+        f"WHERE AddonTable IN ({placeholders})", INSTALLED_TABLE_NAMES)
+
+
+# Schema changes in order. Each one brings the database from the version
+# that is its index to the next one. Released migrations should never be
+# changed. Add a new migration instead.
+MIGRATIONS: List[Callable[[sqlite3.Cursor], None]] = [
+    _migrate_to_addon_tables,
+    _migrate_to_relational_tables,
+    _migrate_to_update_available_column,
+    _migrate_to_manifests_table,
+    _migrate_to_abc_files_table,
+    _migrate_to_file_index_table,
+    _migrate_to_feed_cache_table,
+    _migrate_to_temp_installed_tables,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> None:
+    """Brings the addons cache up to `SCHEMA_VERSION`. Each migration is
+       committed along with its version number, so an interrupted upgrade
+       continues where it left off. The installed addon tables of conn are
+       created afterwards, since they aren't part of the database file.
+
+    Raises:
+        SchemaVersionError: The database has a newer schema than this version
+                            of OneLauncher knows about.
+    """
+    version = get_schema_version(conn)
+    if version > SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"Addons cache schema version {version} is newer than "
+            f"{SCHEMA_VERSION}")
+
+    c = conn.cursor()
+    for version, migration in enumerate(MIGRATIONS[version:], start=version):
+        logger.info(f"Migrating addons cache to schema version {version + 1}")
+        with conn:
+            # DDL statements don't start a transaction on their own
+            c.execute("BEGIN")
+            migration(c)
+            # PRAGMA doesn't support parameters
+            c.execute(f"PRAGMA user_version = {version + 1:d}")
+
+    create_installed_tables(conn)
+
+
+def create_installed_tables(conn: sqlite3.Connection) -> None:
+    """Creates the installed addon tables as TEMP tables of conn, along with
+       their search indexes, triggers, and dependencies table. They work
+       like the tables from `_migrate_to_relational_tables`, but only conn
+       sees their rows. Loading the addons of a game into them never
+       replaces the rows of another game or process, so the addons of each
+       connection's game have to be loaded after it's opened.
+    """
+    c = conn.cursor()
+    c.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS "
+        f"{INSTALLED_DEPENDENCIES_TABLE_NAME} (AddonTable TEXT NOT NULL, "
+        "AddonID INTEGER NOT NULL, InterfaceID TEXT NOT NULL, "
+        "PRIMARY KEY (AddonTable, AddonID, InterfaceID)) WITHOUT ROWID")
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS "
+        f"temp.{INSTALLED_DEPENDENCIES_TABLE_NAME}_interface_id "
+        f"ON {INSTALLED_DEPENDENCIES_TABLE_NAME} (AddonTable, InterfaceID)")
+
+    columns = ", ".join(f"{column} TEXT" for column in ADDON_COLUMNS)
+    fts_columns = ", ".join(FTS_COLUMNS)
+    new_fts_values = ", ".join(f"new.{column}" for column in FTS_COLUMNS)
+    old_fts_values = ", ".join(f"old.{column}" for column in FTS_COLUMNS)
+    for table in INSTALLED_TABLE_NAMES:
+        fts_table = get_fts_table_name(table)
+        c.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {table} ({columns}, "  # nosec
+            f"{UPDATE_AVAILABLE_COLUMN} INTEGER NOT NULL DEFAULT 0)")
+        c.execute(
+            f"CREATE INDEX IF NOT EXISTS temp.{table}_interface_id "  # nosec
+            f"ON {table} (InterfaceID)")
+        # Search results from the ABC index are joined on File
+        c.execute(
+            f"CREATE INDEX IF NOT EXISTS temp.{table}_file "  # nosec
+            f"ON {table} (File)")
+
+        c.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS temp.{fts_table} "  # nosec
+            f"USING FTS5({fts_columns}, content='{table}', "
+            "content_rowid='rowid')")
+        c.execute(
+            f"CREATE TEMP TRIGGER IF NOT EXISTS {table}_delete "  # nosec
+            f"AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {fts_columns}) "
+            f"VALUES('delete', old.rowid, {old_fts_values}); "
+            f"DELETE FROM {INSTALLED_DEPENDENCIES_TABLE_NAME} "
+            f"WHERE AddonTable = '{table}' AND AddonID = old.rowid; END")
+        c.execute(
+            f"CREATE TEMP TRIGGER IF NOT EXISTS {table}_update "  # nosec
+            f"AFTER UPDATE OF {fts_columns} ON {table} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {fts_columns}) "
+            f"VALUES('delete', old.rowid, {old_fts_values}); "
+            f"INSERT INTO {fts_table}(rowid, {fts_columns}) "
+            f"VALUES(new.rowid, {new_fts_values}); END")
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """Opens the addons cache database at path. The connection is set up for
+       writing many rows at once.
+    """
+    conn = sqlite3.connect(str(path))
+    # Commits are appended to the write-ahead log instead of rewriting
+    # pages of the database, and readers aren't blocked by writes.
+    conn.execute("PRAGMA journal_mode = WAL")
+    # Still safe from corruption in WAL mode. Only the last commits before a
+    # power loss can be lost, which is fine for a cache.
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    add_version_functions(conn)
+    return conn
+
+
+def add_version_functions(conn: sqlite3.Connection) -> None:
+    """Adds `versions.compare_versions` to conn as the `compare_versions`
+       SQL function and the `VERSION` collation
+    """
+    conn.create_function(
+        "compare_versions", 2, compare_versions, deterministic=True)
+    conn.create_collation("VERSION", compare_versions)
+
+
+def _index_new_rows(
+        c: sqlite3.Cursor,
+        table_name: str,
+        after_rowid: int,
+        dependencies_table_name: str = DEPENDENCIES_TABLE_NAME) -> None:
+    """Adds rows of table_name after after_rowid to its search index and to
+       dependencies_table_name. Dependencies are found by splitting the
+       comma separated `Dependencies` column.
+    """
+    fts_columns = ", ".join(FTS_COLUMNS)
+    c.execute(
+        f"INSERT INTO {get_fts_table_name(table_name)}"  # nosec
+        f"(rowid, {fts_columns}) SELECT rowid, {fts_columns} "
+        f"FROM {table_name} WHERE rowid > ?",
+        (after_rowid,))
+    c.execute(
+        f"INSERT OR IGNORE INTO {dependencies_table_name} "  # nosec
+        "WITH RECURSIVE split(AddonID, InterfaceID, Rest) AS ("
+        f"SELECT rowid, '', Dependencies || ',' FROM {table_name} "
+        "WHERE rowid > ? AND Dependencies != '' "
+        "UNION ALL SELECT AddonID, substr(Rest, 1, instr(Rest, ',') - 1), "
+        "substr(Rest, instr(Rest, ',') + 1) FROM split WHERE Rest != '') "
+        "SELECT ?, AddonID, InterfaceID FROM split WHERE InterfaceID != ''",
+        (after_rowid, table_name))
+
+
+def insert_rows(
+        cursor: sqlite3.Cursor,
+        table_name: str,
+        rows: Iterable[Sequence[str]]) -> None:
+    """Inserts addon rows into table_name with a single `executemany`. This
+       is the only way rows should be added, since it's also what adds them
+       to the search index and dependencies table. It doesn't commit, so
+       callers should wrap a whole batch of changes in one transaction.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor for the addons cache database.
+        table_name (str): Addon table to insert into.
+        rows (Iterable[Sequence[str]]): Rows with a value for each of
+                                        `ADDON_COLUMNS`. They are consumed
+                                        lazily.
+    """
+    last_rowid = cursor.execute(
+        f"SELECT MAX(rowid) FROM {table_name}").fetchone()[0] or 0  # nosec
+    placeholders = ",".join("?" * len(ADDON_COLUMNS))
+    cursor.executemany(
+        f"INSERT INTO {table_name} ({', '.join(ADDON_COLUMNS)}) "  # nosec
+        f"VALUES({placeholders})", rows)
+    _index_new_rows(
+        cursor, table_name, last_rowid,
+        get_dependencies_table_name(table_name))
+
+
+logger = logging.getLogger("main")
@@ -0,0 +1,259 @@
+import logging
+import sqlite3
+from typing import Collection, Dict, Iterable, List, Set
+
+from onelauncher.addons.database import get_dependencies_table_name
+
+# 0 is the arbitrary ID for Turbine Utilities. 1064 is the ID of
+# OneLauncher's upload of the utilities on LotroInterface.
+TURBINE_UTILITIES_ID = "0"
+TURBINE_UTILITIES_REMOTE_ID = "1064"
+
+
+class DependencyCycleError(Exception):
+    """Raised when addons depend on each other, so none of them can be
+       installed first
+    """
+
+    def __init__(self, interface_ids: Collection[str]) -> None:
+        self.interface_ids = sorted(interface_ids)
+        super().__init__(
+            f"Addons {', '.join(self.interface_ids)} depend on each other")
+
+
+def get_remote_interface_id(interface_id: str) -> str:
+    """Returns ID an addon has in the remote addon tables"""
+    if interface_id == TURBINE_UTILITIES_ID:
+        return TURBINE_UTILITIES_REMOTE_ID
+    return interface_id
+
+
+def _get_remote_interface_id_sql(column: str) -> str:
+    """Returns SQL expression for `get_remote_interface_id` of column"""
+    return (f"CASE {column} WHEN '{TURBINE_UTILITIES_ID}' "
+            f"THEN '{TURBINE_UTILITIES_REMOTE_ID}' ELSE {column} END")
+
+
+def _get_lookup_interface_ids(interface_ids: Iterable[str]) -> Set[str]:
+    """Returns interface_ids with every ID they can be stored as"""
+    lookup_interface_ids = set(interface_ids)
+    if lookup_interface_ids & {TURBINE_UTILITIES_ID, TURBINE_UTILITIES_REMOTE_ID}:
+        lookup_interface_ids.update(
+            (TURBINE_UTILITIES_ID, TURBINE_UTILITIES_REMOTE_ID))
+    return lookup_interface_ids
+
+
+def get_dependency_graph(
+        cursor: sqlite3.Cursor,
+        table_name: str,
+        interface_ids: Iterable[str]) -> Dict[str, Set[str]]:
+    """Returns dependencies of the addons with interface_ids and of all their
+       dependencies in table_name. The whole graph is found with one
+       recursive query, so shared dependencies are only looked up once.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor for the addons cache database.
+        table_name (str): Remote addon table to look the addons up in.
+        interface_ids (Iterable[str]): Addons to start from.
+
+    Returns:
+        Dict[str, Set[str]]: Interface IDs of the direct dependencies of each
+                             addon in the graph. Addons that aren't in
+                             table_name have no dependencies.
+    """
+    interface_ids = {
+        get_remote_interface_id(interface_id) for interface_id in interface_ids}
+    graph: Dict[str, Set[str]] = {
+        interface_id: set() for interface_id in interface_ids}
+    if not interface_ids:
+        return graph
+
+    dependencies_table = get_dependencies_table_name(table_name)
+    remote_dependency_id = _get_remote_interface_id_sql(
+        f"{dependencies_table}.InterfaceID")
+    placeholders = ",".join("?" * len(interface_ids))
+    # UNION drops edges that were already found, which stops the recursion
+    # on dependency cycles.
+    for interface_id, dependency in cursor.execute(
+            "WITH RECURSIVE edges(InterfaceID, DependencyID) AS ("  # nosec
+            f"SELECT {table_name}.InterfaceID, {remote_dependency_id} "
+            f"FROM {table_name} JOIN {dependencies_table} "
+            f"ON AddonTable = '{table_name}' AND AddonID = {table_name}.rowid "
+            f"WHERE {table_name}.InterfaceID IN ({placeholders}) "
+            f"UNION SELECT {table_name}.InterfaceID, {remote_dependency_id} "
+            f"FROM edges JOIN {table_name} "
+            f"ON {table_name}.InterfaceID = edges.DependencyID "
+            f"JOIN {dependencies_table} "
+            f"ON AddonTable = '{table_name}' AND AddonID = {table_name}.rowid) "
+            "SELECT InterfaceID, DependencyID FROM edges",
+            tuple(interface_ids)):
+        graph.setdefault(interface_id, set()).add(dependency)
+        graph.setdefault(dependency, set())
+
+    # An addon never needs itself
+    for interface_id, dependencies in graph.items():
+        dependencies.discard(interface_id)
+    return graph
+
+
+def get_cycle(graph: Dict[str, Set[str]]) -> Set[str]:
+    """Returns addons in graph that are part of a dependency cycle. Addons
+       that only depend on a cycle are left out.
+    """
+    cycle = set(graph)
+    while True:
+        needed = set().union(*(graph[interface_id] for interface_id in cycle))
+        if needed >= cycle:
+            return cycle
+        cycle &= needed
+
+
+def get_install_plan(
+        graph: Dict[str, Set[str]],
+        interface_ids: Iterable[str],
+        installed_interface_ids: Collection[str]) -> List[List[str]]:
+    """Returns the order to install addons and their dependencies in.
+
+    Args:
+        graph (Dict[str, Set[str]]): Dependencies of each addon. See
+                                     `get_dependency_graph`.
+        interface_ids (Iterable[str]): Addons to install.
+        installed_interface_ids (Collection[str]): Addons that are already
+                                                   installed. They and the
+                                                   dependencies only they
+                                                   need are left out.
+
+    Raises:
+        DependencyCycleError: Some of the addons to install depend on each
+                              other.
+
+    Returns:
+        List[List[str]]: Levels of interface IDs. The addons in a level only
+                         depend on addons in earlier levels, so each level
+                         can be installed in parallel once the ones before
+                         it are done. Every addon is only in the plan once.
+    """
+    installed_interface_ids = {
+        get_remote_interface_id(interface_id)
+        for interface_id in installed_interface_ids}
+
+    # Addons that are needed. Dependencies of installed addons aren't
+    # followed, since they were already dealt with when it was installed.
+    dependencies: Dict[str, Set[str]] = {}
+    pending = [get_remote_interface_id(interface_id)
+               for interface_id in interface_ids]
+    while pending:
+        interface_id = pending.pop()
+        if (interface_id in dependencies or
+                interface_id in installed_interface_ids):
+            continue
+
+        dependencies[interface_id] = {
+            dependency for dependency in graph.get(interface_id, ())
+            if dependency not in installed_interface_ids}
+        pending.extend(dependencies[interface_id])
+
+    plan = []
+    while dependencies:
+        level = sorted(
+            interface_id for interface_id, interface_dependencies in
+            dependencies.items() if not interface_dependencies)
+        if not level:
+            raise DependencyCycleError(get_cycle(dependencies))
+
+        plan.append(level)
+        for interface_id in level:
+            del dependencies[interface_id]
+        for interface_dependencies in dependencies.values():
+            interface_dependencies.difference_update(level)
+
+    return plan
+
+
+def get_dependents(
+        cursor: sqlite3.Cursor,
+        table_name: str,
+        interface_ids: Iterable[str]) -> Dict[str, List[str]]:
+    """Returns names of the addons in table_name that depend on any of
+       interface_ids, with a single lookup in the dependencies index. Addons
+       in interface_ids aren't counted, since they are removed together.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor for the addons cache database.
+        table_name (str): Installed addon table.
+        interface_ids (Iterable[str]): Addons that are being removed.
+
+    Returns:
+        Dict[str, List[str]]: Names of the dependents of each addon in
+                              interface_ids that has any. Keys are the
+                              IDs from `get_remote_interface_id`.
+    """
+    lookup_interface_ids = _get_lookup_interface_ids(interface_ids)
+    placeholders = ",".join("?" * len(lookup_interface_ids))
+    dependencies_table = get_dependencies_table_name(table_name)
+    dependency_id = _get_remote_interface_id_sql(
+        f"{dependencies_table}.InterfaceID")
+    dependents: Dict[str, List[str]] = {}
+    for interface_id, name in cursor.execute(
+            f"SELECT {dependency_id}, Name "  # nosec
+            f"FROM {dependencies_table} JOIN {table_name} "
+            f"ON {table_name}.rowid = AddonID WHERE AddonTable = ? "
+            f"AND {dependencies_table}.InterfaceID IN ({placeholders}) "
+            f"AND {table_name}.InterfaceID NOT IN ({placeholders}) "
+            f"ORDER BY {table_name}.rowid",
+            (table_name, *lookup_interface_ids, *lookup_interface_ids)):
+        dependents.setdefault(interface_id, []).append(name)
+    return dependents
+
+
+def get_orphaned_dependencies(
+        cursor: sqlite3.Cursor,
+        table_name: str,
+        remote_table_name: str) -> List[tuple]:
+    """Returns installed addons that are dependencies of other addons, but
+       aren't needed by any installed addon. Dependencies that are only
+       needed by other orphaned dependencies are included.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor for the addons cache database.
+        table_name (str): Installed addon table.
+        remote_table_name (str): Remote table for the same addon type. Addons
+                                 that something there depends on are known to
+                                 be dependencies, even if nothing installed
+                                 depends on them.
+
+    Returns:
+        List[tuple]: InterfaceID, File, and Name of each orphaned dependency.
+    """
+    dependencies_table = get_dependencies_table_name(table_name)
+    remote_dependencies_table = get_dependencies_table_name(remote_table_name)
+    dependency_id = _get_remote_interface_id_sql(
+        f"{dependencies_table}.InterfaceID")
+    remote_dependency_id = _get_remote_interface_id_sql(
+        f"{remote_dependencies_table}.InterfaceID")
+    addon_id = _get_remote_interface_id_sql(f"{table_name}.InterfaceID")
+    orphans: Dict[int, tuple] = {}
+    while True:
+        placeholders = ",".join("?" * len(orphans))
+        rows = cursor.execute(
+            f"SELECT rowid, InterfaceID, File, Name FROM {table_name} "  # nosec
+            f"WHERE InterfaceID != '' AND {addon_id} IN "
+            f"(SELECT {dependency_id} FROM {dependencies_table} "
+            "WHERE AddonTable = ? "
+            f"UNION ALL SELECT {remote_dependency_id} "
+            f"FROM {remote_dependencies_table} WHERE AddonTable = ?) "
+            f"AND {addon_id} NOT IN (SELECT {dependency_id} "
+            f"FROM {dependencies_table} WHERE AddonTable = ? "
+            f"AND AddonID NOT IN ({placeholders})) "
+            f"AND rowid NOT IN ({placeholders}) ORDER BY rowid",
+            (table_name, remote_table_name, table_name,
+             *orphans, *orphans)).fetchall()
+        if not rows:
+            return list(orphans.values())
+
+        # Dependencies of the orphans can be orphaned too
+        for rowid, *addon in rows:
+            orphans[rowid] = tuple(addon)
+
+
+logger = logging.getLogger("main")
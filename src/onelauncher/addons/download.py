@@ -0,0 +1,244 @@
+import hashlib
+import json
+import logging
+import urllib.error
+import urllib.request
+from http.client import HTTPException
+from pathlib import Path
+from shutil import move
+from time import monotonic, sleep
+from typing import Callable, Optional, Tuple
+
+from onelauncher.addons.file_locks import FileLock
+
+# Bytes read from the connection at a time
+CHUNK_SIZE = 64 * 1024
+# Minimum seconds between progress callbacks
+PROGRESS_INTERVAL = 0.1
+# How many times a download is attempted before giving up. Attempts after
+# the first resume from where the last one stopped.
+MAX_ATTEMPTS = 3
+# Seconds to wait for the server to respond
+TIMEOUT = 30
+# Seconds between checks of whether another download of a file is done
+LOCK_CHECK_INTERVAL = 0.1
+
+# Called with the number of bytes downloaded so far, the total size if
+# known, and the current throughput in bytes per second. It can raise an
+# exception to stop the download. The partial file is kept in that case.
+ProgressCallback = Callable[[int, Optional[int], float], None]
+
+
+class DownloadError(Exception):
+    """Raised when a download doesn't have the size the server said it would"""
+
+
+def format_size(size: float) -> str:
+    """Returns human readable size for number of bytes. Ex. "1.5 MB" """
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def get_partial_download_path(url: str, downloads_dir: Path) -> Path:
+    """Returns where the partially downloaded file for url is kept"""
+    url_hash = hashlib.sha1(url.encode(), usedforsecurity=False).hexdigest()
+    return downloads_dir / f"{url_hash}.part"
+
+
+def acquire_download_lock(
+        url: str,
+        downloads_dir: Path,
+        check_cancelled: Callable[[], None] = lambda: None) -> FileLock:
+    """Returns the held lock of the partial download of url. It has to be
+       held while `download_file` downloads url, since downloads of the same
+       url share a partial file. This includes downloads in other processes.
+       Whatever was waiting for the lock should check if the file it wants
+       was already downloaded once it gets the lock.
+
+    Args:
+        url (str): URL that will be downloaded.
+        downloads_dir (Path): Folder for partial downloads.
+        check_cancelled (Callable[[], None], optional): Called while waiting
+            for another download. It can raise an exception to stop waiting.
+    """
+    downloads_dir.mkdir(parents=True, exist_ok=True)
+    lock = FileLock(
+        get_partial_download_path(url, downloads_dir).with_suffix(".lock"))
+    if not lock.acquire(blocking=False):
+        logger.info(f"Waiting for another download of {url}")
+        while not lock.acquire(blocking=False):
+            check_cancelled()
+            sleep(LOCK_CHECK_INTERVAL)
+    return lock
+
+
+def _get_validators_path(partial_path: Path) -> Path:
+    return partial_path.with_suffix(".json")
+
+
+def _get_resume_request(
+        url: str,
+        partial_path: Path,
+        partial_size: int) -> urllib.request.Request:
+    """Returns request for the rest of the file at url. If-Range makes the
+       server send the whole file instead, if it has changed since the
+       partial file was started.
+    """
+    request = urllib.request.Request(url)
+    if not partial_size:
+        return request
+
+    try:
+        validators = json.loads(
+            _get_validators_path(partial_path).read_text())
+    except (OSError, ValueError):
+        validators = {}
+    # Resuming without a validator could mix two versions of the file.
+    # Weak ETags can't be used for If-Range.
+    etag = validators.get("ETag")
+    if etag and etag.startswith("W/"):
+        etag = None
+    validator = etag or validators.get("Last-Modified")
+    if validator:
+        request.add_header("Range", f"bytes={partial_size}-")
+        request.add_header("If-Range", validator)
+
+    return request
+
+
+def _get_range_start_and_total(content_range: str) -> Tuple[int, Optional[int]]:
+    """Parses a `Content-Range: bytes start-end/total` header"""
+    byte_range, _, total = content_range.partition(" ")[2].partition("/")
+    return (int(byte_range.split("-")[0]),
+            None if total in ("", "*") else int(total))
+
+
+def _download_attempt(
+        url: str,
+        partial_path: Path,
+        progress_callback: Optional[ProgressCallback]) -> Optional[int]:
+    """Downloads as much of url to partial_path as possible
+
+    Returns:
+        Optional[int]: Total size of the file, if the server sent it.
+    """
+    partial_size = partial_path.stat().st_size if partial_path.exists() else 0
+    request = _get_resume_request(url, partial_path, partial_size)
+    try:
+        response = urllib.request.urlopen(request, timeout=TIMEOUT)  # nosec
+    except urllib.error.HTTPError as error:
+        # The partial file is already complete, or it is for a file
+        # that has changed size.
+        if error.code == 416:
+            partial_path.unlink()
+            return _download_attempt(url, partial_path, progress_callback)
+        raise
+
+    with response:
+        content_length = response.headers.get("Content-Length")
+        if response.status == 206:
+            start, total_size = _get_range_start_and_total(
+                response.headers.get("Content-Range", ""))
+            if start != partial_size:
+                partial_path.unlink()
+                raise DownloadError(
+                    f"Server resumed {url} at byte {start} instead of "
+                    f"{partial_size}")
+        else:
+            start = 0
+            total_size = int(content_length) if content_length else None
+            _get_validators_path(partial_path).write_text(json.dumps({
+                "ETag": response.headers.get("ETag"),
+                "Last-Modified": response.headers.get("Last-Modified")}))
+
+        with partial_path.open("r+b" if start else "wb") as file:
+            file.seek(start)
+            file.truncate()
+            downloaded_size = start
+            start_time = monotonic()
+            # Progress is reported for the first chunk right away
+            last_progress_time = start_time - PROGRESS_INTERVAL
+            while True:
+                chunk = response.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                file.write(chunk)
+                downloaded_size += len(chunk)
+
+                now = monotonic()
+                if progress_callback and now - last_progress_time >= PROGRESS_INTERVAL:
+                    last_progress_time = now
+                    progress_callback(
+                        downloaded_size,
+                        total_size,
+                        (downloaded_size - start) / (now - start_time))
+
+    if progress_callback:
+        elapsed_time = monotonic() - start_time
+        progress_callback(
+            downloaded_size,
+            total_size,
+            (downloaded_size - start) / elapsed_time if elapsed_time else 0.0)
+
+    return total_size
+
+
+def download_file(
+        url: str,
+        path: Path,
+        downloads_dir: Path,
+        progress_callback: Optional[ProgressCallback] = None) -> None:
+    """Downloads url to path. The download is written to a partial file in
+       downloads_dir first, so an interrupted download can be resumed with
+       an HTTP range request instead of starting over. This includes
+       downloads interrupted in a previous session. The lock from
+       `acquire_download_lock` has to be held if url could be downloaded
+       more than once at a time.
+
+    Args:
+        url (str): HTTP(S) URL to download.
+        path (Path): Where to put the finished download.
+        downloads_dir (Path): Folder for partial downloads.
+        progress_callback (Optional[ProgressCallback], optional): Called with
+            the progress of the download. Defaults to None.
+
+    Raises:
+        DownloadError: The finished download doesn't have the expected size.
+        urllib.error.URLError: The download failed on every attempt.
+    """
+    downloads_dir.mkdir(parents=True, exist_ok=True)
+    partial_path = get_partial_download_path(url, downloads_dir)
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            total_size = _download_attempt(
+                url, partial_path, progress_callback)
+        except (OSError, HTTPException) as error:
+            # HTTP errors aren't from the connection dropping
+            if (attempt == MAX_ATTEMPTS or
+                    isinstance(error, urllib.error.HTTPError)):
+                raise
+            logger.warning(
+                f"Download of {url} was interrupted. Resuming.", exc_info=True)
+            continue
+
+        downloaded_size = partial_path.stat().st_size
+        if total_size is None or downloaded_size == total_size:
+            break
+        # Connection was closed early. The partial file is only thrown
+        # away if it can't be the start of the right file.
+        if downloaded_size > total_size or attempt == MAX_ATTEMPTS:
+            if downloaded_size > total_size:
+                partial_path.unlink()
+            raise DownloadError(
+                f"Download of {url} is {downloaded_size} bytes, but should be "
+                f"{total_size} bytes")
+
+    move(str(partial_path), str(path))
+    _get_validators_path(partial_path).unlink(missing_ok=True)
+
+
+logger = logging.getLogger("main")
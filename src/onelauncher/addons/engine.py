@@ -0,0 +1,1174 @@
+import logging
+import os
+import urllib.error
+import urllib.request
+import zipfile
+from contextlib import contextmanager
+from functools import partial
+from http.client import HTTPException
+from pathlib import Path, PurePosixPath
+from shutil import copy
+from tempfile import TemporaryDirectory
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import ParseError  # nosec
+
+import defusedxml.minidom
+
+from onelauncher.addons import (
+    abc_files, compendium, database, dependencies, download, extraction,
+    feeds, manifests, search, transactions, updates)
+from onelauncher.addons.archive_cache import AddonArchiveCache
+from onelauncher.addons.file_index import AddonFileIndex
+from onelauncher.addons.file_store import (
+    AddonFileStore, LinkResult, get_linkable_files)
+from onelauncher.config import platform_dirs
+from onelauncher.utilities import CaseInsensitiveAbsolutePath, GetText
+
+# Installed addon table for each addon type of each game type. DDO's skins
+# are kept in their own tables in the same database.
+INSTALLED_TABLE_NAMES = {
+    "LOTRO": {
+        "Plugin": "tablePluginsInstalled",
+        "Skin": "tableSkinsInstalled",
+        "Music": "tableMusicInstalled",
+    },
+    "DDO": {"Skin": "tableSkinsDDOInstalled"},
+}
+# Prefix of the names of installed addons in the remote tables
+INSTALLED_NAME_PREFIX = "(Installed) "
+
+
+class AddonEngineError(Exception):
+    """Raised when an addon can't be installed, updated, or uninstalled"""
+
+
+class AddonUpdate():
+    """Update of an installed addon to the latest version in its remote
+       table. See `AddonEngine.get_update`.
+    """
+
+    def __init__(
+            self,
+            addon_type: str,
+            addon,
+            remote_row: List[str],
+            manifest: Optional[manifests.AddonManifest]) -> None:
+        self.addon_type = addon_type
+        # InterfaceID, File, and Name of the installed addon
+        self.addon = addon
+        self.interface_id = addon[0]
+        self.name = remote_row[0]
+        self.version = remote_row[2]
+        self.url = remote_row[5]
+        # Addons without a manifest are reinstalled instead of being
+        # updated in place
+        self.manifest = manifest
+
+
+class AddonEngine():
+    """
+    Installs, updates, and uninstalls the addons of a game without Qt. It
+    uses the same addons cache database, archive cache, and addon folder
+    layout as `AddonManager`. Only one process can have the addons of a game
+    open at a time. See `transactions.StagingDirLock`.
+
+    Everything runs on the calling thread, except for `extract_archive`
+    and `get_remote_addon_archive`, which don't use the database and can be
+    called from other threads. Each install, update, or uninstall is made
+    in a `transactions.AddonTransaction` that is committed along with the
+    database, so a failure leaves both the way they were.
+    """
+    # Feed of each remote addon table
+    FEED_URLS = {
+        "tablePlugins": feeds.PLUGINS_FEED_URL,
+        "tableSkins": feeds.SKINS_FEED_URL,
+        "tableMusic": feeds.MUSIC_FEED_URL,
+        "tableSkinsDDO": feeds.SKINS_DDO_FEED_URL,
+    }
+    # Seconds to wait for a remote addons feed server to respond
+    FEED_TIMEOUT = 30
+
+    def __init__(
+            self,
+            documents_folder: Path,
+            game_type: str = "LOTRO",
+            cache_dir: Optional[Path] = None,
+            remote_addons_cache_ttl: float = 600,
+            archive_cache_size: int = 1024 * 1024 * 1024,
+            link_files: bool = False) -> None:
+        """
+        Args:
+            documents_folder (Path): Documents folder of the game. The addon
+                                     folders are in it.
+            game_type (str, optional): "LOTRO" or "DDO". Defaults to "LOTRO".
+            cache_dir (Optional[Path], optional): Folder with the addons
+                                                  cache database and archive
+                                                  cache. Defaults to
+                                                  OneLauncher's cache folder.
+            remote_addons_cache_ttl (float, optional): Seconds before cached
+                                                       feeds are checked with
+                                                       the server again.
+            archive_cache_size (int, optional): Maximum bytes of addon
+                                                archives to keep cached.
+            link_files (bool, optional): Link the files of addons that are
+                                         installed to the shared file store,
+                                         so files that other games have too
+                                         are only stored once. See
+                                         `file_store`. Defaults to False.
+
+        Raises:
+            AddonEngineError: Another process has the game's addons open.
+        """
+        self.game_type = game_type
+        self.installed_table_names = INSTALLED_TABLE_NAMES[game_type]
+        self.remote_addons_cache_ttl = remote_addons_cache_ttl
+        self.link_files = link_files
+
+        self.data_folder = CaseInsensitiveAbsolutePath(
+            Path(documents_folder).absolute())
+        self.addon_folders = {
+            "Plugin": self.data_folder / "Plugins",
+            "Skin": self.data_folder / "ui/skins",
+            "Music": self.data_folder / "Music",
+        }
+        self.addon_folders = {
+            addon_type: folder for addon_type, folder in
+            self.addon_folders.items()
+            if addon_type in self.installed_table_names}
+        # Same as the addon manager's, so unfinished transactions from
+        # either are rolled back.
+        self.staging_dir = self.data_folder / ".onelauncher_staging"
+        self.staging_dir_lock = transactions.StagingDirLock(self.staging_dir)
+        if not self.staging_dir_lock.acquire():
+            raise AddonEngineError(
+                f"The addons of {self.data_folder} are being changed by "
+                "another OneLauncher process")
+
+        try:
+            transactions.recover_transactions(self.staging_dir)
+
+            cache_dir = cache_dir or platform_dirs.user_cache_path
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            self.downloads_dir = cache_dir / "addon_downloads"
+            self.archive_cache = AddonArchiveCache(
+                cache_dir / "addon_archives", archive_cache_size)
+            # Shared by all games
+            self.file_store = AddonFileStore(cache_dir / "addon_store")
+            self.open_database(cache_dir / "addons_cache.sqlite")
+        except BaseException:
+            self.staging_dir_lock.release()
+            raise
+
+    def open_database(self, path: Path) -> None:
+        """Opens the addons cache database and migrates it to the current
+           schema version. It's replaced if it's from a newer version of
+           OneLauncher, since it's only a cache.
+        """
+        self.conn = database.connect(path)
+        try:
+            database.migrate(self.conn)
+        except database.SchemaVersionError:
+            logger.warning("Replacing addons cache from newer OneLauncher")
+            self.conn.close()
+            path.unlink()
+            self.conn = database.connect(path)
+            database.migrate(self.conn)
+
+        self.c = self.conn.cursor()
+        self.file_index = AddonFileIndex(self.c)
+        self.abc_index = abc_files.AbcIndex(self.c)
+        self.feed_cache = feeds.FeedCache(self.c)
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+        self.staging_dir_lock.release()
+
+    def get_remote_table_name(self, addon_type: str) -> str:
+        return updates.get_remote_table_name(
+            self.installed_table_names[addon_type])
+
+    def get_addon_type(self, table_name: str) -> str:
+        """Returns addon type of an installed or remote table"""
+        for addon_type, installed_table_name in (
+                self.installed_table_names.items()):
+            if table_name in (installed_table_name,
+                              updates.get_remote_table_name(
+                                  installed_table_name)):
+                return addon_type
+
+        raise IndexError(f"{table_name} isn't an addon table for "
+                         f"{self.game_type}")
+
+    def search(self, table_name: str, text: str = "") -> List[tuple]:
+        """Returns rows of an addon table that match text. See
+           `search.search_table`.
+        """
+        return search.search_table(self.c, table_name, text)
+
+    def find_addons(
+            self,
+            table_names: Iterable[str],
+            queries: Iterable[str]) -> List[Tuple[str, tuple]]:
+        """Returns the first addon in table_names for each query. Queries
+           are matched against interface IDs and, ignoring case, names.
+
+        Raises:
+            AddonEngineError: A query didn't match any addon.
+
+        Returns:
+            List[Tuple[str, tuple]]: Table name and InterfaceID, File, and
+                                     Name of each addon.
+        """
+        table_names = list(table_names)
+        addons = []
+        for query in queries:
+            for table_name in table_names:
+                row = self.c.execute(
+                    "SELECT InterfaceID, File, Name FROM "  # nosec
+                    f"{table_name} WHERE (InterfaceID != '' AND "
+                    "InterfaceID = ?1) OR lower(Name) = lower(?1) OR "
+                    "lower(Name) = lower(?2 || ?1) ORDER BY rowid LIMIT 1",
+                    (query, INSTALLED_NAME_PREFIX)).fetchone()
+                if row:
+                    addons.append((table_name, (
+                        row[0], row[1], self._strip_installed_prefix(row[2]))))
+                    break
+            else:
+                raise AddonEngineError(f"No addon matches {query}")
+
+        return addons
+
+    def load_installed_addons(self) -> None:
+        """Scans the addon folders and replaces the installed addon tables
+           with what was found. Only files that changed since they were last
+           indexed are parsed. The installed tables are only seen by this
+           engine's connection. See `database.create_installed_tables`.
+        """
+        with self.conn:
+            for addon_type, table_name in self.installed_table_names.items():
+                self.addon_folders[addon_type].mkdir(
+                    parents=True, exist_ok=True)
+                self.c.execute(f"DELETE FROM {table_name}")  # nosec
+                database.insert_rows(
+                    self.c, table_name, self._get_installed_rows(addon_type))
+                self._mark_installed_remote_addons(addon_type)
+
+    def load_remote_addons(self, force_check: bool = False) -> bool:
+        """Loads remote addons from their feeds. Feeds that were checked
+           less than the cache TTL ago aren't requested, and ones that
+           haven't changed on the server aren't downloaded again. Cached
+           rows are kept when a feed can't be loaded.
+
+        Args:
+            force_check (bool, optional): Check feeds with the server even
+                                          if the cache TTL hasn't run out.
+                                          Defaults to False.
+
+        Returns:
+            bool: True if every feed is loaded.
+        """
+        loaded = True
+        for addon_type in self.installed_table_names:
+            table_name = self.get_remote_table_name(addon_type)
+            url = self.FEED_URLS[table_name]
+            has_cached_rows = bool(self.c.execute(
+                f"SELECT rowid FROM {table_name} LIMIT 1").fetchone())  # nosec
+            if has_cached_rows and not force_check and self.feed_cache.is_fresh(
+                    url, self.remote_addons_cache_ttl):
+                continue
+
+            request = (self.feed_cache.get_request(url) if has_cached_rows
+                       else urllib.request.Request(url))
+            try:
+                with self.conn, urllib.request.urlopen(  # nosec
+                        request, timeout=self.FEED_TIMEOUT) as response:
+                    self.c.execute(f"DELETE FROM {table_name}")  # nosec
+                    database.insert_rows(
+                        self.c, table_name, feeds.iter_feed_rows(response))
+                    self.feed_cache.update(
+                        url, response.headers.get("ETag"),
+                        response.headers.get("Last-Modified"))
+                    self._mark_installed_remote_addons(addon_type)
+            except urllib.error.HTTPError as error:
+                if error.code != 304:
+                    logger.error(f"Couldn't load {url}: {error}")
+                    loaded = False
+                    continue
+                # Feed hasn't changed since it was cached
+                with self.conn:
+                    self.feed_cache.mark_checked(url)
+            except (OSError, HTTPException, ParseError) as error:
+                logger.error(f"Couldn't load {url}: {error}")
+                loaded = False
+
+        return loaded
+
+    def check_for_updates(self) -> List[tuple]:
+        """Marks addons that have a newer version in the remote tables like
+           the addon manager does.
+
+        Returns:
+            List[tuple]: The update plan. See `updates.get_update_plan`.
+        """
+        with self.conn:
+            return updates.mark_updates(
+                self.c, self.installed_table_names.values())
+
+    def install_remote_addons(
+            self,
+            remote_table_name: str,
+            interface_ids: Iterable[str]) -> List[AddonEngineError]:
+        """Installs addons from a remote table along with the dependencies
+           they are missing. Addons that are already installed are
+           reinstalled. Dependencies are installed first, and addons whose
+           dependencies failed to install are skipped.
+
+        Raises:
+            AddonEngineError: The addons depend on each other.
+
+        Returns:
+            List[AddonEngineError]: Errors of the addons that couldn't be
+                                    installed.
+        """
+        interface_ids = [
+            dependencies.get_remote_interface_id(interface_id)
+            for interface_id in interface_ids]
+        installed_table_name = self.installed_table_names[
+            self.get_addon_type(remote_table_name)]
+
+        errors = []
+        failed_interface_ids = set()
+        attempted_interface_ids = set()
+        while interface_ids:
+            installed_interface_ids = {
+                dependencies.get_remote_interface_id(interface_id)
+                for interface_id in self._get_installed_interface_ids(
+                    installed_table_name)}.difference(interface_ids)
+            graph = dependencies.get_dependency_graph(
+                self.c, remote_table_name, interface_ids)
+            try:
+                plan = dependencies.get_install_plan(
+                    graph, interface_ids, installed_interface_ids)
+            except dependencies.DependencyCycleError as error:
+                raise AddonEngineError(str(error)) from error
+
+            for level in plan:
+                for interface_id in level:
+                    attempted_interface_ids.add(interface_id)
+                    failed_dependencies = (
+                        graph.get(interface_id, set()) & failed_interface_ids)
+                    try:
+                        if failed_dependencies:
+                            raise AddonEngineError(
+                                f"Not installing {interface_id}, because "
+                                "its dependencies "
+                                f"{', '.join(sorted(failed_dependencies))} "
+                                "weren't installed")
+                        self.install_remote_addon(
+                            remote_table_name, interface_id)
+                    except AddonEngineError as error:
+                        logger.error(error)
+                        errors.append(error)
+                        failed_interface_ids.add(interface_id)
+
+            # Dependencies of addons from archives that have their own
+            # compendium files are only known once they are installed.
+            interface_ids = [
+                interface_id for interface_id in
+                self._get_missing_dependencies(
+                    installed_table_name, attempted_interface_ids)
+                if interface_id not in attempted_interface_ids]
+
+        return errors
+
+    def install_remote_addon(
+            self,
+            remote_table_name: str,
+            interface_id: str) -> None:
+        """Installs the latest version of an addon from a remote table
+
+        Raises:
+            AddonEngineError: The addon couldn't be installed.
+        """
+        remote_row = self._get_remote_row(remote_table_name, interface_id)
+        archive = self.get_remote_addon_archive(
+            remote_row[5], remote_row[0], interface_id, remote_row[2])
+        try:
+            with self._transaction() as transaction:
+                self._install_archive(
+                    transaction, archive, interface_id, remote_row[0])
+        finally:
+            self.archive_cache.release(archive)
+        logger.info(f"Installed {remote_row[0]} {remote_row[2]}")
+
+    def install_addon_file(self, path: Path) -> None:
+        """Installs a .zip archive or .abc file that isn't from
+           lotrointerface.com
+
+        Raises:
+            AddonEngineError: The addon couldn't be installed.
+        """
+        with self._transaction() as transaction:
+            if path.suffix == ".abc":
+                self._install_abc_file(transaction, path)
+            elif path.suffix == ".zip":
+                self._install_archive(transaction, path, "", path.stem)
+            else:
+                raise AddonEngineError(
+                    f"{path.name} isn't a .zip archive or .abc file")
+        logger.info(f"Installed {path}")
+
+    def update_addons(
+            self,
+            plan: Iterable[tuple]) -> List[AddonEngineError]:
+        """Updates each addon in an update plan. See
+           `updates.get_update_plan`.
+
+        Returns:
+            List[AddonEngineError]: Errors of the addons that couldn't be
+                                    updated.
+        """
+        errors = []
+        updated = False
+        for table_name, _, *addon, _, _ in plan:
+            try:
+                self.update_addon(table_name, addon)
+                updated = True
+            except AddonEngineError as error:
+                logger.error(error)
+                errors.append(error)
+
+        # Files of the old versions can have been linked to the file store
+        if updated:
+            self.file_store.prune()
+        return errors
+
+    def update_addon(self, installed_table_name: str, addon) -> None:
+        """Updates addon to the latest version in its remote table. Addons
+           with a manifest are updated in place, so files that are the same
+           in the new version aren't touched. Others are reinstalled.
+
+        Args:
+            installed_table_name (str): Installed table the addon is in.
+            addon: InterfaceID, File, and Name of the installed addon.
+
+        Raises:
+            AddonEngineError: The addon couldn't be updated.
+        """
+        update = self.get_update(installed_table_name, addon)
+        # The new version is downloaded before the old one is removed
+        archive = self.get_remote_addon_archive(
+            update.url, update.name, update.interface_id, update.version)
+        try:
+            extracted, plan = self.extract_archive(
+                archive, update.name, update.manifest)
+        finally:
+            self.archive_cache.release(archive)
+        self.apply_update(update, extracted, plan)
+
+    def get_update(
+            self,
+            installed_table_name: str,
+            addon) -> AddonUpdate:
+        """Returns update of addon to the latest version in its remote table
+
+        Args:
+            installed_table_name (str): Installed table the addon is in.
+            addon: InterfaceID, File, and Name of the installed addon.
+
+        Raises:
+            AddonEngineError: The addon isn't in its remote table.
+        """
+        addon_type = self.get_addon_type(installed_table_name)
+        remote_row = self._get_remote_row(
+            self.get_remote_table_name(addon_type), addon[0])
+        manifest = manifests.get_manifest(
+            self.c, addon_type, self.addon_folders[addon_type], addon[0])
+        return AddonUpdate(addon_type, addon, remote_row, manifest)
+
+    def apply_update(
+            self,
+            update: AddonUpdate,
+            extracted: transactions.StagingFolder,
+            plan: extraction.ExtractionPlan) -> None:
+        """Installs an update that was extracted with `extract_archive`.
+           extracted is removed afterwards.
+
+        Raises:
+            AddonEngineError: The update couldn't be installed.
+        """
+        try:
+            with self._transaction() as transaction:
+                if not update.manifest:
+                    self._uninstall_addon(
+                        transaction, update.addon_type, update.addon)
+                self._install_extracted_archive(
+                    transaction, extracted.path, plan, update.interface_id,
+                    update.name, update.manifest)
+        finally:
+            extracted.remove()
+        logger.info(f"Updated {update.name} to {update.version}")
+
+    def get_dependents(
+            self,
+            installed_table_name: str,
+            addons: Iterable[tuple]) -> Dict[str, List[str]]:
+        """Returns names of the installed addons that depend on addons. See
+           `dependencies.get_dependents`.
+        """
+        return dependencies.get_dependents(
+            self.c, installed_table_name, [addon[0] for addon in addons])
+
+    def uninstall_addons(
+            self,
+            installed_table_name: str,
+            addons: Iterable[tuple]) -> None:
+        """Uninstalls addons from an installed table together. Files in
+           `file_store` that nothing links to anymore are removed afterwards.
+
+        Args:
+            installed_table_name (str): Installed table the addons are in.
+            addons (Iterable[tuple]): InterfaceID, File, and Name of each
+                                      addon.
+        """
+        addon_type = self.get_addon_type(installed_table_name)
+        with self._transaction() as transaction:
+            for addon in addons:
+                self._uninstall_addon(transaction, addon_type, addon)
+                logger.info(f"Uninstalled {addon[2]}")
+        self.file_store.prune()
+
+    def verify_addons(self) -> Dict[Tuple[str, str], Dict[Path, str]]:
+        """Checks the files of the installed addons that have a manifest.
+           See `manifests.verify_manifest`.
+
+        Returns:
+            Dict[Tuple[str, str], Dict[Path, str]]: Problems with the files
+                of each addon by addon type and interface ID. Addons without
+                problems have an empty dict.
+        """
+        results = {}
+        for addon_type, addon_folder in self.addon_folders.items():
+            for interface_id in manifests.get_interface_ids(
+                    self.c, addon_folder):
+                manifest = manifests.get_manifest(
+                    self.c, addon_type, addon_folder, interface_id)
+                results[(addon_type, interface_id)] = {
+                    addon_folder.joinpath(path): problem for path, problem in
+                    manifests.verify_manifest(manifest).items()}
+
+        return results
+
+    def deduplicate_addons(self) -> LinkResult:
+        """Links the files in the addon folders to the shared file store, so
+           files that other games have too are only stored once. See
+           `file_store`. Manifests get the mtimes of files that were
+           replaced with hardlinks.
+        """
+        result = LinkResult()
+        with self.conn:
+            for addon_folder in self.addon_folders.values():
+                folder_result = self.file_store.link_files(
+                    get_linkable_files(addon_folder), self.staging_dir)
+                manifests.update_mtimes(self.c, addon_folder, {
+                    PurePosixPath(path.relative_to(addon_folder).as_posix()):
+                    mtimes
+                    for path, mtimes in folder_result.changed_mtimes.items()})
+                result.add(folder_result)
+
+        return result
+
+    def get_remote_addon_archive(
+            self,
+            url: str,
+            name: str,
+            interface_id: str,
+            version: str) -> Path:
+        """Returns path of the archive for a remote addon version in the
+           archive cache. It is downloaded first if it isn't cached. It
+           doesn't use the database, so it can be called from other threads.
+           The archive has to be given to `AddonArchiveCache.release` once
+           it's extracted.
+
+        Raises:
+            AddonEngineError: The download failed.
+        """
+        archive = self.archive_cache.get(interface_id, version)
+        if archive:
+            logger.info(f"Using cached archive for {name} {version}")
+            return archive
+
+        if not url.lower().startswith("http"):
+            raise AddonEngineError(f"{name} doesn't have a download URL")
+
+        download_lock = download.acquire_download_lock(
+            url, self.downloads_dir)
+        try:
+            # It could have been downloaded while waiting for the lock
+            archive = self.archive_cache.get(interface_id, version)
+            if archive:
+                return archive
+
+            # Downloads dir is on the same filesystem as the archive cache,
+            # so the download can be moved into it.
+            with TemporaryDirectory(dir=self.downloads_dir) as tmp_dir_name:
+                path = Path(tmp_dir_name) / f"{name}.zip"
+                try:
+                    download.download_file(url, path, self.downloads_dir)
+                except (OSError, HTTPException,
+                        download.DownloadError) as error:
+                    raise AddonEngineError(
+                        f"Couldn't download {name}: {error}") from error
+
+                return self.archive_cache.add(
+                    interface_id, version, path, move_archive=True)
+        finally:
+            download_lock.release()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[transactions.AddonTransaction]:
+        """Changes to the addons cache database are committed along with the
+           transaction and rolled back with it
+        """
+        transaction = transactions.AddonTransaction(self.staging_dir)
+        try:
+            yield transaction
+            self.conn.commit()
+        except BaseException:
+            transaction.rollback()
+            self.conn.rollback()
+            raise
+        transaction.commit()
+
+    def extract_archive(
+            self,
+            archive: Path,
+            addon_name: str,
+            manifest: Optional[manifests.AddonManifest] = None
+    ) -> Tuple[transactions.StagingFolder, extraction.ExtractionPlan]:
+        """Extracts an addon archive into a new folder in the staging
+           folder. It doesn't use the database, so it can be called from
+           other threads.
+
+        Args:
+            archive (Path): Zip archive of the addon.
+            addon_name (str): Name for the addon's folder if it needs one.
+            manifest (Optional[manifests.AddonManifest], optional): Manifest
+                of the installed version when updating. Files that haven't
+                changed since it was made aren't extracted.
+
+        Raises:
+            AddonEngineError: The archive isn't an addon for the game.
+
+        Returns:
+            Tuple[transactions.StagingFolder, extraction.ExtractionPlan]:
+                Folder the addon was extracted into and the plan it was
+                extracted with. The folder has to be removed by the caller.
+        """
+        extracted = transactions.StagingFolder(self.staging_dir)
+        tmp_dir = extracted.path
+        try:
+            try:
+                plan = extraction.extract_addon(
+                    archive, tmp_dir, addon_name, lambda: None,
+                    partial(manifests.get_unchanged_paths, manifest=manifest)
+                    if manifest else None)
+            except (extraction.AddonArchiveError,
+                    zipfile.BadZipFile) as error:
+                raise AddonEngineError(
+                    f"Couldn't install {addon_name}: {error}") from error
+            if plan is None:
+                raise AddonEngineError(f"{archive.name} is empty")
+            if plan.addon_type not in self.addon_folders:
+                raise AddonEngineError(
+                    f"{self.game_type} doesn't support "
+                    f"{plan.addon_type.lower()} addons")
+            if self.link_files:
+                self.file_store.link_files(
+                    get_linkable_files(tmp_dir), self.staging_dir)
+        except BaseException:
+            extracted.remove()
+            raise
+
+        return extracted, plan
+
+    def _install_archive(
+            self,
+            transaction: transactions.AddonTransaction,
+            archive: Path,
+            interface_id: str,
+            addon_name: str,
+            manifest: Optional[manifests.AddonManifest] = None) -> None:
+        """Installs an addon archive with transaction like
+           `AddonManager.installZipAddon`
+
+        Args:
+            transaction (transactions.AddonTransaction): Transaction to make
+                                                         the changes with.
+            archive (Path): Zip archive of the addon.
+            interface_id (str): Interface ID if the addon is from
+                                lotrointerface.com.
+            addon_name (str): Name for the addon's folder if it needs one.
+            manifest (Optional[manifests.AddonManifest], optional): Manifest
+                of the installed version when updating.
+        """
+        extracted, plan = self.extract_archive(archive, addon_name, manifest)
+        try:
+            self._install_extracted_archive(
+                transaction, extracted.path, plan, interface_id, addon_name,
+                manifest)
+        finally:
+            extracted.remove()
+
+    def _install_extracted_archive(
+            self,
+            transaction: transactions.AddonTransaction,
+            tmp_dir: Path,
+            plan: extraction.ExtractionPlan,
+            interface_id: str,
+            addon_name: str,
+            manifest: Optional[manifests.AddonManifest] = None) -> None:
+        """Moves an addon from `extract_archive` into its addon folder with
+           transaction. See `_install_archive`.
+        """
+        addon_folder = self.addon_folders[plan.addon_type]
+        if manifest:
+            self._remove_outdated_files(
+                transaction, plan, manifest, interface_id)
+
+        root_dir = tmp_dir / plan.root_dir
+        existing_compendium_files = list(root_dir.glob("*.*compendium"))
+        if len(existing_compendium_files) > 1:
+            raise AddonEngineError(
+                f"{addon_name} has multiple compendium files")
+        existing_compendium_file = next(
+            iter(existing_compendium_files), None)
+        if interface_id:
+            compendium.generate_compendium_file(
+                root_dir, plan.addon_type,
+                self._get_remote_row(
+                    self.get_remote_table_name(plan.addon_type),
+                    interface_id),
+                existing_compendium_file)
+        elif existing_compendium_file and plan.addon_type == "Plugin":
+            # Compendium files of manually installed plugins can't be
+            # trusted. See `AddonManager.install_plugin`.
+            existing_compendium_file.unlink()
+
+        installed_paths = []
+        for path in list(tmp_dir.iterdir()):
+            transaction.move_into(path, addon_folder / path.name)
+            installed_paths.append(addon_folder / path.name)
+        if self.link_files:
+            self.file_store.move_files(tmp_dir, addon_folder)
+
+        self._refresh_installed_folders(
+            plan.addon_type,
+            [path for path in installed_paths if path.is_dir()])
+        # Manifests are only needed for updates, which only remote addons get
+        if interface_id:
+            manifests.set_manifest(
+                self.c, addon_folder, interface_id,
+                manifests.get_installed_files(addon_folder, plan))
+        self._mark_installed_remote_addons(plan.addon_type)
+
+    def _install_abc_file(
+            self,
+            transaction: transactions.AddonTransaction,
+            path: Path) -> None:
+        if "Music" not in self.addon_folders:
+            raise AddonEngineError(
+                f"{self.game_type} doesn't support .abc/music files")
+
+        # Copied to the staging folder first, so the file only shows up in
+        # the music folder once it is complete.
+        with transactions.StagingFolder(self.staging_dir) as tmp_dir:
+            tmp_path = tmp_dir / path.name
+            copy(str(path), str(tmp_path))
+            transaction.move_into(
+                tmp_path, self.addon_folders["Music"] / path.name)
+
+        self._refresh_loose_abc_files()
+
+    def _remove_outdated_files(
+            self,
+            transaction: transactions.AddonTransaction,
+            plan: extraction.ExtractionPlan,
+            manifest: manifests.AddonManifest,
+            interface_id: str) -> None:
+        """Prepares an installed addon to be updated in place like
+           `AddonManager.removeOutdatedAddonFiles`
+        """
+        table_name = self.installed_table_names[manifest.addon_type]
+        for file, in self.c.execute(
+                f"SELECT File FROM {table_name} "  # nosec
+                "WHERE InterfaceID = ?", (interface_id,)).fetchall():
+            # Compendium files are always regenerated
+            if file.endswith("compendium"):
+                transaction.remove(Path(file))
+
+        removed_paths = manifests.get_removed_paths(plan, manifest)
+        manifests.remove_files(
+            transaction, manifest.addon_folder, removed_paths)
+        logger.info(
+            f"Updating {interface_id} in place. {len(removed_paths)} files "
+            f"removed and {len(plan.unchanged_paths)} unchanged")
+
+        self.c.execute(
+            f"DELETE FROM {table_name} WHERE InterfaceID = ?",  # nosec
+            (interface_id,))
+
+    def _uninstall_addon(
+            self,
+            transaction: transactions.AddonTransaction,
+            addon_type: str,
+            addon) -> None:
+        """Removes the files of an installed addon with transaction along
+           with its startup script. Startup scripts are left enabled in the
+           game's settings, since those need Qt to be loaded.
+        """
+        interface_id, file, _ = addon
+        file = Path(file)
+        addon_folder = self.addon_folders[addon_type]
+
+        if addon_type == "Plugin":
+            paths = self._get_plugin_paths(file)
+        elif file.name.endswith("compendium"):
+            paths = [file.parent]
+        else:
+            # Unmanaged folders and loose .abc files
+            paths = [file]
+
+        if file.name.endswith("compendium") and file.exists():
+            script = compendium.parse_compendium_file(
+                file, compendium.ADDON_FILE_TAGS[file.suffix])[8]
+            if script:
+                paths.append(addon_folder / script.replace("\\", "/"))
+
+        for path in paths:
+            transaction.remove(path)
+
+        if addon_type == "Plugin":
+            # Author folder is removed if there are no other plugins in it
+            author_folder = addon_folder / file.relative_to(
+                addon_folder).parts[0]
+            if author_folder.is_dir() and not any(author_folder.iterdir()):
+                transaction.remove(author_folder)
+
+        if interface_id:
+            manifests.delete_manifest(self.c, addon_folder, interface_id)
+        self.c.execute(
+            f"DELETE FROM {self.installed_table_names[addon_type]} "  # nosec
+            "WHERE File = ?", (str(file),))
+        self._mark_installed_remote_addons(addon_type)
+
+    def _get_plugin_paths(self, file: Path) -> List[Path]:
+        """Returns the files and folders of a plugin from its compendium or
+           .plugin file. Plugin folders are found from the packages in the
+           .plugin files.
+        """
+        plugins_folder = self.addon_folders["Plugin"]
+        if file.suffix == ".plugin":
+            paths = []
+            plugin_files = [file]
+        else:
+            paths = [file]
+            plugin_files = [
+                plugins_folder / descriptor.replace("\\", "/")
+                for descriptor in compendium.parse_addon_file(
+                    file)["descriptors"]] if file.exists() else []
+
+        for plugin_file in plugin_files:
+            if not plugin_file.exists():
+                continue
+
+            doc = defusedxml.minidom.parse(str(plugin_file))
+            for node in doc.getElementsByTagName("Plugin")[0].childNodes:
+                if node.nodeName == "Package":
+                    paths.append(plugins_folder / "/".join(
+                        GetText(node.childNodes).split(".")[0:2]))
+            paths.append(plugin_file)
+
+        return paths
+
+    def _get_remote_row(
+            self,
+            remote_table_name: str,
+            interface_id: str) -> List[str]:
+        """Returns row of an addon in a remote table without the installed
+           prefix on its name
+
+        Raises:
+            AddonEngineError: The addon isn't in the remote table.
+        """
+        columns = ", ".join(database.ADDON_COLUMNS)
+        row = self.c.execute(
+            f"SELECT {columns} FROM {remote_table_name} "  # nosec
+            "WHERE InterfaceID = ?",
+            (dependencies.get_remote_interface_id(interface_id),)).fetchone()
+        if row is None:
+            raise AddonEngineError(
+                f"Addon with interface ID {interface_id} isn't on "
+                "lotrointerface.com")
+
+        row = list(row)
+        row[0] = self._strip_installed_prefix(row[0])
+        return row
+
+    def _strip_installed_prefix(self, name: str) -> str:
+        if name.startswith(INSTALLED_NAME_PREFIX):
+            return name[len(INSTALLED_NAME_PREFIX):]
+        return name
+
+    def _get_installed_interface_ids(self, installed_table_name: str) -> List[str]:
+        return [interface_id for interface_id, in self.c.execute(
+            f"SELECT InterfaceID FROM {installed_table_name} "  # nosec
+            "WHERE InterfaceID != ''")]
+
+    def _get_missing_dependencies(
+            self,
+            installed_table_name: str,
+            interface_ids: Iterable[str]) -> List[str]:
+        """Returns dependencies of the installed addons with interface_ids
+           that aren't installed
+        """
+        interface_ids = list(interface_ids)
+        installed_interface_ids = {
+            dependencies.get_remote_interface_id(interface_id)
+            for interface_id in self._get_installed_interface_ids(
+                installed_table_name)}
+        placeholders = ",".join("?" * len(interface_ids))
+        dependencies_table = database.get_dependencies_table_name(
+            installed_table_name)
+        return sorted({
+            dependencies.get_remote_interface_id(interface_id)
+            for interface_id, in self.c.execute(
+                f"SELECT {dependencies_table}.InterfaceID "  # nosec
+                f"FROM {dependencies_table} "
+                f"JOIN {installed_table_name} "
+                f"ON {installed_table_name}.rowid = AddonID "
+                f"WHERE AddonTable = ? AND "
+                f"{installed_table_name}.InterfaceID IN ({placeholders})",
+                (installed_table_name, *interface_ids))}
+            - installed_interface_ids)
+
+    def _mark_installed_remote_addons(self, addon_type: str) -> None:
+        """Prefixes names of installed addons in the remote table for
+           addon_type like `AddonManager.loadCachedRemoteAddons`. Doesn't
+           commit.
+        """
+        table_name = self.get_remote_table_name(addon_type)
+        self.c.execute(
+            f"UPDATE {table_name} SET Name = substr(Name, ?) "  # nosec
+            "WHERE Name LIKE ?",
+            (len(INSTALLED_NAME_PREFIX) + 1, f"{INSTALLED_NAME_PREFIX}%"))
+        self.c.executemany(
+            f"UPDATE {table_name} SET Name = (? || Name) "  # nosec
+            "WHERE InterfaceID = ?",
+            [(INSTALLED_NAME_PREFIX, interface_id) for interface_id in set(
+                self._get_installed_interface_ids(
+                    self.installed_table_names[addon_type]))])
+
+    def _refresh_installed_folders(
+            self,
+            addon_type: str,
+            folders: List[Path]) -> None:
+        """Replaces rows of the addons in folders in the installed table for
+           addon_type. Doesn't commit.
+        """
+        table_name = self.installed_table_names[addon_type]
+        for folder in folders:
+            # Range query like `AddonFileIndex`
+            start = str(folder).rstrip(os.sep) + os.sep
+            end = start[:-1] + chr(ord(os.sep) + 1)
+            self.c.execute(
+                f"DELETE FROM {table_name} "  # nosec
+                "WHERE File = ? OR (File >= ? AND File < ?)",
+                (str(folder), start, end))
+
+        folders = [folder for folder in folders if folder.is_dir()]
+        if folders:
+            database.insert_rows(
+                self.c, table_name,
+                self._get_installed_rows(addon_type, folders))
+
+    def _refresh_loose_abc_files(self) -> None:
+        """Replaces rows of the loose .abc files in the music folder.
+           Doesn't commit.
+        """
+        table_name = self.installed_table_names["Music"]
+        music_folder = self.addon_folders["Music"]
+        start = str(music_folder).rstrip(os.sep) + os.sep
+        end = start[:-1] + chr(ord(os.sep) + 1)
+        # Files in subfolders are part of music folder rows
+        self.c.execute(
+            f"DELETE FROM {table_name} "  # nosec
+            "WHERE File >= ? AND File < ? AND File LIKE '%.abc' "
+            "AND instr(substr(File, ?), ?) = 0",
+            (start, end, len(start) + 1, os.sep))
+        database.insert_rows(
+            self.c, table_name,
+            self._get_abc_rows(self.abc_index.scan(music_folder)))
+
+    def _get_installed_rows(
+            self,
+            addon_type: str,
+            folders: Optional[List[Path]] = None) -> List[List[str]]:
+        """Returns installed table rows for the addons in folders, or the
+           whole addon folder of addon_type if folders isn't given. These
+           are the same rows `AddonManager.getInstalledPlugins` and its
+           skin and music counterparts make.
+        """
+        addon_folder = self.addon_folders[addon_type]
+        remote_table_name = self.get_remote_table_name(addon_type)
+        if addon_type == "Plugin":
+            return self._get_installed_plugin_rows(folders or [addon_folder])
+
+        compendium_suffix = f".{addon_type.lower()}compendium"
+        if folders is None:
+            folders = [path for path in addon_folder.glob("*")
+                       if path.is_dir()]
+            abc_rows = (self.abc_index.scan(addon_folder)
+                        if addon_type == "Music" else [])
+        else:
+            abc_rows = []
+
+        compendium_files = []
+        unmanaged_folders = []
+        for folder in folders:
+            compendium_file = next(
+                (file for file in folder.iterdir()
+                 if file.suffix == compendium_suffix), None)
+            if compendium_file:
+                compendium_files.append(compendium_file)
+            else:
+                unmanaged_folders.append(folder)
+
+        files_data = self._get_addon_files_data(compendium_files)
+        rows = [
+            self._add_remote_info(
+                list(files_data[file]["row"]), remote_table_name)
+            for file in compendium_files]
+        for folder in unmanaged_folders:
+            items_row = [""] * compendium.ROW_LENGTH
+            items_row[0] = folder.name
+            items_row[5] = str(folder)
+            items_row[1] = "Unmanaged"
+            rows.append(items_row)
+
+        return rows + self._get_abc_rows(abc_rows)
+
+    def _get_installed_plugin_rows(
+            self,
+            folders: List[Path]) -> List[List[str]]:
+        plugins_folder = self.addon_folders["Plugin"]
+        compendium_files = []
+        plugin_files = []
+        files_data = {}
+        for folder in folders:
+            unchanged_files, changed_files = self.file_index.scan(
+                folder, (".plugin", ".plugincompendium"))
+
+            folder_files = []
+            for file in [*unchanged_files, *changed_files]:
+                relative_parts = file.relative_to(plugins_folder).parts
+                # Plugin files need to be in an author folder
+                if len(relative_parts) < 2:
+                    continue
+
+                if file.suffix == ".plugincompendium":
+                    # Compendium files go in the author folder of a plugin
+                    if len(relative_parts) == 2:
+                        compendium_files.append(file)
+                        folder_files.append(file)
+                else:
+                    plugin_files.append(file)
+                    folder_files.append(file)
+
+            files_data.update(unchanged_files)
+            files_data.update(self._parse_addon_files({
+                file: changed_files[file] for file in folder_files
+                if file in changed_files}))
+
+        # Plugins with a compendium file are shown as it
+        managed_plugin_files = {
+            plugins_folder / descriptor.replace("\\", "/")
+            for file in compendium_files
+            for descriptor in files_data[file]["descriptors"]}
+        rows = [
+            self._add_remote_info(
+                list(files_data[file]["row"]),
+                self.get_remote_table_name("Plugin"))
+            for file in compendium_files]
+        for file in plugin_files:
+            if file not in managed_plugin_files:
+                items_row = list(files_data[file]["row"])
+                items_row[1] = "Unmanaged"
+                rows.append(items_row)
+
+        return rows
+
+    def _get_abc_rows(self, abc_rows: Iterable[tuple]) -> List[List[str]]:
+        """Returns installed table rows for rows from
+           `abc_files.AbcIndex.scan`
+        """
+        rows = []
+        for path, title, transcriber, *_ in abc_rows:
+            items_row = [""] * compendium.ROW_LENGTH
+            items_row[0] = title or Path(path).stem
+            items_row[3] = transcriber
+            items_row[5] = path
+            items_row[1] = "Unmanaged"
+            rows.append(items_row)
+        return rows
+
+    def _get_addon_files_data(self, files: List[Path]) -> Dict[Path, dict]:
+        """Returns data for compendium or .plugin files. The file index is
+           used for files that haven't changed since they were last parsed.
+        """
+        files_data = {}
+        changed_files = {}
+        for file in files:
+            stat = file.stat()
+            file_data = self.file_index.get(file, stat)
+            if file_data is None:
+                changed_files[file] = stat
+            else:
+                files_data[file] = file_data
+
+        files_data.update(self._parse_addon_files(changed_files))
+        return files_data
+
+    def _parse_addon_files(
+            self,
+            files: Dict[Path, os.stat_result]) -> Dict[Path, dict]:
+        """Parses compendium or .plugin files and adds them to the file
+           index
+        """
+        files_data = compendium.parse_addon_files(list(files))
+        for file, stat in files.items():
+            self.file_index.update(file, stat, files_data[file])
+        return files_data
+
+    def _add_remote_info(
+            self,
+            items_row: List[str],
+            remote_table_name: str) -> List[str]:
+        """Sets category and latest release of an installed addon from its
+           remote table. Addons that aren't there are unmanaged.
+        """
+        for category, latest_release in self.c.execute(
+                "SELECT Category, LatestRelease FROM "  # nosec
+                f"{remote_table_name} WHERE InterfaceID = ?",
+                (items_row[6],)):
+            items_row[1] = category
+            items_row[4] = latest_release
+
+        if not items_row[1]:
+            items_row[1] = "Unmanaged"
+        return items_row
+
+
+logger = logging.getLogger("main")
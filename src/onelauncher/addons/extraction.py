@@ -0,0 +1,216 @@
+import logging
+import zipfile
+from pathlib import Path, PurePosixPath
+from shutil import copyfileobj
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Bytes copied from an archive member at a time
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+
+# Folders addon authors put files in when they want them to be extracted
+# somewhere higher up the folder tree than where their work ends up. This is
+# usually done for user convenience. Their contents are moved up to the
+# root of the addon.
+INVALID_FOLDER_NAMES = [
+    "ui",
+    "skins",
+    "Plugins",
+    "Music",
+    "My Documents",
+    "Documents",
+    "The Lord of the Rings Online",
+    "Dungeons and Dragons Online",
+    "Dungeons & Dragons Online",
+]
+# Dependency folders that are sometimes included with plugins
+PLUGIN_DEPENDENCY_FOLDER_NAMES = ["turbine", "turbineplugins"]
+
+
+class AddonArchiveError(Exception):
+    """Raised when an addon archive can't be installed"""
+
+
+class ExtractionPlan():
+    """Where each file of an addon archive goes. Found from the archive's
+       central directory, so nothing has to be moved after extraction.
+    """
+
+    def __init__(
+            self,
+            addon_type: str,
+            root_dir: PurePosixPath,
+            members: Dict[PurePosixPath, zipfile.ZipInfo]) -> None:
+        """
+        Args:
+            addon_type (str): "Plugin", "Music", or "Skin".
+            root_dir (PurePosixPath): Folder the compendium file goes in. For
+                                      plugins it is the author folder.
+            members (Dict[PurePosixPath, zipfile.ZipInfo]): Archive member
+                                                            for each path.
+        """
+        self.addon_type = addon_type
+        self.root_dir = root_dir
+        self.members = members
+        # Members that weren't extracted, because the installed files are
+        # already the same. See `extract_addon`.
+        self.unchanged_paths: Set[PurePosixPath] = set()
+
+
+def get_member_parts(zip_info: zipfile.ZipInfo) -> Tuple[str, ...]:
+    """Returns parts of an archive member's path. Parts that would put the
+       file outside of the extraction folder are dropped, like
+       `zipfile.ZipFile.extract` does.
+    """
+    path = PurePosixPath(zip_info.filename.replace("\\", "/"))
+    return tuple(
+        part for part in path.parts
+        if part not in ("", ".", "..", "/") and not part.endswith(":"))
+
+
+def _strip_invalid_folders(parts: Tuple[str, ...]) -> Tuple[str, ...]:
+    while len(parts) > 1 and parts[0] in INVALID_FOLDER_NAMES:
+        parts = parts[1:]
+    return parts
+
+
+def _get_top_level_folders(paths: List[Tuple[str, ...]]) -> List[str]:
+    """Returns top level folders in paths in the order they are found"""
+    return list(dict.fromkeys(parts[0] for parts in paths if len(parts) > 1))
+
+
+def _get_plugin_author_folder(paths: List[Tuple[str, ...]]) -> str:
+    """Returns the author folder of a plugin. There can only be one author
+       folder. That is where the compendium file goes. What appear to be
+       extra author folders are usually included dependencies.
+
+    Raises:
+        AddonArchiveError: There isn't an author folder with a .plugin file.
+    """
+    author_folders = _get_top_level_folders(paths)
+    # Unfiltered author folders are used if there aren't any left after
+    # filtering. Ex. When installing the filtered libraries standalone.
+    author_folders = [
+        folder for folder in author_folders
+        if folder.lower() not in PLUGIN_DEPENDENCY_FOLDER_NAMES
+    ] or author_folders
+    if len(author_folders) == 1:
+        return author_folders[0]
+
+    # The most likely author folder is where a .plugincompendium file is.
+    # The next most likely one is where .plugin files are. Dependencies may
+    # also have .plugin files though.
+    for suffix in (".plugincompendium", ".plugin"):
+        for folder in author_folders:
+            if any(len(parts) == 2 and parts[0] == folder and
+                   parts[1].endswith(suffix) for parts in paths):
+                return folder
+
+    raise AddonArchiveError(
+        "Plugin doesn't have an author folder with a .plugin file.")
+
+
+def get_extraction_plan(
+        archive: zipfile.ZipFile,
+        addon_name: str) -> Optional[ExtractionPlan]:
+    """Returns where each file of an addon archive should be extracted to.
+       Files in `INVALID_FOLDER_NAMES` are moved up. Skins and music are put
+       in a folder named addon_name if they aren't all in one folder already.
+
+    Raises:
+        AddonArchiveError: The archive is a plugin without an author folder.
+
+    Returns:
+        Optional[ExtractionPlan]: None if the archive doesn't have any files.
+    """
+    members = {
+        _strip_invalid_folders(get_member_parts(zip_info)): zip_info
+        for zip_info in archive.infolist() if not zip_info.is_dir()}
+    members.pop((), None)
+    if not members:
+        return None
+
+    paths = list(members)
+    if any(parts[-1].endswith(".plugin") for parts in paths):
+        addon_type = "Plugin"
+        root_dir = _get_plugin_author_folder(paths)
+    else:
+        # Some plugins have .abc files, but music collections shouldn't
+        # have .plugin files.
+        if any(parts[-1].endswith(".abc") for parts in paths):
+            addon_type = "Music"
+        else:
+            addon_type = "Skin"
+
+        top_level_folders = _get_top_level_folders(paths)
+        if (len(top_level_folders) == 1 and
+                all(len(parts) > 1 for parts in paths)):
+            root_dir = top_level_folders[0]
+        else:
+            root_dir = addon_name
+            members = {
+                (addon_name, *parts): zip_info
+                for parts, zip_info in members.items()}
+
+    return ExtractionPlan(
+        addon_type,
+        PurePosixPath(root_dir),
+        {PurePosixPath(*parts): zip_info
+         for parts, zip_info in members.items()})
+
+
+def extract_addon(
+        archive_path: Path,
+        staging_dir: Path,
+        addon_name: str,
+        check_cancelled: Callable[[], None],
+        get_unchanged_paths: Optional[
+            Callable[[ExtractionPlan], Set[PurePosixPath]]] = None
+) -> Optional[ExtractionPlan]:
+    """Extracts addon archive to staging_dir with the folder structure from
+       `get_extraction_plan`. Each file is streamed straight to where it
+       goes, so it is only written once. staging_dir should be on the same
+       filesystem as the addon folders, so the files can then be moved there
+       by renaming them.
+
+    Args:
+        archive_path (Path): Zip archive of the addon.
+        staging_dir (Path): Empty folder to extract to.
+        addon_name (str): Name for the addon's folder if it needs one.
+        check_cancelled (Callable[[], None]): Called before each file. It can
+                                              raise an exception to stop
+                                              the extraction.
+        get_unchanged_paths (Callable[[ExtractionPlan], Set[PurePosixPath]],
+                             optional): Returns members of the plan that
+                                        are already installed and shouldn't
+                                        be extracted. They are kept as
+                                        `ExtractionPlan.unchanged_paths`.
+
+    Raises:
+        AddonArchiveError: The archive is a plugin without an author folder.
+
+    Returns:
+        Optional[ExtractionPlan]: None if the archive doesn't have any files.
+    """
+    with zipfile.ZipFile(archive_path, "r") as archive:
+        plan = get_extraction_plan(archive, addon_name)
+        if plan is None:
+            return None
+
+        if get_unchanged_paths:
+            plan.unchanged_paths = get_unchanged_paths(plan)
+        # Made even if none of its files are extracted, since the compendium
+        # file is written there.
+        staging_dir.joinpath(plan.root_dir).mkdir(parents=True, exist_ok=True)
+        for path, zip_info in plan.members.items():
+            if path in plan.unchanged_paths:
+                continue
+            check_cancelled()
+            target = staging_dir.joinpath(path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with archive.open(zip_info) as source, target.open("wb") as file:
+                copyfileobj(source, file, EXTRACT_CHUNK_SIZE)
+
+    return plan
+
+
+logger = logging.getLogger("main")
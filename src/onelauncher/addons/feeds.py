@@ -0,0 +1,118 @@
+import sqlite3
+import urllib.request
+from time import localtime, strftime, time
+from typing import BinaryIO, Iterator, List, Optional
+from xml.etree.ElementTree import Element  # nosec
+
+import defusedxml.ElementTree
+
+from onelauncher.addons.compendium import ROW_LENGTH
+from onelauncher.addons.database import FEED_CACHE_TABLE_NAME
+
+# lotrointerface.com favorites feeds of the addons OneLauncher can install
+PLUGINS_FEED_URL = "https://api.lotrointerface.com/fav/OneLauncher-Plugins.xml"
+SKINS_FEED_URL = "https://api.lotrointerface.com/fav/OneLauncher-Themes.xml"
+MUSIC_FEED_URL = "https://api.lotrointerface.com/fav/OneLauncher-Music.xml"
+SKINS_DDO_FEED_URL = (
+    "https://api.lotrointerface.com/fav/OneLauncher-Themes-DDO.xml")
+
+
+def get_row_from_ui_element(ui_element: Element) -> List[str]:
+    """Returns addon row for a `<Ui>` element from a lotrointerface feed"""
+    items_row = [""] * ROW_LENGTH
+    for element in ui_element:
+        text = element.text or ""
+        if element.tag == "UIName":
+            # Sanitize
+            items_row[0] = text.replace('/', '-').replace('\\', '-')
+        elif element.tag == "UIAuthorName":
+            items_row[3] = text
+        elif element.tag == "UICategory":
+            items_row[1] = text
+        elif element.tag == "UID":
+            items_row[6] = text
+        elif element.tag == "UIVersion":
+            items_row[2] = text
+        elif element.tag == "UIUpdated":
+            items_row[4] = strftime("%Y-%m-%d", localtime(int(text)))
+        elif element.tag == "UIFileURL":
+            items_row[5] = text
+
+    return items_row
+
+
+def iter_feed_rows(source: BinaryIO) -> Iterator[List[str]]:
+    """Yields addon rows from a lotrointerface favorites feed as soon as
+       each `<Ui>` element has been read from source. Elements are discarded
+       once their row is made, so memory use stays the same no matter how
+       big the feed is.
+
+    Args:
+        source (BinaryIO): Feed file or HTTP response. It is read
+                           incrementally.
+    """
+    events = defusedxml.ElementTree.iterparse(source, events=("start", "end"))
+    _, root = next(events)
+    for event, element in events:
+        if event == "end" and element.tag == "Ui":
+            yield get_row_from_ui_element(element)
+            root.clear()
+
+
+class FeedCache():
+    """
+    HTTP cache validators for the remote addon feeds. The rows parsed from
+    a feed are kept in the addons cache database, so a feed that hasn't
+    changed on the server doesn't have to be downloaded or parsed again.
+    """
+    TABLE_NAME = FEED_CACHE_TABLE_NAME
+
+    def __init__(self, cursor: sqlite3.Cursor) -> None:
+        self.c = cursor
+
+    def is_fresh(self, url: str, ttl: float) -> bool:
+        """Return True if url was checked with the server less than ttl
+           seconds ago. Fresh feeds don't need to be requested at all.
+        """
+        for checked_time, in self.c.execute(
+                f"SELECT CheckedTime FROM {self.TABLE_NAME} WHERE URL = ?",
+                (url,)):
+            return time() - checked_time < ttl
+
+        return False
+
+    def get_request(self, url: str) -> urllib.request.Request:
+        """Return conditional request for url. The server will respond
+           with 304 Not Modified if the cached feed is still current.
+        """
+        request = urllib.request.Request(url)
+        for etag, last_modified in self.c.execute(
+                f"SELECT ETag, LastModified FROM {self.TABLE_NAME} WHERE URL = ?",
+                (url,)):
+            if etag:
+                request.add_header("If-None-Match", etag)
+            if last_modified:
+                request.add_header("If-Modified-Since", last_modified)
+
+        return request
+
+    def update(
+            self,
+            url: str,
+            etag: Optional[str],
+            last_modified: Optional[str]) -> None:
+        """Store validators for a feed that has been fully downloaded"""
+        self.c.execute(
+            f"INSERT OR REPLACE INTO {self.TABLE_NAME} VALUES(?,?,?,?)",
+            (url, etag, last_modified, time()))
+
+    def mark_checked(self, url: str) -> None:
+        """Restart the TTL of a feed the server said hasn't changed"""
+        self.c.execute(
+            f"UPDATE {self.TABLE_NAME} SET CheckedTime = ? WHERE URL = ?",
+            (time(), url))
+
+    def remove(self, url: str) -> None:
+        """Forget validators for a feed whose cached rows aren't complete"""
+        self.c.execute(
+            f"DELETE FROM {self.TABLE_NAME} WHERE URL = ?", (url,))
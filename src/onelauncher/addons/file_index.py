@@ -0,0 +1,118 @@
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from onelauncher.addons.database import FILE_INDEX_TABLE_NAME
+
+
+def iter_files_with_stats(
+        root: Path,
+        suffixes: Tuple[str, ...]) -> Iterator[Tuple[Path, os.stat_result]]:
+    """Recursively yield every file in root with one of suffixes along
+       with its stat result. Uses `os.scandir`, so only one stat call is
+       made per matching file.
+    """
+    folders = [root]
+    # Folders that have been walked already. This stops symlink loops.
+    visited_folders = set()
+    while folders:
+        folder = folders.pop()
+        try:
+            folder_stat = folder.stat()
+            entries = list(os.scandir(folder))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+
+        folder_key = (folder_stat.st_dev, folder_stat.st_ino)
+        if folder_key in visited_folders:
+            continue
+        visited_folders.add(folder_key)
+
+        for entry in entries:
+            if entry.is_dir():
+                folders.append(Path(entry.path))
+            elif entry.name.endswith(suffixes) and entry.is_file():
+                yield Path(entry.path), entry.stat()
+
+
+class AddonFileIndex():
+    """
+    Persistent index of addon files stored in the addons cache database.
+    Entries are keyed by path and remember the size, mtime, and inode of
+    the file along with the data that was parsed from it. That way files
+    only have to be parsed again when they have actually changed.
+    """
+    TABLE_NAME = FILE_INDEX_TABLE_NAME
+
+    def __init__(self, cursor: sqlite3.Cursor) -> None:
+        self.c = cursor
+
+    @staticmethod
+    def _get_stat_key(stat: os.stat_result) -> Tuple[int, int, int]:
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+    def get(self, path: Path, stat: os.stat_result) -> Optional[Any]:
+        """Return indexed data for path or None if path has changed
+           since it was indexed.
+        """
+        for size, mtime, inode, data in self.c.execute(
+                f"SELECT Size, MTime, Inode, Data FROM {self.TABLE_NAME} "
+                "WHERE Path = ?", (str(path),)):
+            if (size, mtime, inode) == self._get_stat_key(stat):
+                return json.loads(data)
+
+        return None
+
+    def update(self, path: Path, stat: os.stat_result, data: Any) -> None:
+        self.c.execute(
+            f"INSERT OR REPLACE INTO {self.TABLE_NAME} VALUES(?,?,?,?,?)",
+            (str(path), *self._get_stat_key(stat), json.dumps(data)))
+
+    def _get_entries_in_folder(
+            self, folder: Path) -> Dict[str, Tuple[Tuple[int, int, int], str]]:
+        # Range query over the primary key instead of LIKE, so the
+        # index can be used. The character after the path separator sorts
+        # after every path in the folder.
+        start = str(folder).rstrip(os.sep) + os.sep
+        end = start[:-1] + chr(ord(os.sep) + 1)
+        return {path: ((size, mtime, inode), data) for path, size, mtime, inode, data in self.c.execute(
+            f"SELECT Path, Size, MTime, Inode, Data FROM {self.TABLE_NAME} "
+            "WHERE Path >= ? AND Path < ?", (start, end))}
+
+    def scan(
+            self,
+            root: Path,
+            suffixes: Tuple[str, ...]
+    ) -> Tuple[Dict[Path, Any], Dict[Path, os.stat_result]]:
+        """Walk root and compare the files found against the index.
+           Entries for files under root that no longer exist are removed.
+
+        Args:
+            root (Path): Folder to scan recursively.
+            suffixes (Tuple[str, ...]): File suffixes to include in the scan.
+
+        Returns:
+            Tuple[Dict[Path, Any], Dict[Path, os.stat_result]]: Indexed data
+                of unchanged files and stat results of new or changed files.
+                Changed files should be parsed and passed to `update`.
+        """
+        indexed_entries = self._get_entries_in_folder(root)
+
+        unchanged_files: Dict[Path, Any] = {}
+        changed_files: Dict[Path, os.stat_result] = {}
+        for path, stat in iter_files_with_stats(root, suffixes):
+            entry = indexed_entries.pop(str(path), None)
+            if entry and entry[0] == self._get_stat_key(stat):
+                unchanged_files[path] = json.loads(entry[1])
+            else:
+                changed_files[path] = stat
+
+        # Anything left over wasn't found on the filesystem. Entries with
+        # other suffixes belong to a different kind of scan.
+        self.c.executemany(
+            f"DELETE FROM {self.TABLE_NAME} WHERE Path = ?",
+            [(path,) for path in indexed_entries if path.endswith(suffixes)])
+
+        return unchanged_files, changed_files
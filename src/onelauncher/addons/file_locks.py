@@ -0,0 +1,132 @@
+"""
+Locks that are shared between OneLauncher processes, like the addon manager
+and `onelauncher-addons`. They are OS locks on lock files, so the OS releases
+them when a process crashes. Locks are held by open files, so two
+`FileLock`s of the same file exclude each other even in the same process.
+"""
+import os
+import time
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+# Seconds between attempts to get a lock on Windows, where there is no
+# blocking lock without a timeout
+WINDOWS_RETRY_INTERVAL = 0.1
+
+
+def _lock_file(lock_file: BinaryIO, blocking: bool) -> bool:
+    """Returns False if the lock is held elsewhere and blocking is False"""
+    if os.name == "nt":
+        # Locks a byte range. The same one has to be unlocked.
+        lock_file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                return True
+            except OSError:
+                if not blocking:
+                    return False
+            time.sleep(WINDOWS_RETRY_INTERVAL)
+
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | (
+            0 if blocking else fcntl.LOCK_NB))
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _unlock_file(lock_file: BinaryIO) -> None:
+    if os.name == "nt":
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class FileLock():
+    """
+    Exclusive lock on path. The file is created when the lock is acquired
+    and removed when it's released, so lock files don't pile up. Not
+    thread-safe.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock_file: Optional[BinaryIO] = None
+
+    @property
+    def is_held(self) -> bool:
+        return self._lock_file is not None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Acquires the lock
+
+        Args:
+            blocking (bool, optional): Wait for the lock if it's held
+                                       elsewhere. Defaults to True.
+
+        Returns:
+            bool: False if blocking is False and the lock is held elsewhere.
+        """
+        if self.is_held:
+            raise RuntimeError(f"{self.path} is already locked")
+
+        while True:
+            lock_file = self.path.open("ab")
+            try:
+                if not _lock_file(lock_file, blocking):
+                    lock_file.close()
+                    return False
+                # The last holder could have removed the file after it was
+                # opened here. Holding a lock on a removed file would be
+                # pointless. Windows doesn't allow removing open files.
+                if os.name == "nt" or self._is_current_file(lock_file):
+                    self._lock_file = lock_file
+                    return True
+                _unlock_file(lock_file)
+            except BaseException:
+                lock_file.close()
+                raise
+            lock_file.close()
+
+    def _is_current_file(self, lock_file: BinaryIO) -> bool:
+        try:
+            return os.path.samestat(
+                os.fstat(lock_file.fileno()), os.stat(self.path))
+        except FileNotFoundError:
+            return False
+
+    def release(self) -> None:
+        if self._lock_file is None:
+            return
+
+        lock_file = self._lock_file
+        self._lock_file = None
+        if os.name == "nt":
+            _unlock_file(lock_file)
+            lock_file.close()
+            try:
+                self.path.unlink(missing_ok=True)
+            except PermissionError:
+                # Opened by whatever is trying to get the lock next
+                pass
+        else:
+            # Removed while it's still locked, so everything that gets the
+            # lock after this notices the file was removed
+            self.path.unlink(missing_ok=True)
+            _unlock_file(lock_file)
+            lock_file.close()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.release()
+
@@ -0,0 +1,357 @@
+"""
+Addon files that are the same in several games, stored once. Games often
+have the same plugins, skins, and music installed, like the live and preview
+clients or the documents folders of different accounts. Each distinct file
+is kept in the store by the hash of its contents, and the copies in the
+addon folders are replaced with links to it.
+
+Reflinks are used where the filesystem supports them, like Btrfs, XFS, and
+APFS. They share the data of the file until one of the copies is written to,
+so an edit in one game never shows up in another. Otherwise, files are
+hardlinked and made read-only, so they can't be edited in place. Editors
+that save by writing a new file, which most do, only replace the link of the
+game that was edited. Hardlinks aren't used on Windows, where read-only files
+can't be replaced or deleted.
+
+The store has to be on the same filesystem as the addon folders. Files that
+can't be linked are left the way they are.
+"""
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import sqlite3
+import stat
+import sys
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from uuid import uuid4
+
+from onelauncher.addons.archive_cache import get_file_hash
+from onelauncher.addons.transactions import StagingFolder
+
+# Smaller files take up a single filesystem block at most, which isn't worth
+# hashing them for
+MIN_FILE_SIZE = 4096
+# Linux ioctl that makes a file share the data of another. See
+# ioctl_ficlone(2).
+FICLONE = 0x40049409
+WRITE_PERMISSIONS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+# Errors from filesystems that can't link the files
+UNSUPPORTED_LINK_ERRORS = {
+    errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOTTY, errno.EINVAL,
+    errno.ENOSYS, errno.EPERM, errno.EMLINK}
+
+
+@lru_cache(maxsize=None)
+def _get_libc() -> ctypes.CDLL:
+    return ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+
+def reflink(source: Path, destination: Path) -> bool:
+    """Makes destination a copy of source that shares its data until one of
+       them is written to. destination must not exist.
+
+    Returns:
+        bool: False if the platform or filesystem doesn't support reflinks.
+    """
+    if sys.platform == "darwin":
+        if _get_libc().clonefile(
+                os.fsencode(source), os.fsencode(destination), 0) == 0:
+            return True
+        error = ctypes.get_errno()
+        if error in UNSUPPORTED_LINK_ERRORS:
+            return False
+        raise OSError(error, os.strerror(error), str(destination))
+    elif not sys.platform.startswith("linux"):
+        return False
+
+    import fcntl
+    with source.open("rb") as source_file, destination.open(
+            "xb") as destination_file:
+        try:
+            fcntl.ioctl(
+                destination_file.fileno(), FICLONE, source_file.fileno())
+            return True
+        except OSError as error:
+            destination.unlink()
+            if error.errno in UNSUPPORTED_LINK_ERRORS:
+                return False
+            raise
+
+
+def hardlink(source: Path, destination: Path) -> bool:
+    """Makes destination another name for source. destination must not
+       exist.
+
+    Returns:
+        bool: False on Windows or if the filesystem doesn't support it.
+    """
+    if os.name == "nt":
+        return False
+
+    try:
+        os.link(source, destination)
+    except OSError as error:
+        if error.errno in UNSUPPORTED_LINK_ERRORS:
+            return False
+        raise
+    return True
+
+
+def get_linkable_files(folder: Path) -> Iterator[Path]:
+    """Yields files in folder that can be linked to the store. Compendium
+       files are left out, since they are rewritten when addons are
+       installed.
+    """
+    for directory, _, file_names in os.walk(folder):
+        for file_name in file_names:
+            if not file_name.endswith("compendium"):
+                yield Path(directory) / file_name
+
+
+class LinkResult():
+    """Files that were linked to the store by `AddonFileStore.link_files`"""
+
+    def __init__(self) -> None:
+        self.linked_files = 0
+        # Size of the files that were replaced with a link to a copy that
+        # was already in the store
+        self.saved_bytes = 0
+        # Old and new mtime of the files that were replaced with a hardlink.
+        # They get the mtime of the store's copy.
+        self.changed_mtimes: Dict[Path, Tuple[int, int]] = {}
+
+    def add(self, other: "LinkResult") -> None:
+        self.linked_files += other.linked_files
+        self.saved_bytes += other.saved_bytes
+        self.changed_mtimes.update(other.changed_mtimes)
+
+
+class AddonFileStore():
+    """
+    Shared store for addon files. See the module docstring. Files that were
+    linked are indexed by their size, mtime, and inode, so they're only
+    hashed again once they change.
+
+    The store has its own database like `AddonArchiveCache`, so it can be
+    used from any thread.
+    """
+    TABLE_NAME = "addon_store_files"
+
+    def __init__(self, store_dir: Path) -> None:
+        """
+        Args:
+            store_dir (Path): Folder for the stored files and their index.
+        """
+        self.store_dir = store_dir
+        self.lock = threading.Lock()
+
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.TABLE_NAME} ("
+                "Path TEXT PRIMARY KEY, Size INTEGER, MTime INTEGER, "
+                "Inode INTEGER, Hash TEXT)")
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.TABLE_NAME}_hash "
+                f"ON {self.TABLE_NAME} (Hash)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Yields connection to the index. Changes are committed at the end."""
+        conn = sqlite3.connect(str(self.store_dir / "index.sqlite"))
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _get_stored_file_path(self, file_hash: str) -> Path:
+        return self.store_dir / file_hash[:2] / file_hash
+
+    def link_files(
+            self,
+            paths: Iterable[Path],
+            staging_dir: Path) -> LinkResult:
+        """Replaces files with links to their copy in the store. Files that
+           aren't in the store yet are added to it. Files smaller than
+           `MIN_FILE_SIZE` and ones that are already linked are skipped.
+
+        Args:
+            paths (Iterable[Path]): Files to link.
+            staging_dir (Path): Folder on the same filesystem as paths. Links
+                                are made in a `StagingFolder` there and then
+                                renamed over the files, so a file is never
+                                missing.
+        """
+        result = LinkResult()
+        with self.lock, self._connect() as conn, StagingFolder(
+                staging_dir, "links_") as links_dir:
+            for path in paths:
+                try:
+                    self._link_file(conn, path, links_dir, result)
+                except OSError as error:
+                    logger.warning(f"Couldn't link {path}: {error}")
+
+        if result.linked_files:
+            logger.info(
+                f"Linked {result.linked_files} addon files to the file "
+                f"store. {result.saved_bytes} bytes were saved.")
+        return result
+
+    def _link_file(
+            self,
+            conn: sqlite3.Connection,
+            path: Path,
+            links_dir: Path,
+            result: LinkResult) -> None:
+        file_stat = path.lstat()
+        if (not stat.S_ISREG(file_stat.st_mode) or
+                file_stat.st_size < MIN_FILE_SIZE):
+            return
+
+        stat_key = (file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino)
+        row = conn.execute(
+            f"SELECT Size, MTime, Inode FROM {self.TABLE_NAME} "
+            "WHERE Path = ?", (str(path),)).fetchone()
+        if row == stat_key:
+            return
+
+        file_hash = get_file_hash(path)
+        # The file's contents could have changed while it was hashed
+        if _get_stat_key(path.lstat()) != stat_key:
+            return
+
+        stored_file = self._get_stored_file_path(file_hash)
+        stored_file_stat = self._get_stored_file_stat(
+            stored_file, file_stat.st_size)
+        if stored_file_stat is None:
+            # The first copy of a file becomes the store's
+            stored_file.parent.mkdir(exist_ok=True)
+            if not reflink(path, stored_file):
+                if not hardlink(path, stored_file):
+                    return
+                # The file and the store's copy are the same file now
+                os.chmod(
+                    path, stat.S_IMODE(file_stat.st_mode) & ~WRITE_PERMISSIONS)
+            result.linked_files += 1
+        elif (stored_file_stat.st_dev, stored_file_stat.st_ino) == (
+                file_stat.st_dev, file_stat.st_ino):
+            # Hardlinked already, but the index doesn't have it under this
+            # path. Files linked while being installed are like this if
+            # `move_files` wasn't used for them.
+            pass
+        else:
+            link = links_dir / uuid4().hex
+            if reflink(stored_file, link):
+                os.chmod(link, stat.S_IMODE(file_stat.st_mode))
+                # Manifests and file indexes go by mtime
+                os.utime(link, ns=(file_stat.st_atime_ns,
+                                   file_stat.st_mtime_ns))
+            elif hardlink(stored_file, link):
+                result.changed_mtimes[path] = (
+                    file_stat.st_mtime_ns, stored_file_stat.st_mtime_ns)
+            else:
+                return
+
+            if _get_stat_key(path.lstat()) != stat_key:
+                link.unlink()
+                result.changed_mtimes.pop(path, None)
+                return
+            os.replace(link, path)
+            result.linked_files += 1
+            result.saved_bytes += file_stat.st_size
+
+        conn.execute(
+            f"REPLACE INTO {self.TABLE_NAME} VALUES(?,?,?,?,?)",
+            (str(path), *_get_stat_key(path.lstat()), file_hash))
+
+    def move_files(self, source_folder: Path, destination_folder: Path) -> None:
+        """Updates the index after the linked files in source_folder were
+           moved into destination_folder, like when an addon that was linked
+           in the staging folder is installed
+        """
+        # Range query like `AddonFileIndex`
+        start = str(source_folder).rstrip(os.sep) + os.sep
+        end = start[:-1] + chr(ord(os.sep) + 1)
+        with self.lock, self._connect() as conn:
+            conn.execute(
+                f"UPDATE OR REPLACE {self.TABLE_NAME} "
+                "SET Path = ? || substr(Path, ?) WHERE Path >= ? AND Path < ?",
+                (str(destination_folder).rstrip(os.sep) + os.sep,
+                 len(start) + 1, start, end))
+
+    def _get_stored_file_stat(
+            self,
+            stored_file: Path,
+            size: int) -> Optional[os.stat_result]:
+        """Returns stat of a stored file or None if it isn't in the store.
+           Hardlinked files that were made writable again could have been
+           edited, so they are removed from the store. The links to them
+           in addon folders stay as they are.
+        """
+        try:
+            stored_file_stat = stored_file.lstat()
+        except FileNotFoundError:
+            return None
+
+        if stored_file_stat.st_size != size or (
+                stored_file_stat.st_nlink > 1 and
+                stored_file_stat.st_mode & WRITE_PERMISSIONS):
+            logger.warning(
+                f"{stored_file.name} was changed outside of the addon file "
+                "store. It's removed from the store.")
+            stored_file.unlink()
+            return None
+        return stored_file_stat
+
+    def prune(self) -> int:
+        """Removes stored files that nothing links to anymore, and forgets
+           linked files that were changed or removed
+
+        Returns:
+            int: Number of stored files that were removed.
+        """
+        with self.lock, self._connect() as conn:
+            used_hashes = set()
+            forgotten_paths = []
+            for path, size, mtime, inode, file_hash in conn.execute(
+                    f"SELECT Path, Size, MTime, Inode, Hash "
+                    f"FROM {self.TABLE_NAME}").fetchall():
+                try:
+                    stat_key = _get_stat_key(os.lstat(path))
+                except FileNotFoundError:
+                    stat_key = None
+                if (stat_key != (size, mtime, inode) or
+                        not self._get_stored_file_path(file_hash).exists()):
+                    forgotten_paths.append(path)
+                else:
+                    used_hashes.add(file_hash)
+            conn.executemany(
+                f"DELETE FROM {self.TABLE_NAME} WHERE Path = ?",
+                [(path,) for path in forgotten_paths])
+
+            removed = 0
+            for stored_file in self.store_dir.glob("??/*"):
+                # Hardlinked files are still used by whatever links to them,
+                # even if the index doesn't have it
+                if (stored_file.name not in used_hashes and
+                        stored_file.stat().st_nlink == 1):
+                    stored_file.unlink()
+                    removed += 1
+
+        if removed:
+            logger.info(f"Removed {removed} unused files from the file store")
+        return removed
+
+
+def _get_stat_key(file_stat: os.stat_result) -> Tuple[int, int, int]:
+    return file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino
+
+
+logger = logging.getLogger("main")
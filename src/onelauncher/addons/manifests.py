@@ -0,0 +1,225 @@
+import logging
+import sqlite3
+import zlib
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from onelauncher.addons.database import MANIFESTS_TABLE_NAME
+from onelauncher.addons.extraction import ExtractionPlan
+from onelauncher.addons.transactions import AddonTransaction
+
+# Files that are extracted even when they haven't changed. Compendium files
+# are rewritten on every install, and the .plugin files in the author folder
+# are needed to write the descriptors of a plugin's compendium file.
+ALWAYS_EXTRACTED_SUFFIXES = (".plugin", "compendium")
+
+# Bytes read at a time when checking the CRC of an installed file
+CRC_CHUNK_SIZE = 1024 * 1024
+
+# Size and CRC of an archive member, and mtime of the file it was installed as
+ManifestEntry = Tuple[int, int, int]
+
+
+class AddonManifest():
+    """
+    Files an installed addon got from its archive. Updates compare the new
+    archive's central directory to the manifest, so only files that changed
+    are extracted and files that aren't in the new version are removed.
+    """
+
+    def __init__(
+            self,
+            addon_type: str,
+            addon_folder: Path,
+            files: Dict[PurePosixPath, ManifestEntry]) -> None:
+        """
+        Args:
+            addon_type (str): "Plugin", "Music", or "Skin".
+            addon_folder (Path): Plugins, music, or skins folder of the game
+                                 the addon is installed to.
+            files (Dict[PurePosixPath, ManifestEntry]): Entry for each path
+                                                        in addon_folder.
+        """
+        self.addon_type = addon_type
+        self.addon_folder = addon_folder
+        self.files = files
+
+
+def get_manifest(
+        cursor: sqlite3.Cursor,
+        addon_type: str,
+        addon_folder: Path,
+        interface_id: str) -> Optional[AddonManifest]:
+    """Returns manifest of an installed addon or None if it doesn't have one.
+       Addons that were installed before manifests were recorded don't.
+    """
+    files = {
+        PurePosixPath(path): (size, crc, mtime)
+        for path, size, crc, mtime in cursor.execute(
+            f"SELECT Path, Size, CRC, MTime FROM {MANIFESTS_TABLE_NAME} "  # nosec
+            "WHERE AddonFolder = ? AND InterfaceID = ?",
+            (str(addon_folder), interface_id))}
+    if not files:
+        return None
+    return AddonManifest(addon_type, addon_folder, files)
+
+
+def get_installed_files(
+        addon_folder: Path,
+        plan: ExtractionPlan) -> Dict[PurePosixPath, ManifestEntry]:
+    """Returns manifest entries for the members of plan that are installed
+       in addon_folder. Members that weren't installed are left out.
+    """
+    files = {}
+    for path, zip_info in plan.members.items():
+        try:
+            stat = addon_folder.joinpath(path).stat()
+        except FileNotFoundError:
+            continue
+        files[path] = (zip_info.file_size, zip_info.CRC, stat.st_mtime_ns)
+    return files
+
+
+def get_interface_ids(
+        cursor: sqlite3.Cursor,
+        addon_folder: Path) -> List[str]:
+    """Returns interface IDs of the addons in addon_folder with a manifest"""
+    return [interface_id for interface_id, in cursor.execute(
+        f"SELECT DISTINCT InterfaceID FROM {MANIFESTS_TABLE_NAME} "  # nosec
+        "WHERE AddonFolder = ? ORDER BY InterfaceID", (str(addon_folder),))]
+
+
+def set_manifest(
+        cursor: sqlite3.Cursor,
+        addon_folder: Path,
+        interface_id: str,
+        files: Dict[PurePosixPath, ManifestEntry]) -> None:
+    """Replaces the manifest of an addon. Doesn't commit."""
+    delete_manifest(cursor, addon_folder, interface_id)
+    cursor.executemany(
+        f"INSERT INTO {MANIFESTS_TABLE_NAME} VALUES(?,?,?,?,?,?)",  # nosec
+        ((str(addon_folder), interface_id, str(path), *entry)
+         for path, entry in files.items()))
+
+
+def delete_manifest(
+        cursor: sqlite3.Cursor,
+        addon_folder: Path,
+        interface_id: str) -> None:
+    """Deletes the manifest of an addon. Doesn't commit."""
+    cursor.execute(
+        f"DELETE FROM {MANIFESTS_TABLE_NAME} "  # nosec
+        "WHERE AddonFolder = ? AND InterfaceID = ?",
+        (str(addon_folder), interface_id))
+
+
+def update_mtimes(
+        cursor: sqlite3.Cursor,
+        addon_folder: Path,
+        mtimes: Dict[PurePosixPath, Tuple[int, int]]) -> None:
+    """Changes the mtimes of files in the manifests of addon_folder from the
+       old to the new mtime. Entries of files that were edited since they
+       were installed are left alone, so the edits are still found. Doesn't
+       commit.
+    """
+    cursor.executemany(
+        f"UPDATE {MANIFESTS_TABLE_NAME} SET MTime = ? "  # nosec
+        "WHERE AddonFolder = ? AND Path = ? AND MTime = ?",
+        ((new_mtime, str(addon_folder), str(path), old_mtime)
+         for path, (old_mtime, new_mtime) in mtimes.items()))
+
+
+def get_unchanged_paths(
+        plan: ExtractionPlan,
+        manifest: AddonManifest) -> Set[PurePosixPath]:
+    """Returns members of plan that don't have to be extracted, because the
+       installed file is the same. A member is the same when its size and CRC
+       match the manifest, and the installed file still has the size and
+       mtime it was installed with. The mtime check catches files that were
+       edited or restored by a rollback.
+    """
+    if plan.addon_type != manifest.addon_type:
+        return set()
+
+    unchanged_paths = set()
+    for path, zip_info in plan.members.items():
+        entry = manifest.files.get(path)
+        if (entry is None or path.name.endswith(ALWAYS_EXTRACTED_SUFFIXES) or
+                entry[:2] != (zip_info.file_size, zip_info.CRC)):
+            continue
+
+        try:
+            stat = manifest.addon_folder.joinpath(path).stat()
+        except FileNotFoundError:
+            continue
+        if (stat.st_size, stat.st_mtime_ns) == (entry[0], entry[2]):
+            unchanged_paths.add(path)
+
+    return unchanged_paths
+
+
+def get_removed_paths(
+        plan: ExtractionPlan,
+        manifest: AddonManifest) -> List[PurePosixPath]:
+    """Returns files in manifest that aren't in the new version of the addon"""
+    if plan.addon_type != manifest.addon_type:
+        return sorted(manifest.files)
+    return sorted(path for path in manifest.files if path not in plan.members)
+
+
+def _get_file_crc(path: Path) -> int:
+    crc = 0
+    with path.open("rb") as file:
+        for chunk in iter(lambda: file.read(CRC_CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def verify_manifest(manifest: AddonManifest) -> Dict[PurePosixPath, str]:
+    """Checks the installed files of an addon against its manifest. Files
+       are compared by size and CRC, so edits that keep the mtime are found
+       too. Compendium files are skipped, since they are generated when
+       installing.
+
+    Returns:
+        Dict[PurePosixPath, str]: "missing" or "modified" for each file that
+                                  isn't the way it was installed.
+    """
+    problems = {}
+    for path, (size, crc, _) in sorted(manifest.files.items()):
+        if path.name.endswith("compendium"):
+            continue
+
+        installed_path = manifest.addon_folder.joinpath(path)
+        try:
+            if (installed_path.stat().st_size != size or
+                    _get_file_crc(installed_path) != crc):
+                problems[path] = "modified"
+        except (FileNotFoundError, IsADirectoryError):
+            problems[path] = "missing"
+
+    return problems
+
+
+def remove_files(
+        transaction: AddonTransaction,
+        addon_folder: Path,
+        paths: Iterable[PurePosixPath]) -> None:
+    """Removes paths in addon_folder with transaction. Folders that are left
+       empty are removed too.
+    """
+    folders = set()
+    for path in paths:
+        transaction.remove(addon_folder.joinpath(path))
+        folders.update(path.parents)
+
+    # Deepest folders first, so their parents can be empty afterwards
+    for folder in sorted(folders, key=lambda folder: len(folder.parts),
+                         reverse=True):
+        folder = addon_folder.joinpath(folder)
+        if (folder != addon_folder and folder.is_dir() and
+                not any(folder.iterdir())):
+            transaction.remove(folder)
+
+
+logger = logging.getLogger("main")
@@ -0,0 +1,67 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from pathlib import Path
+from functools import partial
+from typing import Callable, Dict, List, Optional, TypeVar
+
+# Starting a worker process takes about as long as parsing a few hundred
+# files, so each worker needs at least this many files to be worth it.
+# Smaller batches are parsed in the calling process.
+MIN_FILES_PER_PARSE_WORKER = 500
+
+T = TypeVar("T")
+
+
+def _parse_file(
+        parse_file: Callable[[Path], T],
+        error_result: Optional[T],
+        file: Path) -> T:
+    try:
+        return parse_file(file)
+    except Exception:
+        if error_result is None:
+            raise
+        logger.warning(f"Couldn't parse {file}", exc_info=True)
+        return error_result
+
+
+def parse_files(
+        parse_file: Callable[[Path], T],
+        files: List[Path],
+        error_result: Optional[T] = None) -> Dict[Path, T]:
+    """Parses files with parse_file. Large batches are spread across a pool
+       of worker processes, since parsing is CPU bound. parse_file has to be
+       a module level function, so it can be sent to the workers.
+
+    Args:
+        parse_file (Callable[[Path], T]): Parses one file.
+        files (List[Path]): Files to parse.
+        error_result (Optional[T], optional): Result for files that
+            parse_file raises an exception for. The exception is raised
+            instead if this is None. Defaults to None.
+    """
+    parse_file = partial(_parse_file, parse_file, error_result)
+    workers = min(os.cpu_count() or 1, len(files) // MIN_FILES_PER_PARSE_WORKER)
+    if workers > 1:
+        try:
+            # Spawn is used, because forking a process that has
+            # Qt threads running isn't safe.
+            with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=get_context("spawn")) as executor:
+                return dict(zip(files, executor.map(
+                    parse_file,
+                    files,
+                    chunksize=max(1, len(files) // (workers * 4)))))
+        except (BrokenProcessPool, OSError):
+            logger.warning(
+                "File parse pool failed. Parsing files serially.",
+                exc_info=True)
+
+    return {file: parse_file(file) for file in files}
+
+
+logger = logging.getLogger("main")
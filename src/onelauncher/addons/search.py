@@ -0,0 +1,78 @@
+import re
+import sqlite3
+from typing import List
+
+from onelauncher.addons.database import (
+    ABC_FILES_TABLE_NAME, get_fts_table_name)
+
+# bm25 weights for the columns of the addon search indexes
+# (`database.FTS_COLUMNS`). Matches in the name count the most.
+RANK_WEIGHTS = [10.0, 2.0, 5.0]
+# bm25 weights for the ABC index (`database.ABC_FILES_FTS_COLUMNS`)
+ABC_RANK_WEIGHTS = [10.0, 5.0, 2.0]
+# Addon tables with rows for loose .abc files. Searches of them also match
+# the metadata of those files in the ABC index.
+ABC_FILE_TABLE_NAMES = ["tableMusicInstalled"]
+
+
+def get_match_query(text: str) -> str:
+    """Returns FTS5 query for the words in a search. Each word is matched
+       as a prefix, so results show up while the word is still being
+       typed. Rows with any of the words match, and rows with more of them
+       rank higher.
+
+       Words are quoted, so FTS5 syntax like AND, NEAR, or * in the search
+       is matched as text. An empty string is returned if the search has
+       no words to match.
+    """
+    phrases = [
+        '"{}"*'.format(word.replace('"', '""'))
+        for word in text.split()
+        # Punctuation isn't indexed. A word without anything else can't match.
+        if re.search(r"\w", word)]
+    return " OR ".join(phrases)
+
+
+def get_match_join(table_name: str) -> str:
+    """Returns JOIN clause that limits table_name to rows matching the MATCH
+       query given as the first parameter. It adds a `Rank` column that puts
+       the best matches first when sorted by. The parameter is numbered, so
+       it can be used more than once. Parameters after it in the same
+       statement are numbered from 2.
+    """
+    fts_table = get_fts_table_name(table_name)
+    weights = ", ".join(str(weight) for weight in RANK_WEIGHTS)
+    matches = (
+        f"SELECT rowid AS MatchID, bm25({fts_table}, {weights}) AS Rank "
+        f"FROM {fts_table} WHERE {fts_table} MATCH ?1")
+    if table_name in ABC_FILE_TABLE_NAMES:
+        abc_fts_table = get_fts_table_name(ABC_FILES_TABLE_NAME)
+        abc_weights = ", ".join(str(weight) for weight in ABC_RANK_WEIGHTS)
+        # Rows can match both indexes. Their best rank is used.
+        matches = (
+            f"SELECT MatchID, MIN(Rank) AS Rank FROM ({matches} UNION ALL "
+            f"SELECT {table_name}.rowid, bm25({abc_fts_table}, {abc_weights}) "
+            f"FROM {abc_fts_table} JOIN {ABC_FILES_TABLE_NAME} "
+            f"ON {ABC_FILES_TABLE_NAME}.rowid = {abc_fts_table}.rowid "
+            f"JOIN {table_name} ON {table_name}.File = "
+            f"{ABC_FILES_TABLE_NAME}.Path "
+            f"WHERE {abc_fts_table} MATCH ?1) GROUP BY MatchID")
+    return f"JOIN ({matches}) ON {table_name}.rowid = MatchID"
+
+
+def search_table(
+        cursor: sqlite3.Cursor,
+        table_name: str,
+        text: str) -> List[tuple]:
+    """Returns rows with their rowid from an addon table that match a search,
+       best matches first. All rows are returned if the search is empty.
+    """
+    match_query = get_match_query(text)
+    if not match_query:
+        return cursor.execute(
+            f"SELECT rowid, * FROM {table_name}").fetchall()  # nosec
+
+    return cursor.execute(
+        f"SELECT {table_name}.rowid, {table_name}.* FROM {table_name} "  # nosec
+        f"{get_match_join(table_name)} ORDER BY Rank",
+        (match_query,)).fetchall()
@@ -0,0 +1,276 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from shutil import rmtree
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from onelauncher.addons.file_locks import FileLock
+
+JOURNAL_FILE_NAME = "journal"
+# Folders are locked with a lock file next to them with this suffix
+LOCK_FILE_SUFFIX = ".lock"
+
+
+def _get_lock_path(path: Path) -> Path:
+    return path.with_name(path.name + LOCK_FILE_SUFFIX)
+
+
+def _remove_path(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        rmtree(path)
+    else:
+        path.unlink(missing_ok=True)
+
+
+def _undo_operation(operation: dict) -> None:
+    path = Path(operation["path"])
+    if operation["action"] == "created":
+        if path.exists() or path.is_symlink():
+            _remove_path(path)
+        return
+
+    # "replaced" and "removed" operations have a backup. If it doesn't
+    # exist, the operation never got to moving the original.
+    backup = Path(operation["backup"])
+    if not backup.exists() and not backup.is_symlink():
+        return
+    if path.exists() or path.is_symlink():
+        _remove_path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    backup.replace(path)
+
+
+class StagingFolder():
+    """
+    Folder in a staging folder for work in progress, like a transaction or an
+    extracted addon. It's locked until it's removed, so `recover_transactions`
+    leaves it alone, even when called by another process.
+    """
+
+    def __init__(self, staging_dir: Path, prefix: str = "tmp_") -> None:
+        staging_dir.mkdir(parents=True, exist_ok=True)
+        self.path = staging_dir / f"{prefix}{uuid4().hex}"
+        # Locked before the folder exists, so recovery never sees it unlocked
+        self.lock = FileLock(_get_lock_path(self.path))
+        self.lock.acquire()
+        try:
+            self.path.mkdir()
+        except BaseException:
+            self.lock.release()
+            raise
+
+    def remove(self) -> None:
+        rmtree(self.path, ignore_errors=True)
+        self.lock.release()
+
+    def __enter__(self) -> Path:
+        return self.path
+
+    def __exit__(self, *_) -> None:
+        self.remove()
+
+
+class StagingDirLock():
+    """
+    Lock on a staging folder and the addon folders it's for. It's held by the
+    addon manager and `AddonEngine` for as long as they're open, so only one
+    process changes the addons of a game at a time. Within a process, it can
+    be held more than once, like by the addon manager and the engines of
+    `batch_updates`. Those are kept apart by the addon manager's jobs.
+    """
+    # Lock file and number of holders in this process of each held lock
+    _held_locks: Dict[str, Tuple[FileLock, int]] = {}
+    _held_locks_lock = threading.Lock()
+
+    def __init__(self, staging_dir: Path) -> None:
+        self.lock_path = _get_lock_path(Path(os.path.realpath(staging_dir)))
+        self.is_held = False
+
+    def acquire(self) -> bool:
+        """Returns False if another process holds the lock"""
+        if self.is_held:
+            return True
+
+        key = os.path.normcase(self.lock_path)
+        with self._held_locks_lock:
+            file_lock, holders = self._held_locks.get(
+                key, (FileLock(self.lock_path), 0))
+            if not holders:
+                self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+                if not file_lock.acquire(blocking=False):
+                    return False
+            self._held_locks[key] = (file_lock, holders + 1)
+        self.is_held = True
+        return True
+
+    def release(self) -> None:
+        if not self.is_held:
+            return
+
+        key = os.path.normcase(self.lock_path)
+        with self._held_locks_lock:
+            file_lock, holders = self._held_locks.pop(key)
+            if holders > 1:
+                self._held_locks[key] = (file_lock, holders - 1)
+            else:
+                file_lock.release()
+        self.is_held = False
+
+
+class AddonTransaction():
+    """
+    Changes to the addon folders that are applied with atomic renames and
+    can be rolled back as a whole. Replaced and removed files are moved into
+    the transaction's folder instead of being deleted, so rolling back only
+    needs renames too.
+
+    Every change is written to a journal before it is made. Transactions
+    that were interrupted by a crash are rolled back by
+    `recover_transactions` the next time the addon manager starts.
+    Transactions aren't thread-safe, but can be used from different threads
+    one at a time.
+    """
+
+    def __init__(self, staging_dir: Path) -> None:
+        """
+        Args:
+            staging_dir (Path): Folder for the transaction's own folder. It
+                                has to be on the same filesystem as the
+                                folders that are changed.
+        """
+        self.staging_dir = staging_dir
+        # Created with the first change
+        self.staging_folder: Optional[StagingFolder] = None
+        self.transaction_dir: Optional[Path] = None
+        self.operations: List[dict] = []
+
+    @property
+    def removes_files(self) -> bool:
+        """Whether the transaction replaces or removes anything"""
+        return any(
+            operation["action"] != "created" for operation in self.operations)
+
+    def _record(self, action: str, path: Path) -> Optional[Path]:
+        """Writes operation to the journal and returns the path to back up
+           the original at for "replaced" and "removed" operations
+        """
+        if self.staging_folder is None:
+            self.staging_folder = StagingFolder(
+                self.staging_dir, "transaction_")
+            self.transaction_dir = self.staging_folder.path
+
+        operation = {"action": action, "path": str(path)}
+        backup = None
+        if action != "created":
+            backup = self.transaction_dir / str(len(self.operations))
+            operation["backup"] = str(backup)
+
+        with (self.transaction_dir / JOURNAL_FILE_NAME).open(
+                "a", encoding="utf-8") as journal:
+            journal.write(json.dumps(operation) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        self.operations.append(operation)
+        return backup
+
+    def move_into(self, source: Path, destination: Path) -> None:
+        """Moves source to destination by renaming. Folders are merged into
+           existing ones. Existing files are replaced and kept until the
+           transaction is committed.
+        """
+        if source.is_dir() and destination.is_dir():
+            for path in list(source.iterdir()):
+                self.move_into(path, destination / path.name)
+            source.rmdir()
+        elif destination.exists() or destination.is_symlink():
+            backup = self._record("replaced", destination)
+            destination.replace(backup)
+            source.replace(destination)
+        else:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            self._record("created", destination)
+            source.replace(destination)
+
+    def remove(self, path: Path) -> None:
+        """Removes path. It is kept until the transaction is committed."""
+        if not path.exists() and not path.is_symlink():
+            return
+
+        backup = self._record("removed", path)
+        path.replace(backup)
+
+    def commit(self) -> None:
+        """Deletes the backups of replaced and removed files"""
+        if self.staging_folder is None:
+            return
+
+        # Without the journal, the transaction is never rolled back
+        (self.staging_folder.path / JOURNAL_FILE_NAME).unlink()
+        self._remove_staging_folder()
+
+    def rollback(self) -> None:
+        """Undoes all changes in reverse order"""
+        if self.staging_folder is None:
+            return
+
+        for operation in reversed(self.operations):
+            _undo_operation(operation)
+        self._remove_staging_folder()
+
+    def _remove_staging_folder(self) -> None:
+        self.staging_folder.remove()
+        self.staging_folder = None
+        self.transaction_dir = None
+        self.operations = []
+
+
+def recover_transactions(staging_dir: Path) -> int:
+    """Rolls back transactions in staging_dir that were never finished and
+       removes anything else left there, like partial extractions. Folders
+       that are still locked by a `StagingFolder` are in use and left alone.
+
+    Returns:
+        int: Number of transactions that were rolled back.
+    """
+    if not staging_dir.exists():
+        return 0
+
+    # Lock files can be left without their folder by a crash
+    names = {path.name[:-len(LOCK_FILE_SUFFIX)]
+             if path.name.endswith(LOCK_FILE_SUFFIX) else path.name
+             for path in staging_dir.iterdir()}
+    rolled_back = 0
+    for name in sorted(names):
+        path = staging_dir / name
+        lock = FileLock(_get_lock_path(path))
+        if not lock.acquire(blocking=False):
+            continue
+
+        try:
+            journal = path / JOURNAL_FILE_NAME
+            if journal.exists():
+                operations = []
+                for line in journal.read_text(encoding="utf-8").splitlines():
+                    try:
+                        operations.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Last line was only partly written. Its operation
+                        # wasn't started yet.
+                        break
+                for operation in reversed(operations):
+                    _undo_operation(operation)
+                rolled_back += 1
+                logger.warning(
+                    f"Rolled back unfinished addon transaction {path}")
+
+            if path.exists() or path.is_symlink():
+                _remove_path(path)
+        finally:
+            lock.release()
+
+    return rolled_back
+
+logger = logging.getLogger("main")
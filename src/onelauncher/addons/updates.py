@@ -0,0 +1,79 @@
+import logging
+import sqlite3
+from typing import Iterable, List
+
+from onelauncher.addons.database import UPDATE_AVAILABLE_COLUMN
+
+
+def get_remote_table_name(installed_table_name: str) -> str:
+    """Returns name of the remote table for an installed addon table"""
+    return installed_table_name[:-len("Installed")]
+
+
+def get_update_plan(
+        cursor: sqlite3.Cursor,
+        installed_table_names: Iterable[str]) -> List[tuple]:
+    """Returns installed addons that have a newer version in their remote
+       table. Versions are compared with `versions.compare_versions`. All of
+       the tables are checked with a single query that joins each installed
+       table to its remote table on the interface ID index.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor for a connection from
+                                 `database.connect`.
+        installed_table_names (Iterable[str]): Installed addon tables.
+
+    Returns:
+        List[tuple]: Installed table name, rowid, InterfaceID, File, and Name
+                     of the installed addon, followed by the rowid and Version
+                     of the remote addon for each update.
+    """
+    selects = [
+        f"SELECT '{table}', {table}.rowid, {table}.InterfaceID, "  # nosec
+        f"{table}.File, {table}.Name, {remote_table}.rowid, "
+        f"{remote_table}.Version FROM {table} JOIN {remote_table} "
+        f"ON {remote_table}.InterfaceID = {table}.InterfaceID "
+        f"WHERE {table}.InterfaceID != '' AND "
+        f"compare_versions({remote_table}.Version, {table}.Version) > 0"
+        for table, remote_table in
+        ((table, get_remote_table_name(table))
+         for table in installed_table_names)]
+    if not selects:
+        return []
+
+    return cursor.execute(" UNION ALL ".join(selects)).fetchall()
+
+
+def mark_updates(
+        cursor: sqlite3.Cursor,
+        installed_table_names: Iterable[str]) -> List[tuple]:
+    """Sets `UPDATE_AVAILABLE_COLUMN` for the addons in the update plan and
+       clears it for all others. Doesn't commit.
+
+    Returns:
+        List[tuple]: The update plan. See `get_update_plan`.
+    """
+    installed_table_names = list(installed_table_names)
+    plan = get_update_plan(cursor, installed_table_names)
+    for table in installed_table_names:
+        for table_name in (table, get_remote_table_name(table)):
+            cursor.execute(
+                f"UPDATE {table_name} SET {UPDATE_AVAILABLE_COLUMN} = 0 "  # nosec
+                f"WHERE {UPDATE_AVAILABLE_COLUMN}")
+
+    for table in installed_table_names:
+        table_updates = [update for update in plan if update[0] == table]
+        cursor.executemany(
+            f"UPDATE {table} SET {UPDATE_AVAILABLE_COLUMN} = 1 "  # nosec
+            "WHERE rowid = ?",
+            [(update[1],) for update in table_updates])
+        cursor.executemany(
+            f"UPDATE {get_remote_table_name(table)} "  # nosec
+            f"SET {UPDATE_AVAILABLE_COLUMN} = 1 WHERE rowid = ?",
+            [(update[5],) for update in table_updates])
+
+    logger.debug(f"Found {len(plan)} addon updates")
+    return plan
+
+
+logger = logging.getLogger("main")
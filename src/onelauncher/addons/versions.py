@@ -0,0 +1,69 @@
+import re
+from functools import lru_cache
+from itertools import zip_longest
+from typing import Tuple
+
+# Words that mark a version as coming before the release it is for, in
+# order. Other words, like the "a" in "1.2a", are taken to come after it.
+PRE_RELEASE_WORDS = ["dev", "alpha", "beta", "pre", "rc"]
+
+# Ranks of the parts of a version key. Each part of a version is a number,
+# a pre-release word, or any other word. The end of a shorter version is
+# compared as `_END`, so "1.2" comes after "1.2 beta", but before "1.2a".
+_PRE_RELEASE = 0
+_END = 1
+_WORD = 2
+_NUMBER = 3
+
+VersionKey = Tuple[Tuple[int, int, str], ...]
+
+
+@lru_cache(maxsize=4096)
+def get_version_key(version: str) -> VersionKey:
+    """Returns the parts of an addon version that `compare_versions` goes
+       through. Numbers are compared numerically, so "1.10" is after "1.9".
+       Anything before the first number, like "v" or "Version ", is ignored.
+       Separators don't matter, so "1.2.0" and "1-2-0" are the same version.
+       Dates written year first compare correctly too.
+    """
+    version = version.strip().lower()
+    first_digit = re.search(r"\d", version)
+    if first_digit:
+        version = version[first_digit.start():]
+
+    key = []
+    for part in re.findall(r"\d+|[^\W\d_]+", version):
+        if part.isdigit():
+            key.append((_NUMBER, int(part), ""))
+        elif part in PRE_RELEASE_WORDS:
+            key.append((_PRE_RELEASE, PRE_RELEASE_WORDS.index(part), ""))
+        else:
+            key.append((_WORD, 0, part))
+    return tuple(key)
+
+
+def compare_versions(version: str, other_version: str) -> int:
+    """Returns -1, 0, or 1 if version comes before, is the same as, or comes
+       after other_version. Also used as the `VERSION` SQLite collation and
+       the `compare_versions` SQL function.
+    """
+    for part, other_part in zip_longest(
+            get_version_key(version or ""),
+            get_version_key(other_version or "")):
+        # Missing numbers are zeros, so "1.2" is the same as "1.2.0"
+        if part is None:
+            part = _get_missing_part(other_part)
+        elif other_part is None:
+            other_part = _get_missing_part(part)
+
+        if part != other_part:
+            return 1 if part > other_part else -1
+
+    return 0
+
+
+def _get_missing_part(other_part: Tuple[int, int, str]) -> Tuple[int, int, str]:
+    """Returns what a version that ended is compared to other_part as"""
+    if other_part[0] == _NUMBER:
+        return (_NUMBER, 0, "")
+    return (_END, 0, "")
@@ -42,6 +42,7 @@ import onelauncher
 from onelauncher import settings
 from onelauncher.settings import Game, game_settings, program_settings
 from onelauncher.addon_manager import AddonManager
+from onelauncher.addons.engine import AddonEngineError
 from onelauncher.game_network_utils import (AuthenticateUser,
                                    GLSDataCenter, JoinWorldQueue,
                                    World, WorldQueueConfig,
@@ -264,7 +265,11 @@ class MainWindow(QtWidgets.QMainWindow):
         winSettings.open()
 
     def btnAddonManagerSelected(self):
-        winAddonManager = AddonManager()
+        try:
+            winAddonManager = AddonManager()
+        except AddonEngineError as error:
+            self.AddLog(str(error), is_error=True)
+            return
         winAddonManager.Run()
         game_settings.save()
 
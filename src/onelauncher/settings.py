@@ -116,6 +116,16 @@ class ProgramSettings():
             "save_accounts_passwords", False)
         self.games_sorting_mode = settings_dict.get(
             "games_sorting_mode", "priority")
+        # Seconds before remote addon feeds are checked for changes again
+        self.remote_addons_cache_ttl: int = settings_dict.get(
+            "remote_addons_cache_ttl", 600)
+        # Maximum size in MiB of the downloaded addon archives cache
+        self.addon_archive_cache_size: int = settings_dict.get(
+            "addon_archive_cache_size", 1024)
+        # Whether installed addon files are linked to the file store shared
+        # by all games. See `addons.file_store`.
+        self.link_addon_files: bool = settings_dict.get(
+            "link_addon_files", False)
 
     def save(self):
         settings_dict = {
@@ -125,6 +135,9 @@ class ProgramSettings():
             "save_accounts": self.save_accounts,
             "save_accounts_passwords": self.save_accounts_passwords,
             "games_sorting_mode": self.games_sorting_mode,
+            "remote_addons_cache_ttl": self.remote_addons_cache_ttl,
+            "addon_archive_cache_size": self.addon_archive_cache_size,
+            "link_addon_files": self.link_addon_files,
         }
 
         rtoml.dump(settings_dict, self.config_path, pretty=True)
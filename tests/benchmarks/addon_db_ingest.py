@@ -0,0 +1,94 @@
+"""
+Benchmark for writing addon rows to the addons cache database. Compares
+the old one `INSERT` per row path with `database.insert_rows` on a
+connection from `database.connect`.
+
+Run with `python tests/benchmarks/addon_db_ingest.py [rows]`.
+"""
+import sqlite3
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, List
+
+from onelauncher.addons import database
+
+COLUMNS = ("Name, Category, Version, Author, LatestRelease, File, "
+           "InterfaceID, Dependencies, StartupScript")
+# Rows per remote feed chunk. See `AddonManager.FEED_ROWS_PER_UI_UPDATE`.
+BATCH_SIZE = 250
+# Number of times each benchmark is run. The fastest run is reported.
+REPEAT = 5
+
+
+def get_rows(count: int) -> List[List[str]]:
+    return [[f"Addon {i}", "Misc", f"1.{i}", f"Author {i % 50}", "2021-08-01",
+             f"https://www.lotrointerface.com/downloads/download{i}",
+             str(i), "0", ""] for i in range(count)]
+
+
+def connect_before(path: Path) -> sqlite3.Connection:
+    """Returns connection to a database with the old FTS5 addon table"""
+    conn = sqlite3.connect(str(path))
+    conn.execute(f"CREATE VIRTUAL TABLE tablePlugins USING FTS5({COLUMNS})")
+    conn.commit()
+    return conn
+
+
+def connect_after(path: Path) -> sqlite3.Connection:
+    """Returns connection to a database with the current schema"""
+    conn = database.connect(path)
+    database.migrate(conn)
+    return conn
+
+
+def insert_one_at_a_time(conn: sqlite3.Connection, rows: List[List[str]]) -> None:
+    c = conn.cursor()
+    for row in rows:
+        question_marks = "?"
+        for _ in range(len(row) - 1):
+            question_marks += ",?"
+        c.execute(f"INSERT INTO tablePlugins VALUES({question_marks})", row)  # nosec
+    conn.commit()
+
+
+def insert_batched(conn: sqlite3.Connection, rows: List[List[str]]) -> None:
+    c = conn.cursor()
+    with conn:
+        for start in range(0, len(rows), BATCH_SIZE):
+            database.insert_rows(
+                c, "tablePlugins", rows[start:start + BATCH_SIZE])
+
+
+def benchmark(
+        connect: Callable[[Path], sqlite3.Connection],
+        insert: Callable[[sqlite3.Connection, List[List[str]]], None],
+        rows: List[List[str]]) -> float:
+    """Returns best rows per second out of `REPEAT` runs of inserting rows
+       into a new database
+    """
+    elapsed_times = []
+    for _ in range(REPEAT):
+        with TemporaryDirectory() as tmp_dir:
+            conn = connect(Path(tmp_dir) / "addons_cache.sqlite")
+
+            start_time = perf_counter()
+            insert(conn, rows)
+            elapsed_times.append(perf_counter() - start_time)
+
+            conn.close()
+    return len(rows) / min(elapsed_times)
+
+
+def main() -> None:
+    rows = get_rows(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
+    before = benchmark(connect_before, insert_one_at_a_time, rows)
+    after = benchmark(connect_after, insert_batched, rows)
+    print(f"{len(rows)} rows")
+    print(f"Before: {before:,.0f} rows/s")
+    print(f"After:  {after:,.0f} rows/s ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Union
+
+import pytest
+
+from onelauncher.addons import database
+from onelauncher.addons.engine import AddonEngine
+
+PLUGIN_FILE = ("<Plugin><Information><Name>{name}</Name>"
+               "<Version>{version}</Version></Information>"
+               "<Package>Author.{name}.Main</Package></Plugin>")
+
+
+def _make_archive(
+        path: Path,
+        files: Union[Dict[str, str], Iterable[str]]) -> Path:
+    if not isinstance(files, dict):
+        files = {name: name for name in files}
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, contents in files.items():
+            archive.writestr(name, contents)
+    return path
+
+
+@pytest.fixture
+def make_archive() -> Callable[..., Path]:
+    """Makes a zip archive at a path. Files are a dict of names and
+       contents or a list of names, which are used as their own contents.
+    """
+    return _make_archive
+
+
+@pytest.fixture
+def add_remote_plugin(tmp_path: Path) -> Callable[..., None]:
+    """Adds a plugin to the remote table of an engine with its archive in the
+       archive cache, so it can be installed without downloading it. The
+       archive has a .plugin file and a Main.lua with the version in it.
+       Files are added to those or replace them.
+    """
+    def add_remote_plugin(
+            engine: AddonEngine,
+            interface_id: str,
+            name: str,
+            version: str,
+            files: Optional[Dict[str, str]] = None) -> None:
+        engine.c.execute(
+            "DELETE FROM tablePlugins WHERE InterfaceID = ?", (interface_id,))
+        database.insert_rows(engine.c, "tablePlugins", [
+            [name, "Misc", version, "Author", "", f"https://example.com/{name}",
+             interface_id, "", ""]])
+        archive = _make_archive(tmp_path / f"{name}{version}.zip", {
+            f"Author/{name}.plugin": PLUGIN_FILE.format(
+                name=name, version=version),
+            f"Author/{name}/Main.lua": version,
+            **(files or {})})
+        engine.archive_cache.release(
+            engine.archive_cache.add(interface_id, version, archive))
+
+    return add_remote_plugin
@@ -0,0 +1,102 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from onelauncher.addons import abc_files, database, search
+
+SONG = """\
+X: 1
+T: Concerning Hobbits - Lute
+Z: Transcribed by Bard
+L: 1/4
+M: 4/4
+Q: 1/4=60
+K: C
+"Am" C D E F | [CEG]2 z2 |
+w: these words are not notes
+X: 2
+T: Concerning Hobbits - Flute
+%%part-name Harp
+L: 1/8
+Q: 120
+K: C
+Z2 | c4 c4 |]
+"""
+
+
+def test_parse_abc_file(tmp_path: Path) -> None:
+    song = tmp_path / "song.abc"
+    song.write_text(SONG)
+
+    assert abc_files.parse_abc_file(song) == {
+        "title": "Concerning Hobbits - Lute",
+        "transcriber": "Bard",
+        "parts": 2,
+        "instruments": ["Lute", "Flute", "Harp"],
+        "tempo": 60,
+        # The first part is 8 beats at 60 bpm. The second is two bars of rest
+        # and 8 eighth notes at 120 quarter notes per minute.
+        "duration": 8,
+    }
+
+    song.write_text("T: Song (3:05)\nK: C\nC D E F |\n")
+    metadata = abc_files.parse_abc_file(song)
+    assert (metadata["parts"], metadata["duration"], metadata["tempo"]) == (
+        1, 185, 0)
+
+
+def test_abc_index_only_parses_changed_files(tmp_path: Path) -> None:
+    conn = database.connect(tmp_path / "addons_cache.sqlite")
+    database.migrate(conn)
+    c = conn.cursor()
+    index = abc_files.AbcIndex(c)
+    music = tmp_path / "Music"
+    (music / "Band").mkdir(parents=True)
+    (music / "Band" / "in_folder.abc").write_text(SONG)
+    (music / "song.abc").write_text(SONG)
+    (music / "other.abc").write_text("T: Other\nK: C\n")
+
+    assert sorted(row[:3] for row in index.scan(music)) == [
+        (str(music / "other.abc"), "Other", ""),
+        (str(music / "song.abc"), "Concerning Hobbits - Lute", "Bard")]
+
+    (music / "other.abc").unlink()
+    (music / "song.abc").write_text("T: Changed\nK: C\n")
+    stat = (music / "song.abc").stat()
+    os.utime(music / "song.abc", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert index.scan(music) == [
+        (str(music / "song.abc"), "Changed", "", 1, "", 0, 0)]
+
+    # Loose files in the music table are found by their ABC metadata
+    database.insert_rows(
+        c, "tableMusicInstalled",
+        [("Song", "Unmanaged", "", "", "", str(music / "song.abc"), "", "",
+          ""),
+         ("Changed Band", "Unmanaged", "", "", "", str(music / "Band"), "",
+          "", "")])
+    assert [row[1] for row in search.search_table(
+        c, "tableMusicInstalled", "changed")] == ["Song", "Changed Band"]
+
+
+def test_malformed_abc_files_are_indexed(
+        tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    song = tmp_path / "song.abc"
+    song.write_text("X:1\nT:Test\nL:1/8\nK:C\nA3/0 B|\n")
+    # A zero denominator is ignored
+    assert abc_files.parse_abc_file(song)["duration"] == 1
+
+    (tmp_path / "broken.abc").write_text("T: Broken\nK: C\n")
+    parse_abc_file = abc_files.parse_abc_file
+
+    def fail_on_broken_file(path: Path) -> dict:
+        if path.name == "broken.abc":
+            raise ValueError("Can't parse")
+        return parse_abc_file(path)
+
+    monkeypatch.setattr(abc_files, "parse_abc_file", fail_on_broken_file)
+    conn = database.connect(tmp_path / "addons_cache.sqlite")
+    database.migrate(conn)
+    assert sorted(abc_files.AbcIndex(conn.cursor()).scan(tmp_path)) == [
+        (str(tmp_path / "broken.abc"), "", "", 0, "", 0, 0),
+        (str(song), "Test", "", 1, "", 0, 1)]
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+from onelauncher.addons.archive_cache import AddonArchiveCache
+from onelauncher.addons.file_locks import FileLock
+
+
+def test_archive_cache_lru_eviction(tmp_path: Path) -> None:
+    cache = AddonArchiveCache(tmp_path / "cache", max_size=250)
+    for name in ("a", "b", "c"):
+        archive = tmp_path / f"{name}.zip"
+        archive.write_bytes(name.encode() * 100)
+        cached_archive = cache.add(name, "1.0", archive)
+        assert cached_archive.read_bytes() == archive.read_bytes()
+        cache.release(cached_archive)
+
+        # Using "a" makes "b" the least recently used archive
+        if name == "b":
+            cache.release(cache.get("a", "1.0"))
+
+    assert cache.get("a", "1.0")
+    assert cache.get("b", "1.0") is None
+    assert cache.get("c", "1.0")
+    assert cache.get("c", "2.0") is None
+
+
+def test_archive_cache_keeps_pinned_archives(tmp_path: Path) -> None:
+    cache = AddonArchiveCache(tmp_path / "cache", max_size=150)
+    for name in ("a", "b"):
+        archive = tmp_path / f"{name}.zip"
+        archive.write_bytes(name.encode() * 100)
+    pinned_archive = cache.add("a", "1.0", tmp_path / "a.zip")
+    # Another cache of the process, like the one of another addon engine
+    other_cache = AddonArchiveCache(tmp_path / "cache", max_size=150)
+    assert other_cache.get("a", "1.0") == pinned_archive
+    cache.release(pinned_archive)
+
+    other_cache.release(other_cache.add("b", "1.0", tmp_path / "b.zip"))
+    assert pinned_archive.exists()
+    other_cache.release(pinned_archive)
+
+    cache.release(cache.add("b", "1.1", tmp_path / "b.zip"))
+    assert not pinned_archive.exists()
+
+
+def test_archive_cache_stores_identical_archives_once(tmp_path: Path) -> None:
+    cache = AddonArchiveCache(tmp_path / "cache", max_size=1000)
+    archive = tmp_path / "addon.zip"
+    archive.write_bytes(b"addon")
+
+    first = cache.add("1", "1.0", archive)
+    second = cache.add("1", "1.1", archive, move_archive=True)
+
+    assert first == second
+    assert not archive.exists()
+    assert cache.get("1", "1.0") == cache.get("1", "1.1") == first
+
+
+def test_archive_cache_keeps_archives_pinned_by_other_processes(
+        tmp_path: Path) -> None:
+    cache = AddonArchiveCache(tmp_path / "cache", max_size=150)
+    for name in ("a", "b", "c"):
+        archive = tmp_path / f"{name}.zip"
+        archive.write_bytes(name.encode() * 100)
+    cached_archive = cache.add("a", "1.0", tmp_path / "a.zip")
+    cache.release(cached_archive)
+    assert list(cached_archive.parent.iterdir()) == [cached_archive]
+
+    # Pin files are locked while a process has the archive pinned. Ones that
+    # aren't locked are left by processes that crashed.
+    stale_pin_file = cached_archive.with_name(f"{cached_archive.stem}.1.pin")
+    stale_pin_file.touch()
+    with FileLock(cached_archive.with_name(f"{cached_archive.stem}.2.pin")):
+        cache.release(cache.add("b", "1.0", tmp_path / "b.zip"))
+        assert cached_archive.exists()
+        assert not stale_pin_file.exists()
+
+    cache.release(cache.add("c", "1.0", tmp_path / "c.zip"))
+    assert not cached_archive.exists()
+    assert cache.get("a", "1.0") is None
@@ -0,0 +1,89 @@
+from pathlib import Path
+from typing import Callable, List
+
+import pytest
+
+from onelauncher.addons import batch_updates
+from onelauncher.addons.engine import AddonEngine
+
+@pytest.fixture
+def archive_requests(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    """Keeps feeds from being requested and records archive requests"""
+    requests: List[str] = []
+    get_remote_addon_archive = AddonEngine.get_remote_addon_archive
+
+    def record_archive_request(self, url, name, interface_id, version):
+        requests.append(f"{interface_id} {version}")
+        return get_remote_addon_archive(
+            self, url, name, interface_id, version)
+
+    monkeypatch.setattr(
+        AddonEngine, "load_remote_addons", lambda self, force_check=False: True)
+    monkeypatch.setattr(
+        AddonEngine, "get_remote_addon_archive", record_archive_request)
+    return requests
+
+
+def test_update_games(
+        tmp_path: Path,
+        archive_requests: List[str],
+        add_remote_plugin: Callable[..., None]) -> None:
+    cache_dir = tmp_path / "cache"
+    documents_folders = [tmp_path / "live", tmp_path / "preview"]
+    for documents_folder in documents_folders:
+        engine = AddonEngine(documents_folder, cache_dir=cache_dir)
+        add_remote_plugin(engine, "5", "Plugin", "1.0")
+        engine.load_installed_addons()
+        assert engine.install_remote_addons("tablePlugins", ["5"]) == []
+        add_remote_plugin(engine, "5", "Plugin", "2.0")
+        engine.close()
+    archive_requests.clear()
+
+    results = batch_updates.update_games(
+        [(documents_folders[0], "LOTRO"), (documents_folders[1], "LOTRO"),
+         (tmp_path / "live", "LOTRO")],
+        cache_dir=cache_dir)
+
+    assert archive_requests == ["5 2.0"]
+    assert [(result.documents_folder, result.updated, result.errors)
+            for result in results] == [
+        (documents_folders[0], ["Plugin"], []),
+        (documents_folders[1], ["Plugin"], [])]
+    for documents_folder in documents_folders:
+        plugin_folder = documents_folder / "Plugins/Author"
+        assert (plugin_folder / "Plugin/Main.lua").read_text() == "2.0"
+        assert "<Version>2.0</Version>" in (
+            plugin_folder / "Plugin.plugincompendium").read_text()
+        assert list((documents_folder / ".onelauncher_staging").iterdir()) == []
+
+    assert batch_updates.update_games(
+        [(documents_folder, "LOTRO") for documents_folder in documents_folders],
+        cache_dir=cache_dir)[0].updated == []
+
+
+def test_update_games_keeps_installed_rows_of_other_connections(
+        tmp_path: Path,
+        archive_requests: List[str],
+        add_remote_plugin: Callable[..., None]) -> None:
+    cache_dir = tmp_path / "cache"
+    engine = AddonEngine(tmp_path / "live", cache_dir=cache_dir)
+    add_remote_plugin(engine, "5", "Plugin", "1.0")
+    engine.load_installed_addons()
+    assert engine.install_remote_addons("tablePlugins", ["5"]) == []
+    add_remote_plugin(engine, "5", "Plugin", "2.0")
+    engine.close()
+    # Like the addon manager showing another game while the update runs
+    open_engine = AddonEngine(tmp_path / "preview", cache_dir=cache_dir)
+    try:
+        add_remote_plugin(open_engine, "6", "Other", "1.0")
+        open_engine.load_installed_addons()
+        assert open_engine.install_remote_addons("tablePlugins", ["6"]) == []
+        rows = open_engine.search("tablePluginsInstalled")
+
+        results = batch_updates.update_games(
+            [(tmp_path / "live", "LOTRO")], cache_dir=cache_dir)
+
+        assert results[0].updated == ["Plugin"]
+        assert open_engine.search("tablePluginsInstalled") == rows
+    finally:
+        open_engine.close()
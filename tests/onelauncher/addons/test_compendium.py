@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from onelauncher.addons import compendium
+
+
+def test_parse_addon_files(tmp_path: Path) -> None:
+    compendium_file = tmp_path/"Plugin.plugincompendium"
+    compendium_file.write_text(
+        "<PluginConfig><Id>1078</Id><Name>Plugin</Name><Version>1.2</Version>"
+        "<Author>Author</Author><Descriptors><descriptor>Author\\Plugin.plugin"
+        "</descriptor></Descriptors><Dependencies><dependency>0</dependency>"
+        "<dependency>42</dependency></Dependencies></PluginConfig>")
+    plugin_file = tmp_path/"Plugin.plugin"
+    plugin_file.write_text(
+        "<Plugin><Information><Name>Plugin</Name><Version>1.2</Version>"
+        "</Information></Plugin>")
+
+    files_data = compendium.parse_addon_files([compendium_file, plugin_file])
+
+    assert files_data[compendium_file] == {
+        "row": ["Plugin", "", "1.2", "Author", "", str(compendium_file),
+                "1078", "0,42", ""],
+        "descriptors": ["Author\\Plugin.plugin"]}
+    assert files_data[plugin_file] == {
+        "row": ["Plugin", "", "1.2", "", "", str(plugin_file), "", "", ""]}
+
+
+def test_generate_compendium_file_keeps_existing_values(tmp_path: Path) -> None:
+    author_folder = tmp_path/"Author"
+    author_folder.mkdir()
+    (author_folder/"Plugin.plugin").write_text("<Plugin/>")
+    existing_file = author_folder/"Old.plugincompendium"
+    existing_file.write_text(
+        "<PluginConfig><Name>Old</Name><Dependencies><dependency>0"
+        "</dependency></Dependencies><StartupScript>Author\\start.py"
+        "</StartupScript></PluginConfig>")
+
+    compendium_file = compendium.generate_compendium_file(
+        author_folder, "Plugin",
+        ["Plugin", "Misc", "1.2", "Author", "2021-01-01",
+         "https://www.lotrointerface.com/downloads/download1078-Plugin",
+         "1078", "", ""],
+        existing_file)
+
+    assert not existing_file.exists()
+    assert compendium_file == author_folder/"Plugin.plugincompendium"
+    assert compendium.parse_addon_file(compendium_file) == {
+        "row": ["Plugin", "", "1.2", "Author", "", str(compendium_file),
+                "1078", "0", "Author\\start.py"],
+        "descriptors": ["Author\\Plugin.plugin"]}
@@ -0,0 +1,144 @@
+from pathlib import Path
+
+import pytest
+
+from onelauncher.addons import database
+
+
+def test_insert_rows(tmp_path: Path) -> None:
+    conn = database.connect(tmp_path / "addons_cache.sqlite")
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    database.migrate(conn)
+
+    c = conn.cursor()
+    with conn:
+        database.insert_rows(
+            c, "tablePlugins",
+            ([f"Addon {i}", "", "1.0", "", "", "", str(i), "0,5", ""]
+             for i in range(3)))
+
+    assert c.execute("SELECT Name FROM tablePlugins").fetchall() == [
+        ("Addon 0",), ("Addon 1",), ("Addon 2",)]
+    assert not conn.in_transaction
+    assert c.execute(
+        "SELECT rowid FROM tablePlugins_fts WHERE tablePlugins_fts MATCH "
+        "'addon'").fetchall() == [(1,), (2,), (3,)]
+    assert c.execute(
+        "SELECT AddonID FROM addon_dependencies WHERE InterfaceID = '5'"
+    ).fetchall() == [(1,), (2,), (3,)]
+
+    # Triggers keep the search index and dependencies up to date
+    with conn:
+        c.execute("UPDATE tablePlugins SET Name = 'Renamed' WHERE rowid = 1")
+        c.execute("DELETE FROM tablePlugins WHERE rowid = 2")
+    assert c.execute(
+        "SELECT rowid FROM tablePlugins_fts WHERE tablePlugins_fts MATCH "
+        "'addon'").fetchall() == [(3,)]
+    assert c.execute(
+        "SELECT AddonID FROM addon_dependencies WHERE InterfaceID = '5'"
+    ).fetchall() == [(1,), (3,)]
+
+
+def test_migrate_keeps_rows_from_unversioned_database(tmp_path: Path) -> None:
+    conn = database.connect(tmp_path / "addons_cache.sqlite")
+    conn.execute(
+        "CREATE VIRTUAL TABLE tablePlugins USING FTS5(Name, Category, Version, "
+        "Author, LatestRelease, File, InterfaceID, Dependencies, StartupScript)")
+    conn.execute(
+        "INSERT INTO tablePlugins VALUES"
+        "('Addon','','(Updated) 1.1','','','','1','','')")
+    # Structure from an old version
+    conn.execute("CREATE VIRTUAL TABLE tableSkins USING FTS5(Name)")
+    conn.execute("INSERT INTO tableSkins VALUES('Skin')")
+    conn.commit()
+
+    database.migrate(conn)
+
+    assert database.get_schema_version(conn) == database.SCHEMA_VERSION
+    assert conn.execute(
+        "SELECT Name, Version, UpdateAvailable FROM tablePlugins "
+        "WHERE InterfaceID = '1'").fetchall() == [("Addon", "1.1", 1)]
+    assert conn.execute(
+        "SELECT rowid FROM tablePlugins_fts WHERE tablePlugins_fts MATCH "
+        "'addon'").fetchall() == [(1,)]
+    assert conn.execute("SELECT * FROM tableSkins").fetchall() == []
+    assert conn.execute("SELECT * FROM tableMusicInstalled").fetchall() == []
+
+
+def test_migrate_keeps_feed_cache_from_before_it_was_migrated(
+        tmp_path: Path) -> None:
+    conn = database.connect(tmp_path / "addons_cache.sqlite")
+    for migration in database.MIGRATIONS[:5]:
+        migration(conn.cursor())
+    conn.execute("PRAGMA user_version = 5")
+    # Made by `FeedCache` before its table was created by a migration
+    conn.execute(
+        "CREATE TABLE remote_feeds_cache (URL TEXT PRIMARY KEY, ETag TEXT, "
+        "LastModified TEXT, CheckedTime REAL)")
+    conn.execute(
+        "INSERT INTO remote_feeds_cache VALUES('https://example.com', '1', "
+        "'', 0)")
+    conn.commit()
+
+    database.migrate(conn)
+
+    assert conn.execute("SELECT URL FROM remote_feeds_cache").fetchall() == [
+        ("https://example.com",)]
+    assert conn.execute("SELECT * FROM addon_file_index").fetchall() == []
+
+
+def test_migrate_drops_shared_installed_tables(tmp_path: Path) -> None:
+    conn = database.connect(tmp_path / "addons_cache.sqlite")
+    for migration in database.MIGRATIONS[:7]:
+        migration(conn.cursor())
+    conn.execute("PRAGMA user_version = 7")
+    conn.execute(
+        "INSERT INTO tablePluginsInstalled (Name, InterfaceID, Dependencies) "
+        "VALUES('Addon', '1', '5')")
+    conn.execute(
+        "INSERT INTO addon_dependencies "
+        "VALUES('tablePluginsInstalled', 1, '5')")
+    conn.commit()
+
+    database.migrate(conn)
+
+    assert conn.execute(
+        "SELECT name FROM main.sqlite_master "
+        "WHERE name LIKE 'tablePluginsInstalled%'").fetchall() == []
+    assert conn.execute("SELECT * FROM addon_dependencies").fetchall() == []
+    assert conn.execute("SELECT * FROM tablePluginsInstalled").fetchall() == []
+
+
+def test_installed_tables_are_private_to_each_connection(
+        tmp_path: Path) -> None:
+    conn = database.connect(tmp_path / "addons_cache.sqlite")
+    database.migrate(conn)
+    other_conn = database.connect(tmp_path / "addons_cache.sqlite")
+    database.migrate(other_conn)
+
+    c = conn.cursor()
+    with conn:
+        database.insert_rows(c, "tablePluginsInstalled", [
+            ["Addon", "", "1.0", "", "", "", "1", "5", ""]])
+    assert c.execute(
+        "SELECT rowid FROM tablePluginsInstalled_fts WHERE "
+        "tablePluginsInstalled_fts MATCH 'addon'").fetchall() == [(1,)]
+    assert c.execute(
+        "SELECT AddonID FROM installed_addon_dependencies "
+        "WHERE InterfaceID = '5'").fetchall() == [(1,)]
+    assert c.execute("SELECT * FROM addon_dependencies").fetchall() == []
+    assert other_conn.execute(
+        "SELECT * FROM tablePluginsInstalled").fetchall() == []
+
+    with conn:
+        c.execute("DELETE FROM tablePluginsInstalled")
+    assert c.execute(
+        "SELECT * FROM installed_addon_dependencies").fetchall() == []
+
+
+def test_migrate_rejects_newer_schema(tmp_path: Path) -> None:
+    conn = database.connect(tmp_path / "addons_cache.sqlite")
+    conn.execute(f"PRAGMA user_version = {database.SCHEMA_VERSION + 1}")
+
+    with pytest.raises(database.SchemaVersionError):
+        database.migrate(conn)
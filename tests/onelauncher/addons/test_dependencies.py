@@ -0,0 +1,102 @@
+import sqlite3
+
+import pytest
+
+from onelauncher.addons import database, dependencies
+
+
+def get_cursor(addons) -> sqlite3.Cursor:
+    conn = sqlite3.connect(":memory:")
+    database.migrate(conn)
+    cursor = conn.cursor()
+    database.insert_rows(
+        cursor, "tablePlugins",
+        [(f"Addon {interface_id}", "", "1.0", "", "", "", interface_id,
+          addon_dependencies, "")
+         for interface_id, addon_dependencies in addons.items()])
+    return cursor
+
+
+def test_get_dependency_graph_follows_transitive_dependencies() -> None:
+    cursor = get_cursor({
+        "1": "2,0",
+        "2": "3",
+        "3": "",
+        "1064": "",
+        "4": "3,5",
+        "6": "7"})
+
+    graph = dependencies.get_dependency_graph(
+        cursor, "tablePlugins", ["1", "4"])
+
+    # Turbine Utilities is looked up by its lotrointerface.com ID, and
+    # missing addons are kept so they can be reported.
+    assert graph == {
+        "1": {"2", "1064"},
+        "2": {"3"},
+        "3": set(),
+        "1064": set(),
+        "4": {"3", "5"},
+        "5": set()}
+
+
+def test_get_install_plan_orders_dependencies_first() -> None:
+    graph = {
+        "1": {"2", "1064"},
+        "2": {"3"},
+        "3": set(),
+        "1064": set(),
+        "4": {"3", "1064"}}
+
+    assert dependencies.get_install_plan(graph, ["1", "4"], []) == [
+        ["1064", "3"], ["2", "4"], ["1"]]
+    assert dependencies.get_install_plan(graph, ["1", "4"], ["0", "2"]) == [
+        ["1", "3"], ["4"]]
+
+
+def test_get_install_plan_detects_cycles() -> None:
+    cursor = get_cursor({"1": "2", "2": "3", "3": "2", "4": "4"})
+    graph = dependencies.get_dependency_graph(
+        cursor, "tablePlugins", ["1", "4"])
+
+    assert dependencies.get_install_plan(graph, ["4"], []) == [["4"]]
+    with pytest.raises(dependencies.DependencyCycleError) as error:
+        dependencies.get_install_plan(graph, ["1", "4"], [])
+    assert error.value.interface_ids == ["2", "3"]
+
+
+def test_get_dependents_ignores_addons_removed_together() -> None:
+    conn = sqlite3.connect(":memory:")
+    database.migrate(conn)
+    cursor = conn.cursor()
+    database.insert_rows(
+        cursor, "tablePluginsInstalled",
+        [(f"Addon {interface_id}", "", "1.0", "", "", "", interface_id,
+          addon_dependencies, "")
+         for interface_id, addon_dependencies in
+         [("1", "0,2"), ("2", "3"), ("3", ""), ("1064", "")]])
+
+    assert dependencies.get_dependents(
+        cursor, "tablePluginsInstalled", ["1064", "3"]) == {
+        "1064": ["Addon 1"], "3": ["Addon 2"]}
+    assert dependencies.get_dependents(
+        cursor, "tablePluginsInstalled", ["1", "2", "3"]) == {}
+
+
+def test_get_orphaned_dependencies() -> None:
+    cursor = get_cursor({"1": "2", "5": "6"})
+    database.insert_rows(
+        cursor, "tablePluginsInstalled",
+        [(f"Addon {interface_id}", "", "1.0", "", "", "", interface_id,
+          addon_dependencies, "")
+         for interface_id, addon_dependencies in
+         [("2", "3,0"), ("3", "4"), ("4", ""), ("1064", ""), ("6", ""),
+          ("7", "6"), ("8", "")]])
+
+    # 2 is a dependency of 1 on lotrointerface.com, but 1 isn't installed.
+    # 3, 4, and Turbine Utilities are only needed by orphans. 6 is still
+    # needed by 7, and 8 was never a dependency.
+    assert dependencies.get_orphaned_dependencies(
+        cursor, "tablePluginsInstalled", "tablePlugins") == [
+        ("2", "", "Addon 2"), ("3", "", "Addon 3"), ("1064", "", "Addon 1064"),
+        ("4", "", "Addon 4")]
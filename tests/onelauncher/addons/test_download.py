@@ -0,0 +1,108 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from onelauncher.addons import download
+
+CONTENT = bytes(range(256)) * 1024
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    # Number of bytes to send before dropping the connection
+    drop_after = None
+    range_requests = []
+
+    def do_GET(self) -> None:
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") == '"v1"':
+            start = int(range_header.split("=")[1].split("-")[0])
+            type(self).range_requests.append(start)
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(CONTENT) - 1}/{len(CONTENT)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(CONTENT) - start))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+
+        body = CONTENT[start:]
+        if type(self).drop_after is not None:
+            body = body[:type(self).drop_after]
+            type(self).drop_after = None
+            self.close_connection = True
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server_url():
+    RangeRequestHandler.drop_after = None
+    RangeRequestHandler.range_requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/addon.zip"
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_file_resumes_interrupted_download(
+        tmp_path: Path, server_url: str) -> None:
+    RangeRequestHandler.drop_after = 100_000
+    progress = []
+
+    download.download_file(
+        server_url,
+        tmp_path / "addon.zip",
+        tmp_path / "downloads",
+        lambda downloaded, total, speed: progress.append((downloaded, total)))
+
+    assert (tmp_path / "addon.zip").read_bytes() == CONTENT
+    assert RangeRequestHandler.range_requests == [100_000]
+    assert progress[-1] == (len(CONTENT), len(CONTENT))
+    assert not list((tmp_path / "downloads").iterdir())
+
+
+def test_download_file_keeps_partial_file_when_stopped(
+        tmp_path: Path, server_url: str) -> None:
+    class StopDownload(Exception):
+        pass
+
+    def stop_download(downloaded, total, speed):
+        raise StopDownload()
+
+    with pytest.raises(StopDownload):
+        download.download_file(
+            server_url, tmp_path / "addon.zip", tmp_path / "downloads",
+            stop_download)
+
+    partial_size = download.get_partial_download_path(
+        server_url, tmp_path / "downloads").stat().st_size
+    assert 0 < partial_size < len(CONTENT)
+
+    download.download_file(
+        server_url, tmp_path / "addon.zip", tmp_path / "downloads")
+
+    assert (tmp_path / "addon.zip").read_bytes() == CONTENT
+    assert RangeRequestHandler.range_requests == [partial_size]
+
+
+def test_acquire_download_lock_waits_for_other_download(
+        tmp_path: Path, server_url: str) -> None:
+    lock = download.acquire_download_lock(server_url, tmp_path)
+
+    def check_cancelled() -> None:
+        raise InterruptedError()
+
+    with pytest.raises(InterruptedError):
+        download.acquire_download_lock(server_url, tmp_path, check_cancelled)
+    lock.release()
+    download.acquire_download_lock(
+        server_url, tmp_path, check_cancelled).release()
+    assert list(tmp_path.iterdir()) == []
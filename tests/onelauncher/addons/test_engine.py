@@ -0,0 +1,150 @@
+import os
+import subprocess  # nosec
+import sys
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from onelauncher.addons import file_store
+from onelauncher.addons.engine import AddonEngine, AddonEngineError
+from onelauncher.addons.file_locks import FileLock
+
+@pytest.fixture
+def engine(tmp_path: Path):
+    engine = AddonEngine(tmp_path / "documents", cache_dir=tmp_path / "cache")
+    engine.load_installed_addons()
+    yield engine
+    engine.close()
+
+
+def test_install_update_and_uninstall(
+        engine: AddonEngine, add_remote_plugin: Callable[..., None]) -> None:
+    plugins_folder = engine.addon_folders["Plugin"]
+    add_remote_plugin(engine, "5", "Plugin", "1.0", {
+        "Author/Plugin/Main.lua": "v1",
+        "Author/Plugin/Old.lua": "old",
+    })
+
+    assert engine.install_remote_addons("tablePlugins", ["5"]) == []
+    assert (plugins_folder / "Author/Plugin.plugincompendium").exists()
+    assert engine.find_addons(["tablePlugins"], ["plugin"]) == [
+        ("tablePlugins", ("5", "https://example.com/Plugin", "Plugin"))]
+    assert [row[1:4] for row in engine.search("tablePluginsInstalled")] == [
+        ("Plugin", "Misc", "1.0")]
+    assert engine.verify_addons() == {("Plugin", "5"): {}}
+
+    add_remote_plugin(engine, "5", "Plugin", "2.0", {
+        "Author/Plugin/Main.lua": "v2",
+    })
+    plan = engine.check_for_updates()
+    assert [update[2] for update in plan] == ["5"]
+    assert engine.update_addons(plan) == []
+    assert (plugins_folder / "Author/Plugin/Main.lua").read_text() == "v2"
+    assert not (plugins_folder / "Author/Plugin/Old.lua").exists()
+    assert [row[1:4] for row in engine.search("tablePluginsInstalled")] == [
+        ("Plugin", "Misc", "2.0")]
+
+    (plugins_folder / "Author/Plugin/Main.lua").write_text("v3")
+    assert engine.verify_addons() == {("Plugin", "5"): {
+        plugins_folder / "Author/Plugin/Main.lua": "modified"}}
+
+    engine.uninstall_addons(
+        "tablePluginsInstalled",
+        [addon for _, addon in engine.find_addons(
+            ["tablePluginsInstalled"], ["5"])])
+    assert list(plugins_folder.iterdir()) == []
+    assert engine.search("tablePluginsInstalled") == []
+    assert engine.verify_addons() == {}
+
+
+def test_failed_install_is_rolled_back(
+        engine: AddonEngine, add_remote_plugin: Callable[..., None]) -> None:
+    add_remote_plugin(engine, "6", "Broken", "1.0", {
+        "Author/Broken.plugincompendium": "<PluginConfig/>",
+        "Author/Other.plugincompendium": "<PluginConfig/>",
+    })
+
+    errors = engine.install_remote_addons("tablePlugins", ["6"])
+
+    assert [str(error) for error in errors] == [
+        "Broken has multiple compendium files"]
+    assert list(engine.addon_folders["Plugin"].iterdir()) == []
+    assert engine.search("tablePluginsInstalled") == []
+    with pytest.raises(AddonEngineError):
+        engine.find_addons(["tablePluginsInstalled"], ["Broken"])
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Hardlinks aren't used on Windows")
+def test_file_store_is_pruned_after_updates_and_uninstalls(
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        add_remote_plugin: Callable[..., None]) -> None:
+    monkeypatch.setattr(file_store, "reflink", lambda source, destination: False)
+    engine = AddonEngine(
+        tmp_path / "documents", cache_dir=tmp_path / "cache", link_files=True)
+    try:
+        engine.load_installed_addons()
+        store_dir = engine.file_store.store_dir
+        add_remote_plugin(engine, "5", "Plugin", "1.0", {
+            "Author/Plugin/data.bin": "1" * 8192})
+        assert engine.install_remote_addons("tablePlugins", ["5"]) == []
+        assert len(list(store_dir.glob("??/*"))) == 1
+
+        add_remote_plugin(engine, "5", "Plugin", "2.0", {
+            "Author/Plugin/data.bin": "2" * 8192})
+        assert engine.update_addons(engine.check_for_updates()) == []
+        assert [path.read_text() for path in store_dir.glob("??/*")] == [
+            "2" * 8192]
+
+        engine.uninstall_addons(
+            "tablePluginsInstalled",
+            [addon for _, addon in engine.find_addons(
+                ["tablePluginsInstalled"], ["5"])])
+        assert list(store_dir.glob("??/*")) == []
+    finally:
+        engine.close()
+
+
+def test_installed_addons_of_other_games_are_kept_apart(
+        engine: AddonEngine, tmp_path: Path,
+        add_remote_plugin: Callable[..., None]) -> None:
+    add_remote_plugin(engine, "5", "Plugin", "1.0")
+    assert engine.install_remote_addons("tablePlugins", ["5"]) == []
+    rows = engine.search("tablePluginsInstalled")
+
+    other_engine = AddonEngine(
+        tmp_path / "other_documents", cache_dir=tmp_path / "cache")
+    try:
+        other_engine.load_installed_addons()
+        assert other_engine.search("tablePluginsInstalled") == []
+    finally:
+        other_engine.close()
+
+    # Rowids the addon manager selects by are still for the same addons
+    assert engine.search("tablePluginsInstalled") == rows
+
+
+def test_engine_needs_addons_to_not_be_open_in_another_process(
+        tmp_path: Path) -> None:
+    documents_folder = tmp_path / "documents"
+    engine = AddonEngine(documents_folder, cache_dir=tmp_path / "cache")
+    # Engines in the same process, like the ones of batch updates, share
+    # the lock
+    AddonEngine(documents_folder, cache_dir=tmp_path / "cache").close()
+    engine.close()
+
+    # Held like another process would
+    with FileLock(documents_folder / ".onelauncher_staging.lock"):
+        with pytest.raises(AddonEngineError):
+            AddonEngine(documents_folder, cache_dir=tmp_path / "cache")
+    AddonEngine(documents_folder, cache_dir=tmp_path / "cache").close()
+    assert list(documents_folder.iterdir()) == []
+
+
+def test_cli_does_not_import_qt() -> None:
+    modules = subprocess.run(  # nosec
+        [sys.executable, "-c",
+         "import sys, onelauncher.addon_cli; print(' '.join(sys.modules))"],
+        capture_output=True, text=True, check=True).stdout.split()
+    assert not [module for module in modules if module.startswith("PySide6")]
@@ -0,0 +1,78 @@
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Callable, List
+
+import pytest
+
+from onelauncher.addons import extraction
+
+
+def test_extract_addon_moves_plugin_files_out_of_invalid_folders(
+        tmp_path: Path, make_archive: Callable[..., Path]) -> None:
+    archive = make_archive(tmp_path / "addon.zip", [
+        "Plugins/Turbine/Utils.plugin",
+        "Documents/The Lord of the Rings Online/Plugins/Author/Addon.plugin",
+        "Plugins/Author/Addon/Main.lua",
+        "../../outside.lua",
+    ])
+    staging_dir = tmp_path / "staging"
+    staging_dir.mkdir()
+
+    plan = extraction.extract_addon(
+        archive, staging_dir, "Addon", lambda: None)
+
+    assert plan.addon_type == "Plugin"
+    assert plan.root_dir == PurePosixPath("Author")
+    assert sorted(
+        str(path.relative_to(staging_dir))
+        for path in staging_dir.glob("**/*") if path.is_file()) == [
+        "Author/Addon.plugin", "Author/Addon/Main.lua", "Turbine/Utils.plugin",
+        "outside.lua"]
+    assert (staging_dir / "Author/Addon/Main.lua").read_text() == (
+        "Plugins/Author/Addon/Main.lua")
+
+
+def test_get_extraction_plan_finds_author_folder_with_plugin_file(
+        tmp_path: Path, make_archive: Callable[..., Path]) -> None:
+    archive = make_archive(tmp_path / "addon.zip", [
+        "Library/Library/Main.lua",
+        "Author/Addon.plugin",
+        "Author/Addon/Main.lua",
+    ])
+    with zipfile.ZipFile(archive) as archive:
+        assert extraction.get_extraction_plan(
+            archive, "Addon").root_dir == PurePosixPath("Author")
+
+    archive = make_archive(
+        tmp_path / "no_author.zip", ["One/Main.lua", "Two/Sub/Addon.plugin"])
+    with zipfile.ZipFile(archive) as archive:
+        with pytest.raises(extraction.AddonArchiveError):
+            extraction.get_extraction_plan(archive, "Addon")
+
+
+@pytest.mark.parametrize("names, addon_type, paths", [
+    (["ui/skins/Skin/SkinDefinition.xml"], "Skin",
+     ["Skin/SkinDefinition.xml"]),
+    (["SkinDefinition.xml", "images/a.tga"], "Skin",
+     ["Addon/SkinDefinition.xml", "Addon/images/a.tga"]),
+    (["Music/song.abc", "readme.txt"], "Music",
+     ["Addon/readme.txt", "Addon/song.abc"]),
+])
+def test_get_extraction_plan_gives_skins_and_music_a_root_folder(
+        tmp_path: Path, names: List[str], addon_type: str,
+        paths: List[str], make_archive: Callable[..., Path]) -> None:
+    archive = make_archive(tmp_path / "addon.zip", names)
+    with zipfile.ZipFile(archive) as archive:
+        plan = extraction.get_extraction_plan(archive, "Addon")
+
+    assert plan.addon_type == addon_type
+    assert plan.root_dir == PurePosixPath(paths[0]).parents[-2]
+    assert sorted(str(path) for path in plan.members) == paths
+
+
+def test_get_extraction_plan_returns_none_without_files(
+        tmp_path: Path, make_archive: Callable[..., Path]) -> None:
+    archive = make_archive(tmp_path / "addon.zip", ["Empty/"])
+    with zipfile.ZipFile(archive) as archive:
+        assert extraction.get_extraction_plan(archive, "Addon") is None
+
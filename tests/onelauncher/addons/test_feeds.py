@@ -0,0 +1,24 @@
+import io
+
+from onelauncher.addons import feeds
+
+
+def test_iter_feed_rows() -> None:
+    feed = io.BytesIO(
+        b'<?xml version="1.0"?><Favorites>'
+        b'<Ui><UID>1078</UID><UIName>Vital/Target</UIName>'
+        b'<UIAuthorName>Author</UIAuthorName><UIVersion>1.2</UIVersion>'
+        b'<UIUpdated>1600000000</UIUpdated><UICategory>Combat</UICategory>'
+        b'<UIFileURL>https://www.lotrointerface.com/downloads/download1078'
+        b'</UIFileURL></Ui>'
+        b'<Ui><UID>1079</UID><UIName>Other</UIName></Ui>'
+        b'</Favorites>')
+
+    rows = list(feeds.iter_feed_rows(feed))
+
+    assert len(rows) == 2
+    assert rows[0][0] == "Vital-Target"
+    assert rows[0][1:4] == ["Combat", "1.2", "Author"]
+    assert rows[0][5:7] == [
+        "https://www.lotrointerface.com/downloads/download1078", "1078"]
+    assert rows[1] == ["Other", "", "", "", "", "", "1079", "", ""]
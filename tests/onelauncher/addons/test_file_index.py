@@ -0,0 +1,47 @@
+from pathlib import Path
+
+from onelauncher.addons import database
+from onelauncher.addons.file_index import AddonFileIndex
+
+
+def make_index(tmp_path: Path) -> AddonFileIndex:
+    conn = database.connect(tmp_path / "addons_cache.sqlite")
+    database.migrate(conn)
+    return AddonFileIndex(conn.cursor())
+
+
+def test_scan_only_reports_changed_files(tmp_path: Path) -> None:
+    index = make_index(tmp_path)
+    suffixes = (".plugin", ".plugincompendium")
+
+    plugin_file = tmp_path/"Author/Plugin.plugin"
+    plugin_file.parent.mkdir()
+    plugin_file.write_text("<Plugin/>")
+    (tmp_path/"Author/readme.txt").touch()
+
+    unchanged_files, changed_files = index.scan(tmp_path, suffixes)
+    assert not unchanged_files
+    assert list(changed_files) == [plugin_file]
+    index.update(plugin_file, changed_files[plugin_file], {"row": ["Plugin"]})
+
+    unchanged_files, changed_files = index.scan(tmp_path, suffixes)
+    assert unchanged_files == {plugin_file: {"row": ["Plugin"]}}
+    assert not changed_files
+
+    plugin_file.write_text("<Plugin></Plugin>")
+    unchanged_files, changed_files = index.scan(tmp_path, suffixes)
+    assert list(changed_files) == [plugin_file]
+    assert index.get(plugin_file, changed_files[plugin_file]) is None
+
+
+def test_scan_removes_deleted_files(tmp_path: Path) -> None:
+    index = make_index(tmp_path)
+
+    plugin_file = tmp_path/"Plugin.plugin"
+    plugin_file.touch()
+    index.update(plugin_file, plugin_file.stat(), {})
+    stat = plugin_file.stat()
+    plugin_file.unlink()
+
+    assert index.scan(tmp_path, (".plugin",)) == ({}, {})
+    assert index.get(plugin_file, stat) is None
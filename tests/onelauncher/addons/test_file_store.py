@@ -0,0 +1,65 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from onelauncher.addons import file_store
+from onelauncher.addons.file_store import AddonFileStore, get_linkable_files
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Hardlinks aren't used on Windows")
+def test_link_files_hardlinks_same_files(
+        tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(file_store, "reflink", lambda source, destination: False)
+    store = AddonFileStore(tmp_path / "store")
+    games = [tmp_path / "live", tmp_path / "preview"]
+    for game in games:
+        (game / "Plugin").mkdir(parents=True)
+        (game / "Plugin/same.bin").write_bytes(b"same" * 2048)
+        (game / "Plugin/Main.lua").write_text("small")
+        (game / "Plugin/Plugin.plugincompendium").write_bytes(b"c" * 8192)
+    (games[1] / "Plugin/different.bin").write_bytes(b"different" * 1024)
+
+    results = [store.link_files(get_linkable_files(game), tmp_path / "staging")
+               for game in games]
+
+    assert [result.linked_files for result in results] == [1, 2]
+    assert [result.saved_bytes for result in results] == [0, 8192]
+    live_file, preview_file = (game / "Plugin/same.bin" for game in games)
+    assert live_file.stat().st_ino == preview_file.stat().st_ino
+    assert not live_file.stat().st_mode & file_store.WRITE_PERMISSIONS
+    assert list(results[1].changed_mtimes) == [preview_file]
+    assert preview_file.read_bytes() == b"same" * 2048
+    assert (games[0] / "Plugin/Plugin.plugincompendium").stat().st_nlink == 1
+    assert list((tmp_path / "staging").iterdir()) == []
+
+    # Already linked files aren't hashed or linked again
+    assert store.link_files(
+        get_linkable_files(games[1]), tmp_path / "staging").linked_files == 0
+
+    # Saved by replacing the file, like most editors do
+    preview_file.unlink()
+    preview_file.write_bytes(b"edit" * 2048)
+    (games[1] / "Plugin/different.bin").unlink()
+    assert live_file.read_bytes() == b"same" * 2048
+    assert store.prune() == 1
+    assert len(list(store.store_dir.glob("??/*"))) == 1
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Hardlinks aren't used on Windows")
+def test_move_files(tmp_path: Path) -> None:
+    store = AddonFileStore(tmp_path / "store")
+    staging_dir = tmp_path / "staging/tmp"
+    staging_dir.mkdir(parents=True)
+    (staging_dir / "file.bin").write_bytes(b"file" * 2048)
+    store.link_files([staging_dir / "file.bin"], tmp_path / "staging")
+
+    addon_folder = tmp_path / "Plugins/Plugin"
+    addon_folder.parent.mkdir()
+    staging_dir.rename(addon_folder)
+    store.move_files(staging_dir, addon_folder)
+
+    assert store.link_files(
+        get_linkable_files(addon_folder), tmp_path / "staging").linked_files == 0
+    assert store.prune() == 0
+    assert len(list(store.store_dir.glob("??/*"))) == 1
@@ -0,0 +1,126 @@
+import os
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Callable
+
+from onelauncher.addons import database, extraction, manifests
+from onelauncher.addons.transactions import AddonTransaction
+
+
+def install(
+        archive: Path,
+        addon_folder: Path,
+        manifest: manifests.AddonManifest = None
+) -> extraction.ExtractionPlan:
+    """Installs archive like the addon manager does, minus the database"""
+    staging_dir = archive.parent / "staging"
+    staging_dir.mkdir()
+    plan = extraction.extract_addon(
+        archive, staging_dir, "Skin", lambda: None,
+        (lambda plan: manifests.get_unchanged_paths(plan, manifest))
+        if manifest else None)
+
+    transaction = AddonTransaction(archive.parent / "transactions")
+    if manifest:
+        manifests.remove_files(
+            transaction, addon_folder,
+            manifests.get_removed_paths(plan, manifest))
+    transaction.move_into(staging_dir, addon_folder)
+    transaction.commit()
+    return plan
+
+
+def test_update_only_replaces_changed_files(
+        tmp_path: Path, make_archive: Callable[..., Path]) -> None:
+    conn = database.connect(tmp_path / "addons_cache.sqlite")
+    database.migrate(conn)
+    c = conn.cursor()
+    addon_folder = tmp_path / "skins"
+    addon_folder.mkdir()
+
+    plan = install(
+        make_archive(tmp_path / "1.zip", {
+            "Skin/same.xml": "same",
+            "Skin/changed.xml": "old",
+            "Skin/edited.xml": "edited",
+            "Skin/Removed/removed.tga": "removed",
+            "Skin/Skin.skincompendium": "compendium",
+        }),
+        addon_folder)
+    manifests.set_manifest(
+        c, addon_folder, "5",
+        manifests.get_installed_files(addon_folder, plan))
+    assert manifests.get_manifest(c, "Skin", tmp_path, "5") is None
+
+    # Edited by the user with the same size
+    edited_file = addon_folder / "Skin/edited.xml"
+    edited_stat = edited_file.stat()
+    edited_file.write_text("EDITED")
+    os.utime(edited_file, ns=(
+        edited_stat.st_atime_ns, edited_stat.st_mtime_ns + 1_000_000_000))
+    same_inode = (addon_folder / "Skin/same.xml").stat().st_ino
+
+    manifest = manifests.get_manifest(c, "Skin", addon_folder, "5")
+    plan = install(
+        make_archive(tmp_path / "2.zip", {
+            "Skin/same.xml": "same",
+            "Skin/changed.xml": "new",
+            "Skin/edited.xml": "edited",
+            "Skin/added.xml": "added",
+            "Skin/Skin.skincompendium": "compendium",
+        }),
+        addon_folder,
+        manifest)
+
+    assert plan.unchanged_paths == {PurePosixPath("Skin/same.xml")}
+    assert (addon_folder / "Skin/same.xml").stat().st_ino == same_inode
+    assert sorted(
+        str(path.relative_to(addon_folder))
+        for path in addon_folder.glob("**/*")) == [
+        "Skin", "Skin/Skin.skincompendium", "Skin/added.xml",
+        "Skin/changed.xml", "Skin/edited.xml", "Skin/same.xml"]
+    assert (addon_folder / "Skin/changed.xml").read_text() == "new"
+    assert edited_file.read_text() == "edited"
+
+
+def test_get_removed_paths_removes_everything_when_addon_type_changes(
+        tmp_path: Path, make_archive: Callable[..., Path]) -> None:
+    archive = make_archive(tmp_path / "addon.zip", {"Song/song.abc": ""})
+    with zipfile.ZipFile(archive) as archive:
+        plan = extraction.get_extraction_plan(archive, "Song")
+    manifest = manifests.AddonManifest(
+        "Skin", tmp_path, {PurePosixPath("Song/song.abc"): (0, 0, 0)})
+
+    assert manifests.get_unchanged_paths(plan, manifest) == set()
+    assert manifests.get_removed_paths(plan, manifest) == [
+        PurePosixPath("Song/song.abc")]
+
+
+def test_verify_manifest(tmp_path: Path, make_archive: Callable[..., Path]) -> None:
+    addon_folder = tmp_path / "skins"
+    addon_folder.mkdir()
+    plan = install(
+        make_archive(tmp_path / "skin.zip", {
+            "Skin/same.xml": "same",
+            "Skin/edited.xml": "edited",
+            "Skin/removed.xml": "removed",
+            "Skin/Skin.skincompendium": "compendium",
+        }),
+        addon_folder)
+    manifest = manifests.AddonManifest(
+        "Skin", addon_folder,
+        manifests.get_installed_files(addon_folder, plan))
+    assert manifests.verify_manifest(manifest) == {}
+
+    # Same size and mtime, so only the CRC shows the edit
+    edited_file = addon_folder / "Skin/edited.xml"
+    edited_stat = edited_file.stat()
+    edited_file.write_text("EDITED")
+    os.utime(edited_file, ns=(edited_stat.st_atime_ns, edited_stat.st_mtime_ns))
+    (addon_folder / "Skin/removed.xml").unlink()
+    (addon_folder / "Skin/Skin.skincompendium").write_text("regenerated")
+
+    assert manifests.verify_manifest(manifest) == {
+        PurePosixPath("Skin/edited.xml"): "modified",
+        PurePosixPath("Skin/removed.xml"): "missing",
+    }
@@ -0,0 +1,42 @@
+import os
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from onelauncher.addons import abc_files, parsing
+
+
+def test_parse_files_in_worker_processes(
+        tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+        caplog: pytest.LogCaptureFixture) -> None:
+    files = []
+    for number in range(4):
+        song = tmp_path / f"song{number}.abc"
+        song.write_text(f"T: Song {number} - Lute\nQ: {number + 60}\nK: C\nC D|\n")
+        files.append(song)
+    # Not a file, so parsing it fails in the worker
+    files.append(tmp_path)
+    serial_results = parsing.parse_files(
+        abc_files.parse_abc_file, files, abc_files.EMPTY_METADATA)
+
+    pools: List[int] = []
+
+    class RecordedProcessPoolExecutor(parsing.ProcessPoolExecutor):
+        def __init__(self, max_workers: int, **kwargs) -> None:
+            pools.append(max_workers)
+            super().__init__(max_workers, **kwargs)
+
+    monkeypatch.setattr(
+        parsing, "ProcessPoolExecutor", RecordedProcessPoolExecutor)
+    monkeypatch.setattr(parsing, "MIN_FILES_PER_PARSE_WORKER", 1)
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    results = parsing.parse_files(
+        abc_files.parse_abc_file, files, abc_files.EMPTY_METADATA)
+
+    assert pools == [2]
+    # The pool didn't fail over to parsing serially
+    assert "File parse pool failed" not in caplog.text
+    assert results == serial_results
+    assert results[files[1]]["tempo"] == 61
+    assert results[tmp_path] == abc_files.EMPTY_METADATA
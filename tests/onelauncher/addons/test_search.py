@@ -0,0 +1,22 @@
+import sqlite3
+
+from onelauncher.addons import database, search
+
+
+def test_search_table_ranks_prefix_matches() -> None:
+    conn = sqlite3.connect(":memory:")
+    database.migrate(conn)
+    cursor = conn.cursor()
+    database.insert_rows(
+        cursor, "tablePlugins",
+        [("Bar Tracker", "Other", "1.0", "Someone", "", "", "1", "", ""),
+         ("Vital Target", "Combat", "1.0", "Bar", "", "", "2", "", ""),
+         ("Bars", "UI", "1.0", "Someone", "", "", "3", "", ""),
+         ("Unrelated", "Other", "1.0", "Someone", "", "Bar", "4", "", "")])
+
+    names = [row[1] for row in search.search_table(
+        cursor, "tablePlugins", "bar track")]
+    assert names == ["Bar Tracker", "Bars", "Vital Target"]
+
+    assert search.search_table(cursor, "tablePlugins", 'NEAR( "*') == []
+    assert len(search.search_table(cursor, "tablePlugins", " - ")) == 4
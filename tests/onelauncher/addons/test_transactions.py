@@ -0,0 +1,73 @@
+from pathlib import Path
+
+from onelauncher.addons import transactions
+
+
+def make_addon_folders(tmp_path: Path):
+    source = tmp_path / "staging/extracted"
+    (source / "Addon").mkdir(parents=True)
+    (source / "Addon/new.lua").write_text("new")
+    (source / "Addon/both.lua").write_text("new")
+    destination = tmp_path / "Plugins"
+    (destination / "Addon").mkdir(parents=True)
+    (destination / "Addon/old.lua").write_text("old")
+    (destination / "Addon/both.lua").write_text("old")
+    (destination / "Other.plugin").write_text("other")
+    return source, destination
+
+
+def get_files(folder: Path):
+    return {str(path.relative_to(folder)): path.read_text()
+            for path in folder.glob("**/*") if path.is_file()}
+
+
+def test_transaction_commit_merges_folders(tmp_path: Path) -> None:
+    source, destination = make_addon_folders(tmp_path)
+    transaction = transactions.AddonTransaction(tmp_path / "staging")
+
+    transaction.move_into(source, destination)
+    transaction.remove(destination / "Other.plugin")
+    transaction.commit()
+
+    assert not source.exists()
+    assert get_files(destination) == {
+        "Addon/new.lua": "new", "Addon/both.lua": "new", "Addon/old.lua": "old"}
+    assert list((tmp_path / "staging").iterdir()) == []
+
+
+def test_transaction_rollback_restores_folders(tmp_path: Path) -> None:
+    source, destination = make_addon_folders(tmp_path)
+    original_files = get_files(destination)
+    transaction = transactions.AddonTransaction(tmp_path / "staging")
+
+    transaction.move_into(source, destination)
+    transaction.remove(destination / "Other.plugin")
+    transaction.rollback()
+
+    assert get_files(destination) == original_files
+    assert list((tmp_path / "staging").iterdir()) == []
+
+
+def test_recover_transactions_rolls_back_unfinished_ones(
+        tmp_path: Path) -> None:
+    source, destination = make_addon_folders(tmp_path)
+    original_files = get_files(destination)
+    transaction = transactions.AddonTransaction(tmp_path / "staging")
+    transaction.move_into(source, destination)
+    transaction.remove(destination / "Addon")
+    # Crashed while writing the journal
+    with (transaction.transaction_dir / transactions.JOURNAL_FILE_NAME).open(
+            "a") as journal:
+        journal.write('{"action": "remo')
+    # Released by the OS when the process crashes
+    transaction.staging_folder.lock.release()
+    extracted = transactions.StagingFolder(tmp_path / "staging")
+    (extracted.path / "Addon.plugin").write_text("in use")
+
+    assert transactions.recover_transactions(tmp_path / "staging") == 1
+
+    assert get_files(destination) == original_files
+    # Folders that are still in use are left alone
+    assert get_files(extracted.path) == {"Addon.plugin": "in use"}
+    extracted.remove()
+    assert list((tmp_path / "staging").iterdir()) == []
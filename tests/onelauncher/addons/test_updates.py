@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from onelauncher.addons import database, updates
+
+
+def test_mark_updates(tmp_path: Path) -> None:
+    conn = database.connect(tmp_path / "addons_cache.sqlite")
+    database.migrate(conn)
+    c = conn.cursor()
+    database.insert_rows(c, "tablePluginsInstalled", [
+        ("Old", "", "v1.9", "", "", "old.plugin", "1", "", ""),
+        ("Current", "", "2.0", "", "", "current.plugin", "2", "", ""),
+        ("Manual", "", "1.0", "", "", "manual.plugin", "", "", "")])
+    database.insert_rows(c, "tablePlugins", [
+        ("Old", "", "1.10", "", "", "old.zip", "1", "", ""),
+        ("Current", "", "2.0.0", "", "", "current.zip", "2", "", ""),
+        ("Other", "", "5.0", "", "", "other.zip", "3", "", "")])
+    database.insert_rows(c, "tableSkinsInstalled", [
+        ("Skin", "", "1.0 beta", "", "", "Skin", "4", "", "")])
+    database.insert_rows(c, "tableSkins", [
+        ("Skin", "", "1.0", "", "", "skin.zip", "4", "", "")])
+    c.execute("UPDATE tablePlugins SET UpdateAvailable = 1 WHERE rowid = 3")
+
+    plan = updates.mark_updates(
+        c, ["tablePluginsInstalled", "tableSkinsInstalled"])
+
+    assert plan == [
+        ("tablePluginsInstalled", 1, "1", "old.plugin", "Old", 1, "1.10"),
+        ("tableSkinsInstalled", 1, "4", "Skin", "Skin", 1, "1.0")]
+    for table in ("tablePluginsInstalled", "tablePlugins"):
+        assert c.execute(
+            f"SELECT rowid FROM {table} WHERE UpdateAvailable").fetchall() == [
+            (1,)]
@@ -0,0 +1,31 @@
+import pytest
+
+from onelauncher.addons.versions import compare_versions
+
+
+@pytest.mark.parametrize("version, newer_version", [
+    ("1.9", "1.10"),
+    ("1.2", "1.2.1"),
+    ("v1.2", "1.3"),
+    ("Version 2", "v3"),
+    ("1.2 beta", "1.2"),
+    ("1.2 beta 2", "1.2 RC1"),
+    ("1.2", "1.2a"),
+    ("1.2a", "1.2b"),
+    ("2023-09-30", "2023-10-01"),
+    ("", "1"),
+])
+def test_compare_versions(version: str, newer_version: str) -> None:
+    assert compare_versions(version, newer_version) == -1
+    assert compare_versions(newer_version, version) == 1
+
+
+@pytest.mark.parametrize("version, same_version", [
+    ("1.2", "1.2.0"),
+    ("v1.2", "1.2"),
+    ("1-2", "1.2"),
+    ("1.0 Beta", "1.0beta"),
+])
+def test_compare_versions_ignores_formatting(
+        version: str, same_version: str) -> None:
+    assert compare_versions(version, same_version) == 0